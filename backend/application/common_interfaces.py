@@ -7,6 +7,10 @@ class DBSession(Protocol):
     @abstractmethod
     async def commit(self) -> None:
         pass
+
+    @abstractmethod
+    async def rollback(self) -> None:
+        pass
     
 class UUIDGenerator(Protocol):
     def __call__(self) -> UUID:
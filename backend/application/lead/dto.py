@@ -1,12 +1,41 @@
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import date, datetime
+from enum import Enum
 from typing import Any, Dict, List
 from uuid import UUID
-from domen.entities import InsightEntity  # доменная сущность инсайта
+from domen.entities import (  # доменная сущность инсайта
+    InsightEntity,
+    LeadEntity,
+    IntentEnum,
+    PriorityEnum,
+    NextActionEnum,
+)
 
 __all__ = [
     "LeadCreateInDTO",
     "LeadOutDTO",
+    "LeadKeyedCreateDTO",
+    "LeadBatchItemInDTO",
+    "LeadBatchResultDTO",
+    "LeadBatchStatus",
+    "LeadImportRowDTO",
+    "LeadImportRejectedRowDTO",
+    "LeadImportSummaryDTO",
+    "LeadListFilterDTO",
+    "LeadPageDTO",
+    "LeadSearchFilterDTO",
+    "LeadSearchHitDTO",
+    "LeadContactLookupDTO",
+    "LeadContactMatchesDTO",
+    "LeadExportFilterDTO",
+    "LeadExportStatsDTO",
+    "InsightBatchStatus",
+    "InsightBatchResultDTO",
+    "InsightAnalyticsDimension",
+    "InsightAnalyticsFilterDTO",
+    "InsightAnalyticsRowDTO",
+    "PartitionDTO",
+    "PartitionMaintenanceDTO",
 ]
 
 
@@ -53,8 +82,229 @@ class LeadOutDTO:
             insights=getattr(model, "insights", []) or [],  # копируем инсайты
         )
 
+    def to_dict(self) -> Dict[str, Any]:
+        # JSON-совместимое представление: сохраняется вместе с ключом идемпотентности
+        return {
+            "id": str(self.id),
+            "note": self.note,
+            "email": self.email,
+            "phone": self.phone,
+            "name": self.name,
+            "source": self.source,
+            "created_at": self.created_at.isoformat(),
+            "insights": [
+                {
+                    "id": str(i.id),
+                    "intent": i.intent.value,
+                    "priority": i.priority.value,
+                    "next_action": i.next_action.value,
+                    "confidence": i.confidence,
+                    "tags": i.tags,
+                    "content_hash": i.content_hash,
+                    "created_at": i.created_at.isoformat() if i.created_at else None,
+                }
+                for i in self.insights
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "LeadOutDTO":
+        return cls(
+            id=UUID(data["id"]),
+            note=data["note"],
+            email=data.get("email"),
+            phone=data.get("phone"),
+            name=data.get("name"),
+            source=data.get("source"),
+            created_at=datetime.fromisoformat(data["created_at"]),
+            insights=[
+                InsightEntity(
+                    id=UUID(i["id"]),
+                    lead_id=UUID(data["id"]),
+                    intent=IntentEnum(i["intent"]),
+                    priority=PriorityEnum(i["priority"]),
+                    next_action=NextActionEnum(i["next_action"]),
+                    confidence=i["confidence"],
+                    tags=i.get("tags"),
+                    content_hash=i["content_hash"],
+                    created_at=datetime.fromisoformat(i["created_at"]) if i.get("created_at") else None,
+                )
+                for i in data.get("insights", [])
+            ],
+        )
+
+@dataclass(slots=True)
+class LeadKeyedCreateDTO:
+    # Результат вставки лида с захватом ключа идемпотентности одним запросом
+    lead: LeadEntity
+    claimed: bool
+    stored_response: Dict[str, Any] | None = None
+
+
 @dataclass(slots=True)
 class InsighCreateInDto:
-    content: str
+    # None — claim-check сообщение без заметки: её читают из leads, если content_hash нет в memo
+    content: str | None
     lead_id: str
-    content_hash: str
\ No newline at end of file
+    content_hash: str
+
+class LeadBatchStatus(str, Enum):
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    INVALID = "invalid"
+
+
+@dataclass(slots=True)
+class LeadBatchItemInDTO:
+    lead: LeadCreateInDTO
+    idempotency_key: str | None = None
+
+
+@dataclass(slots=True)
+class LeadBatchResultDTO:
+    index: int
+    status: LeadBatchStatus
+    lead: LeadOutDTO | None = None
+    error: str | None = None
+
+
+@dataclass(slots=True)
+class LeadImportRowDTO:
+    line: int
+    lead: LeadCreateInDTO | None = None
+    created_at: datetime | None = None  # для исторических лидов, иначе время загрузки
+    error: str | None = None  # ошибка разбора строки до валидации
+
+
+@dataclass(slots=True)
+class LeadImportRejectedRowDTO:
+    line: int
+    error: str
+
+
+@dataclass(slots=True)
+class LeadImportSummaryDTO:
+    total: int = 0
+    imported: int = 0
+    rejected: int = 0
+    chunks: int = 0
+    elapsed_seconds: float = 0.0
+    rejected_rows: List[LeadImportRejectedRowDTO] = field(default_factory=list)
+    rejected_rows_truncated: bool = False
+
+
+@dataclass(slots=True)
+class LeadListFilterDTO:
+    limit: int
+    cursor: str | None = None
+    source: str | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+
+@dataclass(slots=True)
+class LeadPageDTO:
+    items: List[LeadOutDTO]
+    next_cursor: str | None = None
+
+
+@dataclass(slots=True)
+class LeadSearchFilterDTO:
+    query: str
+    limit: int
+    cursor: str | None = None
+
+
+@dataclass(slots=True)
+class LeadSearchHitDTO:
+    # rank нужен для курсора следующей страницы
+    lead: LeadEntity
+    rank: float
+
+
+@dataclass(slots=True)
+class LeadContactLookupDTO:
+    emails: List[str] = field(default_factory=list)
+    phones: List[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class LeadContactMatchesDTO:
+    # Значение контакта -> id лидов с ним (старые первыми); пустой список — совпадений нет
+    emails: Dict[str, List[UUID]] = field(default_factory=dict)
+    phones: Dict[str, List[UUID]] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class LeadExportFilterDTO:
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+
+
+@dataclass(slots=True)
+class LeadExportStatsDTO:
+    leads: int = 0
+    insights: int = 0
+    chunks: int = 0
+    elapsed_seconds: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.leads / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+
+class InsightBatchStatus(str, Enum):
+    CREATED = "created"
+    DUPLICATE = "duplicate"
+    INVALID = "invalid"
+
+
+@dataclass(slots=True)
+class InsightBatchResultDTO:
+    index: int
+    status: InsightBatchStatus
+    insight: InsightEntity | None = None
+    error: str | None = None
+
+
+class InsightAnalyticsDimension(str, Enum):
+    HOUR = "hour"
+    DAY = "day"
+    SOURCE = "source"
+    INTENT = "intent"
+    PRIORITY = "priority"
+    NEXT_ACTION = "next_action"
+
+
+@dataclass(slots=True)
+class InsightAnalyticsFilterDTO:
+    # Сводки хранятся почасово: created_from / created_to — начала часов UTC, период [created_from, created_to)
+    group_by: List[InsightAnalyticsDimension] = field(default_factory=list)
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+    source: str | None = None
+
+
+@dataclass(slots=True)
+class InsightAnalyticsRowDTO:
+    key: Dict[str, Any]
+    insights: int
+    leads: int
+
+
+@dataclass(slots=True)
+class PartitionDTO:
+    # Диапазон [lower, upper) по created_at; lower=None — партиция «всё до upper»
+    name: str
+    lower: date | None
+    upper: date
+
+
+@dataclass(slots=True)
+class PartitionMaintenanceDTO:
+    created: List[str] = field(default_factory=list)
+    dropped: List[str] = field(default_factory=list)
+    # Инсайты удалённых лидов из более поздних партиций insights
+    orphan_insights: int = 0
+    # Строки сводок аналитики за часы удалённых партиций insights
+    rollup_rows_deleted: int = 0
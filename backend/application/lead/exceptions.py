@@ -8,7 +8,10 @@ class InsightNotFoundException(Exception):
 
 class LeadAlreadyExistsException(Exception):
     """Исключение, возникающее при попытке создать лид, который уже существует."""
-    pass
+    def __init__(self, response: dict | None = None) -> None:
+        super().__init__()
+        # Тело исходного ответа 201, сохранённое с ключом идемпотентности (если есть)
+        self.response = response
 
 class InsightAlreadyExistsException(Exception):
     """Исключение, возникающее при попытке создать инсайт, который уже существует."""
@@ -20,4 +23,16 @@ class InvalidLeadDataException(Exception):
 
 class InvalidInsightDataException(Exception):
     """Некорректные данные инсайта (пустые / отсутствующие строки)."""
+    pass
+
+class InvalidLeadImportException(Exception):
+    """Тело импорта не удаётся разобрать целиком (неизвестный формат, нет заголовка CSV)."""
+    pass
+
+class InvalidCursorException(Exception):
+    """Курсор пагинации повреждён или выдан не этим сервисом."""
+    pass
+
+class InvalidAnalyticsFilterException(Exception):
+    """Границы периода аналитики не выровнены по часу UTC."""
     pass
\ No newline at end of file
@@ -1,11 +1,58 @@
-from .dto import LeadCreateInDTO, LeadOutDTO, InsighCreateInDto
+from .dto import (
+    LeadCreateInDTO,
+    LeadOutDTO,
+    InsighCreateInDto,
+    LeadBatchItemInDTO,
+    LeadBatchResultDTO,
+    LeadBatchStatus,
+    LeadImportRowDTO,
+    LeadImportRejectedRowDTO,
+    LeadImportSummaryDTO,
+    LeadListFilterDTO,
+    LeadPageDTO,
+    LeadSearchFilterDTO,
+    LeadContactLookupDTO,
+    LeadContactMatchesDTO,
+    LeadExportFilterDTO,
+    LeadExportStatsDTO,
+    InsightBatchStatus,
+    InsightBatchResultDTO,
+    InsightAnalyticsFilterDTO,
+    InsightAnalyticsRowDTO,
+    PartitionDTO,
+    PartitionMaintenanceDTO,
+)
 from . import exceptions
 from . import interfaces
 from . import validators
+from . import pagination
 
 from ..common_interfaces import DBSession
+from typing import AsyncIterable, AsyncIterator
 from uuid import UUID
+from datetime import date, datetime, timedelta, timezone
 import hashlib
+import json
+import logging
+import time
+from metrics import INTERACTOR_SECONDS, timed
+
+logger = logging.getLogger(__name__)
+
+
+def _json_default(v):
+    if isinstance(v, datetime):
+        return v.isoformat()
+    return str(v)
+
+def _lead_created_message(lead_model, note: str) -> dict:
+    content_hash = hashlib.sha256(note.encode("utf-8")).hexdigest()
+    return {
+        "lead_id": lead_model.id,
+        "content_hash": content_hash,
+        "occurred_at": lead_model.created_at.isoformat(),
+        "content": note,
+    }
 
 class CreateLeadInteractor:
     def __init__(
@@ -15,6 +62,7 @@ class CreateLeadInteractor:
         message_broker: interfaces.MessageBroker,
         session: DBSession,
         context: interfaces.ContextProvider,
+        lead_cache: interfaces.LeadCache,
     ) -> None:
         self.lead_repo = lead_repo
         self.keys_repo = keys_repo
@@ -22,63 +70,588 @@ class CreateLeadInteractor:
         self.message_broker = message_broker
         self.session = session
         self.context = context
+        self.lead_cache = lead_cache
         
+    @timed(INTERACTOR_SECONDS, "CreateLeadInteractor", "create_lead")
     async def create_lead(self, lead_dto: LeadCreateInDTO) -> LeadOutDTO:
         idempotency_key = self.context.get_idempotency_key()
-        
-        key_exists = await self.keys_repo.exists(idempotency_key)
-        if key_exists:
-            raise exceptions.LeadAlreadyExistsException()
-        
+
         self.validator(lead_dto).validate()
-        
-        lead_model = await self.lead_repo.create(lead_dto.to_dict())
-        
-        await self.keys_repo.create(idempotency_key)
+
+        if idempotency_key:
+            # Лид, ключ с телом ответа и прежний ответ по ключу — одним запросом (CTE);
+            # если ключ уже занят, лид откатываем и отдаём сохранённый ответ
+            created = await self.lead_repo.create_with_key(lead_dto, idempotency_key)
+            lead_model = created.lead
+            if not created.claimed:
+                await self.session.rollback()
+                stored = created.stored_response
+                if stored is None:
+                    # Владелец ключа зафиксировался уже после снимка нашего запроса
+                    stored = (await self.keys_repo.get_responses([idempotency_key])).get(idempotency_key)
+                raise exceptions.LeadAlreadyExistsException(stored)
+        else:
+            lead_model = await self.lead_repo.create(lead_dto)
+        lead_out = LeadOutDTO.from_model(lead_model)
+
+        # С outbox-брокером событие пишется в ту же транзакцию, что и лид
+        self.message_broker.publish(_lead_created_message(lead_model, lead_dto.note))
         await self.session.commit()
-        content_hash = hashlib.sha256(lead_dto.note.encode("utf-8")).hexdigest()
-        self.message_broker.publish({
-            "lead_id": lead_model.id,
-            "content_hash": content_hash,
-            "occurred_at": lead_model.created_at.isoformat(),
-            "content": lead_dto.note,  
-        })
-        return LeadOutDTO.from_model(lead_model)
-    
+        await self.lead_cache.set(lead_out)
+        return lead_out
+
+class CreateLeadsBatchInteractor:
+    def __init__(
+        self,
+        lead_repo: interfaces.LeadRepository,
+        keys_repo: interfaces.KeysRepository,
+        message_broker: interfaces.MessageBroker,
+        session: DBSession,
+        context: interfaces.ContextProvider,
+    ) -> None:
+        self.lead_repo = lead_repo
+        self.keys_repo = keys_repo
+        self.validator = validators.ValidateLead
+        self.message_broker = message_broker
+        self.session = session
+        self.context = context
+
+    def _row_key(self, index: int, item: LeadBatchItemInDTO, batch_key: str) -> str | None:
+        # Ключ строки задаётся явно, иначе выводится из Idempotency-Key запроса и позиции
+        if item.idempotency_key:
+            return item.idempotency_key
+        if batch_key:
+            return f"{batch_key}:{index}"
+        return None
+
+    @timed(INTERACTOR_SECONDS, "CreateLeadsBatchInteractor", "create_leads")
+    async def create_leads(self, items: list[LeadBatchItemInDTO]) -> list[LeadBatchResultDTO]:
+        batch_key = self.context.get_idempotency_key()
+        results: list[LeadBatchResultDTO | None] = [None] * len(items)
+        row_keys = [self._row_key(i, item, batch_key) for i, item in enumerate(items)]
+
+        valid: list[int] = []
+        for i, item in enumerate(items):
+            try:
+                self.validator(item.lead).validate()
+            except exceptions.InvalidLeadDataException as e:
+                results[i] = LeadBatchResultDTO(index=i, status=LeadBatchStatus.INVALID, error=str(e))
+                continue
+            valid.append(i)
+
+        # Первое вхождение ключа в пачке претендует на него, повторы внутри пачки — дубликаты
+        first_of_key: dict[str, int] = {}
+        for i in valid:
+            key = row_keys[i]
+            if key is not None and key not in first_of_key:
+                first_of_key[key] = i
+        claimed = await self.keys_repo.claim_many(list(first_of_key))
+        stored = await self.keys_repo.get_responses([k for k in first_of_key if k not in claimed])
+
+        to_insert: list[int] = []
+        for i in valid:
+            key = row_keys[i]
+            if key is None or (key in claimed and first_of_key[key] == i):
+                to_insert.append(i)
+
+        if to_insert:
+            lead_models = await self.lead_repo.create_many([items[i].lead for i in to_insert])
+            messages = []
+            responses = []
+            for i, lead_model in zip(to_insert, lead_models):
+                lead_out = LeadOutDTO.from_model(lead_model)
+                results[i] = LeadBatchResultDTO(index=i, status=LeadBatchStatus.CREATED, lead=lead_out)
+                if row_keys[i] is not None:
+                    responses.append((row_keys[i], lead_model.id, lead_out.to_dict()))
+                messages.append(_lead_created_message(lead_model, items[i].lead.note))
+            await self.keys_repo.store_responses(responses)
+            self.message_broker.publish_many(messages)
+            await self.session.commit()
+        elif first_of_key:
+            # Ключи не захвачены — фиксировать нечего
+            await self.session.rollback()
+
+        for i in valid:
+            if results[i] is not None:
+                continue
+            key = row_keys[i]
+            origin = results[first_of_key[key]]
+            if origin is not None and origin.status == LeadBatchStatus.CREATED:
+                lead = origin.lead
+            else:
+                response = stored.get(key)
+                lead = LeadOutDTO.from_dict(response) if response else None
+            results[i] = LeadBatchResultDTO(index=i, status=LeadBatchStatus.DUPLICATE, lead=lead)
+
+        return results
+
+class PurgeIdempotencyKeysInteractor:
+    def __init__(self, keys_repo: interfaces.KeysRepository, session: DBSession) -> None:
+        self.keys_repo = keys_repo
+        self.session = session
+
+    async def purge(self, older_than: datetime, batch_size: int) -> int:
+        # Короткие транзакции по batch_size строк, чтобы не держать блокировки на всю таблицу
+        total = 0
+        while True:
+            deleted = await self.keys_repo.purge_expired(older_than, batch_size)
+            await self.session.commit()
+            total += deleted
+            if deleted < batch_size:
+                return total
+
+class ImportLeadsInteractor:
+    # Сколько строк уходит в один COPY и один коммит; память импорта ограничена этим числом
+    CHUNK_SIZE = 5000
+    # Сколько отклонённых строк попадает в отчёт, остальные только считаются
+    MAX_REJECTED_REPORT = 1000
+
+    def __init__(
+        self,
+        lead_repo: interfaces.LeadRepository,
+        message_broker: interfaces.MessageBroker,
+        session: DBSession,
+        partitions: interfaces.PartitionRepository,
+    ) -> None:
+        self.lead_repo = lead_repo
+        self.validator = validators.ValidateLead
+        self.message_broker = message_broker
+        self.session = session
+        self.partitions = partitions
+
+    @staticmethod
+    def _retained(partitions: list[PartitionDTO], created_at: datetime) -> bool:
+        # Исторический created_at раньше ретенции или дальше созданных месяцев: для строки нет партиции,
+        # и COPY упал бы на всём чанке. Такие строки отклоняются по одной, как и невалидные
+        day = created_at.astimezone(timezone.utc).date()
+        return any((p.lower is None or p.lower <= day) and day < p.upper for p in partitions)
+
+    def _reject(self, summary: LeadImportSummaryDTO, line: int, error: str) -> None:
+        summary.rejected += 1
+        if len(summary.rejected_rows) < self.MAX_REJECTED_REPORT:
+            summary.rejected_rows.append(LeadImportRejectedRowDTO(line=line, error=error))
+        else:
+            summary.rejected_rows_truncated = True
+
+    async def _flush(self, chunk: list[LeadImportRowDTO], summary: LeadImportSummaryDTO) -> None:
+        lead_models = await self.lead_repo.copy_many(chunk)
+        self.message_broker.publish_many([
+            _lead_created_message(lead_model, row.lead.note)
+            for row, lead_model in zip(chunk, lead_models)
+        ])
+        await self.session.commit()
+        summary.imported += len(chunk)
+        summary.chunks += 1
+        logger.info(
+            "lead import: chunk %d committed, imported=%d rejected=%d",
+            summary.chunks, summary.imported, summary.rejected,
+        )
+
+    @timed(INTERACTOR_SECONDS, "ImportLeadsInteractor", "import_leads")
+    async def import_leads(self, rows: AsyncIterable[LeadImportRowDTO]) -> LeadImportSummaryDTO:
+        summary = LeadImportSummaryDTO()
+        started = time.perf_counter()
+        chunk: list[LeadImportRowDTO] = []
+        partitions = await self.partitions.list_partitions("leads")
+        async for row in rows:
+            summary.total += 1
+            if row.error is None:
+                try:
+                    self.validator(row.lead).validate()
+                except exceptions.InvalidLeadDataException as e:
+                    row.error = str(e)
+            if row.error is None and not self._retained(partitions, row.created_at or datetime.now(timezone.utc)):
+                row.error = "created_at outside retained range."
+            if row.error is not None:
+                self._reject(summary, row.line, row.error)
+                continue
+            chunk.append(row)
+            if len(chunk) >= self.CHUNK_SIZE:
+                await self._flush(chunk, summary)
+                chunk = []
+        if chunk:
+            await self._flush(chunk, summary)
+        summary.elapsed_seconds = round(time.perf_counter() - started, 3)
+        return summary
+
 class CreateInsightInteractor:
     def __init__(
         self,
         insight_repo: interfaces.InsightRepository,
         session: DBSession,
-        InsightGenerator: interfaces.InsightGenerator,
+        InsightGenerator: interfaces.AsyncInsightGenerator,
+        lead_cache: interfaces.LeadCache,
+        memo: interfaces.InsightMemo,
+        rollups: interfaces.InsightRollupRepository,
+        lead_repo: interfaces.LeadRepository,
     ) -> None:
+        self.lead_repo = lead_repo
         self.insight_repo = insight_repo
         self.session = session
         self.InsightGenerator = InsightGenerator
         self.validator = validators.ValidateInsight
+        self.lead_cache = lead_cache
+        self.memo = memo
+        self.rollups = rollups
         
+    @timed(INTERACTOR_SECONDS, "CreateInsightInteractor", "create_insight")
     async def create_insight(self, insight: InsighCreateInDto) -> dict:
         self.validator(insight).validate()
         
         insight_exists = await self.insight_repo.exists(insight.lead_id, insight.content_hash)
         if insight_exists:    
             raise exceptions.InsightAlreadyExistsException()
+        # Внешнего ключа на leads нет: сообщение для лида, удалённого ретенцией, не оставляет сирот
+        if not await self.lead_repo.existing_ids([insight.lead_id]):
+            raise exceptions.InvalidInsightDataException(f"lead {insight.lead_id} not found.")
             
-        gen_data = self.InsightGenerator.gen(insight.content)
+        version = self.InsightGenerator.version
+        # Одинаковая заметка (тот же content_hash) уже классифицирована — копируем результат
+        gen_data = (await self.memo.get_many(version, [insight.content_hash])).get(insight.content_hash)
+        if gen_data is None:
+            content = insight.content
+            if content is None:
+                content = (await self.lead_repo.get_notes([insight.lead_id])).get(insight.lead_id)
+                if not content:
+                    raise exceptions.InvalidInsightDataException(f"lead {insight.lead_id} not found.")
+            gen_data = await self.InsightGenerator.gen(content)
+            await self.memo.put_many(version, {insight.content_hash: gen_data})
         # Добавляем хэш из входного DTO
+        gen_data = dict(gen_data)
         gen_data["content_hash"] = insight.content_hash
 
         insight_model = await self.insight_repo.create(
             insight.lead_id,
             gen_data,
         )
+        # Сводки аналитики — в той же транзакции: счётчики не расходятся с таблицей insights
+        await self.rollups.apply([insight_model.id])
         await self.session.commit()
+        await self.lead_cache.invalidate([insight.lead_id])
         return insight_model
     
+class CreateInsightsBatchInteractor:
+    def __init__(
+        self,
+        insight_repo: interfaces.InsightRepository,
+        session: DBSession,
+        InsightGenerator: interfaces.AsyncInsightGenerator,
+        lead_cache: interfaces.LeadCache,
+        memo: interfaces.InsightMemo,
+        rollups: interfaces.InsightRollupRepository,
+        lead_repo: interfaces.LeadRepository,
+    ) -> None:
+        self.lead_repo = lead_repo
+        self.insight_repo = insight_repo
+        self.session = session
+        self.InsightGenerator = InsightGenerator
+        self.validator = validators.ValidateInsight
+        self.lead_cache = lead_cache
+        self.memo = memo
+        self.rollups = rollups
+
+    @timed(INTERACTOR_SECONDS, "CreateInsightsBatchInteractor", "create_insights")
+    async def create_insights(self, items: list[InsighCreateInDto]) -> list[InsightBatchResultDTO]:
+        results: list[InsightBatchResultDTO | None] = [None] * len(items)
+        valid: list[int] = []
+        for i, item in enumerate(items):
+            try:
+                self.validator(item).validate()
+            except exceptions.InvalidInsightDataException as e:
+                results[i] = InsightBatchResultDTO(index=i, status=InsightBatchStatus.INVALID, error=str(e))
+                continue
+            valid.append(i)
+
+        # Дубликаты внутри пачки отсекаем в памяти, уже сохранённые — одним запросом
+        existing = await self.insight_repo.existing_pairs(
+            [(items[i].lead_id, items[i].content_hash) for i in valid]
+        )
+        seen: set[tuple[str, str]] = set()
+        to_create: list[int] = []
+        for i in valid:
+            pair = (items[i].lead_id, items[i].content_hash)
+            if pair in existing or pair in seen:
+                results[i] = InsightBatchResultDTO(index=i, status=InsightBatchStatus.DUPLICATE)
+                continue
+            seen.add(pair)
+            to_create.append(i)
+
+        if to_create:
+            # Внешнего ключа на leads нет: инсайты лидов, удалённых ретенцией, не вставляются
+            known = await self.lead_repo.existing_ids(list(dict.fromkeys(items[i].lead_id for i in to_create)))
+            for i in to_create:
+                if items[i].lead_id not in known:
+                    results[i] = InsightBatchResultDTO(
+                        index=i,
+                        status=InsightBatchStatus.INVALID,
+                        error=f"lead {items[i].lead_id} not found.",
+                    )
+            to_create = [i for i in to_create if results[i] is None]
+
+        if to_create:
+            version = self.InsightGenerator.version
+            classified = await self.memo.get_many(version, [items[i].content_hash for i in to_create])
+            # Промахи memo классифицируются одним вызовом, по одному разу на content_hash
+            pending: dict[str, str] = {}
+            claims: dict[str, list[str]] = {}
+            for i in to_create:
+                content_hash = items[i].content_hash
+                if content_hash not in classified and content_hash not in pending:
+                    if items[i].content is None:
+                        claims.setdefault(content_hash, []).append(items[i].lead_id)
+                    else:
+                        pending[content_hash] = items[i].content
+            if claims:
+                # Claim-check: заметки промахов memo — одним запросом по id на пачку
+                notes = await self.lead_repo.get_notes([lead_id for ids in claims.values() for lead_id in ids])
+                for content_hash, lead_ids in claims.items():
+                    note = next((notes[lead_id] for lead_id in lead_ids if notes.get(lead_id)), None)
+                    if note is not None:
+                        pending.setdefault(content_hash, note)
+                for i in to_create:
+                    if items[i].content_hash not in classified and items[i].content_hash not in pending:
+                        results[i] = InsightBatchResultDTO(
+                            index=i,
+                            status=InsightBatchStatus.INVALID,
+                            error=f"lead {items[i].lead_id} not found.",
+                        )
+                to_create = [i for i in to_create if results[i] is None]
+            if pending:
+                generated = dict(zip(pending, await self.InsightGenerator.gen_many(list(pending.values()))))
+                await self.memo.put_many(version, generated)
+                classified.update(generated)
+            rows = []
+            for i in to_create:
+                gen_data = dict(classified[items[i].content_hash])
+                gen_data["content_hash"] = items[i].content_hash
+                rows.append((items[i].lead_id, gen_data))
+            insight_models = await self.insight_repo.create_many(rows)
+            await self.rollups.apply([m.id for m in insight_models])
+            await self.session.commit()
+            await self.lead_cache.invalidate(list(dict.fromkeys(items[i].lead_id for i in to_create)))
+            for i, insight_model in zip(to_create, insight_models):
+                results[i] = InsightBatchResultDTO(
+                    index=i,
+                    status=InsightBatchStatus.CREATED,
+                    insight=insight_model,
+                )
+        return results
+
+class PurgeInsightMemoInteractor:
+    def __init__(
+        self,
+        memo: interfaces.InsightMemo,
+        session: DBSession,
+        InsightGenerator: interfaces.AsyncInsightGenerator,
+    ) -> None:
+        self.memo = memo
+        self.session = session
+        self.InsightGenerator = InsightGenerator
+
+    async def purge(self) -> int:
+        # Результаты прежних версий генератора больше не читаются — удаляем их
+        deleted = await self.memo.purge_stale(self.InsightGenerator.version)
+        await self.session.commit()
+        return deleted
+
+def _is_hour_aligned(ts: datetime) -> bool:
+    # Без зоны — UTC; смещение вроде +05:30 сдвигает начало часа с границы сводки
+    offset = ts.utcoffset() or timedelta()
+    return not (ts.minute or ts.second or ts.microsecond or offset % timedelta(hours=1))
+
+class GetInsightAnalyticsInteractor:
+    def __init__(self, rollups: interfaces.InsightRollupRepository) -> None:
+        self.rollups = rollups
+
+    @timed(INTERACTOR_SECONDS, "GetInsightAnalyticsInteractor", "get_analytics")
+    async def get_analytics(self, filters: InsightAnalyticsFilterDTO) -> list[InsightAnalyticsRowDTO]:
+        # Сводка не делится внутри часа: невыровненная граница молча захватила бы лишние инсайты
+        for name in ("created_from", "created_to"):
+            bound = getattr(filters, name)
+            if bound is not None and not _is_hour_aligned(bound):
+                raise exceptions.InvalidAnalyticsFilterException(f"{name} must be the start of a UTC hour.")
+        filters.group_by = list(dict.fromkeys(filters.group_by))
+        return await self.rollups.query(filters)
+
+class RebuildInsightRollupsInteractor:
+    def __init__(self, rollups: interfaces.InsightRollupRepository, session: DBSession) -> None:
+        self.rollups = rollups
+        self.session = session
+
+    async def rebuild(self, since: datetime | None) -> int:
+        # Пересчёт из insights: после бэкфилла, ручных правок или удаления лидов
+        rows = await self.rollups.rebuild(since)
+        await self.session.commit()
+        return rows
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+class MaintainPartitionsInteractor:
+    # Инсайты удаляются раньше лидов: лид не должен пропасть, пока его инсайты ещё читаются.
+    # Партиции удаляются по собственному created_at, а каскада от лида к инсайтам нет: перед удалением
+    # партиции лидов их инсайты из более новых партиций удаляются явно, в той же транзакции.
+    # Сводки аналитики следуют за сырыми данными: часы удалённых партиций insights удаляются,
+    # часы удалённых поздних инсайтов пересчитываются — rebuild после ретенции не меняет цифры
+    TABLES = ("leads", "insights")
+
+    def __init__(
+        self,
+        partitions: interfaces.PartitionRepository,
+        session: DBSession,
+        rollups: interfaces.InsightRollupRepository,
+    ) -> None:
+        self.partitions = partitions
+        self.session = session
+        self.rollups = rollups
+
+    async def maintain(
+        self,
+        months_ahead: int,
+        retention_months: int,
+        today: date | None = None,
+    ) -> PartitionMaintenanceDTO:
+        current = (today or datetime.now(timezone.utc).date()).replace(day=1)
+        report = PartitionMaintenanceDTO()
+        # Каждая партиция — своя транзакция: DDL держит блокировку родителя недолго
+        for table in self.TABLES:
+            existing = await self.partitions.list_partitions(table)
+            for i in range(months_ahead + 1):
+                month = _add_months(current, i)
+                if any((p.lower is None or p.lower <= month) and month < p.upper for p in existing):
+                    continue
+                report.created.append(await self.partitions.create_partition(table, month))
+                await self.session.commit()
+        if retention_months > 0:
+            cutoff = _add_months(current, -retention_months)
+            for table in reversed(self.TABLES):
+                for partition in await self.partitions.list_partitions(table):
+                    if partition.upper > cutoff:
+                        continue
+                    if table == "leads":
+                        hours = await self.partitions.delete_insights_of_leads(partition.name)
+                        await self.rollups.refresh(hours)
+                        report.orphan_insights += len(hours)
+                    await self.partitions.drop_partition(table, partition.name)
+                    if table == "insights":
+                        bound = datetime(partition.upper.year, partition.upper.month, 1, tzinfo=timezone.utc)
+                        report.rollup_rows_deleted += await self.rollups.delete_before(bound)
+                    await self.session.commit()
+                    report.dropped.append(partition.name)
+        return report
+
 class GetLeadInteractor:
-    def __init__(self, lead_repo: interfaces.LeadRepository) -> None:
+    def __init__(self, lead_repo: interfaces.LeadRepository, lead_cache: interfaces.LeadCache) -> None:
         self.lead_repo = lead_repo
-        
+        self.lead_cache = lead_cache
+
+    @timed(INTERACTOR_SECONDS, "GetLeadInteractor", "get_lead")
     async def get_lead(self, lead_id: UUID) -> LeadOutDTO:
+        cached = await self.lead_cache.get(str(lead_id))
+        if cached is not None:
+            return cached
         lead_model = await self.lead_repo.get(lead_id)
-        return LeadOutDTO.from_model(lead_model)
\ No newline at end of file
+        lead = LeadOutDTO.from_model(lead_model)
+        await self.lead_cache.set(lead)
+        return lead
+
+class ListLeadsInteractor:
+    def __init__(self, lead_repo: interfaces.LeadRepository) -> None:
+        self.lead_repo = lead_repo
+
+    @timed(INTERACTOR_SECONDS, "ListLeadsInteractor", "list_leads")
+    async def list_leads(self, filters: LeadListFilterDTO) -> LeadPageDTO:
+        after = pagination.decode_cursor(filters.cursor) if filters.cursor else None
+        # Берём на одну запись больше, чтобы понять, есть ли следующая страница
+        lead_models = await self.lead_repo.list_page(filters, after, filters.limit + 1)
+        has_more = len(lead_models) > filters.limit
+        lead_models = lead_models[: filters.limit]
+        next_cursor = None
+        if has_more:
+            last = lead_models[-1]
+            next_cursor = pagination.encode_cursor(last.created_at, last.id)
+        return LeadPageDTO(
+            items=[LeadOutDTO.from_model(m) for m in lead_models],
+            next_cursor=next_cursor,
+        )
+
+class SearchLeadsInteractor:
+    # Короче трёх символов триграммный индекс не работает — был бы последовательный скан
+    MIN_QUERY_LENGTH = 3
+
+    def __init__(self, lead_repo: interfaces.LeadRepository) -> None:
+        self.lead_repo = lead_repo
+
+    @timed(INTERACTOR_SECONDS, "SearchLeadsInteractor", "search_leads")
+    async def search_leads(self, filters: LeadSearchFilterDTO) -> LeadPageDTO:
+        query = " ".join(filters.query.split())
+        if len(query) < self.MIN_QUERY_LENGTH:
+            raise exceptions.InvalidLeadDataException(
+                f"search query must be at least {self.MIN_QUERY_LENGTH} characters."
+            )
+        after = pagination.decode_search_cursor(filters.cursor) if filters.cursor else None
+        hits = await self.lead_repo.search(query, after, filters.limit + 1)
+        has_more = len(hits) > filters.limit
+        hits = hits[: filters.limit]
+        next_cursor = None
+        if has_more:
+            last = hits[-1]
+            next_cursor = pagination.encode_search_cursor(last.rank, last.lead.id)
+        return LeadPageDTO(
+            items=[LeadOutDTO.from_model(h.lead) for h in hits],
+            next_cursor=next_cursor,
+        )
+
+class FindLeadsByContactInteractor:
+    MAX_VALUES = 1000
+
+    def __init__(self, lead_repo: interfaces.LeadRepository) -> None:
+        self.lead_repo = lead_repo
+
+    @timed(INTERACTOR_SECONDS, "FindLeadsByContactInteractor", "find_leads")
+    async def find_leads(self, lookup: LeadContactLookupDTO) -> LeadContactMatchesDTO:
+        if len(lookup.emails) + len(lookup.phones) > self.MAX_VALUES:
+            raise exceptions.InvalidLeadDataException(
+                f"at most {self.MAX_VALUES} emails and phones per lookup."
+            )
+        # Нормализация та же, что при вставке лида; ответ — по исходным значениям запроса
+        emails = {value: validators.normalize_email(value) for value in lookup.emails}
+        phones = {value: validators.normalize_phone(value) for value in lookup.phones}
+        found = await self.lead_repo.find_by_contacts(
+            sorted({n for n in emails.values() if n}),
+            sorted({n for n in phones.values() if n}),
+        )
+        return LeadContactMatchesDTO(
+            emails={value: found.emails.get(n, []) if n else [] for value, n in emails.items()},
+            phones={value: found.phones.get(n, []) if n else [] for value, n in phones.items()},
+        )
+
+class ExportLeadsInteractor:
+    # Размер порции, которую серверный курсор отдаёт за один fetch
+    CHUNK_SIZE = 2000
+
+    def __init__(self, lead_repo: interfaces.LeadRepository) -> None:
+        self.lead_repo = lead_repo
+
+    async def export_ndjson(
+        self,
+        filters: LeadExportFilterDTO,
+        stats: LeadExportStatsDTO,
+    ) -> AsyncIterator[bytes]:
+        started = time.perf_counter()
+        async for leads in self.lead_repo.stream_with_insights(filters, self.CHUNK_SIZE):
+            lines = [
+                json.dumps(lead, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+                for lead in leads
+            ]
+            stats.leads += len(leads)
+            stats.insights += sum(len(lead["insights"]) for lead in leads)
+            stats.chunks += 1
+            stats.elapsed_seconds = time.perf_counter() - started
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+        stats.elapsed_seconds = time.perf_counter() - started
+        logger.info(
+            "lead export: %d leads, %d insights in %.2fs (%.0f rows/sec)",
+            stats.leads, stats.insights, stats.elapsed_seconds, stats.rows_per_sec,
+        )
\ No newline at end of file
@@ -3,9 +3,9 @@ from typing import Protocol
 from . import dto
 from domen import entities
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
-from typing import List
+from typing import AsyncIterator, Dict, List, Sequence, Set
 from uuid import UUID
 
 class Intent(Enum):
@@ -47,17 +47,84 @@ class LeadRepository(Protocol):
     def create(self, lead: dto.LeadCreateInDTO) -> entities.LeadEntity:
         ...
     
+    @abstractmethod
+    def create_with_key(self, lead: dto.LeadCreateInDTO, key: str) -> dto.LeadKeyedCreateDTO:
+        ...
+
+    @abstractmethod
+    def create_many(self, leads: Sequence[dto.LeadCreateInDTO]) -> List[entities.LeadEntity]:
+        ...
+
+    @abstractmethod
+    def copy_many(self, rows: Sequence[dto.LeadImportRowDTO]) -> List[entities.LeadEntity]:
+        ...
+
     @abstractmethod
     def get(self, lead_id: str) -> entities.LeadEntity:
         ...
 
+    @abstractmethod
+    def list_page(
+        self,
+        filters: dto.LeadListFilterDTO,
+        after: tuple[datetime, UUID] | None,
+        limit: int,
+    ) -> List[entities.LeadEntity]:
+        ...
+
+    @abstractmethod
+    def search(
+        self,
+        query: str,
+        after: tuple[float, UUID] | None,
+        limit: int,
+    ) -> List[dto.LeadSearchHitDTO]:
+        ...
+
+    @abstractmethod
+    def find_by_contacts(
+        self,
+        emails: Sequence[str],
+        phones: Sequence[str],
+    ) -> dto.LeadContactMatchesDTO:
+        ...
+
+    @abstractmethod
+    def get_notes(self, lead_ids: Sequence[str]) -> Dict[str, str]:
+        ...
+
+    @abstractmethod
+    def existing_ids(self, lead_ids: Sequence[str]) -> Set[str]:
+        # Внешнего ключа insights -> leads нет: существование лида проверяется перед вставкой инсайта
+        ...
+
+    @abstractmethod
+    def stream_with_insights(
+        self,
+        filters: dto.LeadExportFilterDTO,
+        chunk_size: int,
+    ) -> AsyncIterator[List[dict]]:
+        ...
+
 class KeysRepository(Protocol):
     @abstractmethod
-    def exists(self, key: str) -> bool:
+    def claim(self, key: str, lead_id: UUID, response: dict) -> bool:
         ...
-    
+
     @abstractmethod
-    def create(self, key: str) -> None:
+    def claim_many(self, keys: Sequence[str]) -> Set[str]:
+        ...
+
+    @abstractmethod
+    def store_responses(self, responses: Sequence[tuple[str, UUID, dict]]) -> None:
+        ...
+
+    @abstractmethod
+    def get_responses(self, keys: Sequence[str]) -> Dict[str, dict | None]:
+        ...
+
+    @abstractmethod
+    def purge_expired(self, older_than: datetime, batch_size: int) -> int:
         ...
 
 class InsightRepository(Protocol):
@@ -69,6 +136,56 @@ class InsightRepository(Protocol):
     def exists(self, lead_id: str, content_hash: str) -> bool:
         ...
 
+    @abstractmethod
+    def create_many(self, insights: Sequence[tuple[str, dict]]) -> List[entities.InsightEntity]:
+        ...
+
+    @abstractmethod
+    def existing_pairs(self, pairs: Sequence[tuple[str, str]]) -> Set[tuple[str, str]]:
+        ...
+
+class InsightRollupRepository(Protocol):
+    # Почасовые сводки инсайтов: apply — в транзакции записи, rebuild — пересчёт из insights
+    @abstractmethod
+    async def apply(self, insight_ids: Sequence[UUID]) -> None:
+        ...
+
+    @abstractmethod
+    async def rebuild(self, since: datetime | None) -> int:
+        ...
+
+    @abstractmethod
+    async def query(self, filters: dto.InsightAnalyticsFilterDTO) -> List[dto.InsightAnalyticsRowDTO]:
+        ...
+
+    @abstractmethod
+    async def refresh(self, hours: Sequence[datetime]) -> None:
+        # Пересчёт отдельных часов из insights — после удаления инсайтов вне ретенции
+        ...
+
+    @abstractmethod
+    async def delete_before(self, bound: datetime) -> int:
+        ...
+
+class PartitionRepository(Protocol):
+    # Помесячные партиции leads / insights; table — имя секционированной таблицы
+    @abstractmethod
+    async def list_partitions(self, table: str) -> List[dto.PartitionDTO]:
+        ...
+
+    @abstractmethod
+    async def create_partition(self, table: str, month: date) -> str:
+        ...
+
+    @abstractmethod
+    async def drop_partition(self, table: str, name: str) -> None:
+        ...
+
+    @abstractmethod
+    async def delete_insights_of_leads(self, name: str) -> List[datetime]:
+        # Инсайты лидов из партиции leads name, где бы они ни лежали; возвращает час сводки каждого удалённого
+        ...
+
 class ContextProvider(Protocol):
     @abstractmethod
     def get_idempotency_key(self) -> UUID:
@@ -79,7 +196,54 @@ class MessageBroker(Protocol):
     def publish(self, message: dict) -> None:
         ...
 
+    @abstractmethod
+    def publish_many(self, messages: Sequence[dict]) -> None:
+        ...
+
+class LeadCache(Protocol):
+    @abstractmethod
+    async def get(self, lead_id: str) -> dto.LeadOutDTO | None:
+        ...
+
+    @abstractmethod
+    async def set(self, lead: dto.LeadOutDTO) -> None:
+        ...
+
+    @abstractmethod
+    async def invalidate(self, lead_ids: Sequence[str]) -> None:
+        ...
+
 class InsightGenerator(Protocol):
     @abstractmethod
     def gen(self, content: str) -> InsightData:
-        ...
\ No newline at end of file
+        ...
+
+    @abstractmethod
+    def gen_many(self, contents: Sequence[str]) -> List[InsightData]:
+        ...
+
+class AsyncInsightGenerator(Protocol):
+    # Классификатор для интеракторов: вычисление может идти вне цикла событий (пул процессов)
+    version: str
+
+    @abstractmethod
+    async def gen(self, content: str) -> InsightData:
+        ...
+
+    @abstractmethod
+    async def gen_many(self, contents: Sequence[str]) -> List[InsightData]:
+        ...
+
+class InsightMemo(Protocol):
+    # Готовые результаты классификатора по content_hash; version — версия генератора
+    @abstractmethod
+    async def get_many(self, version: str, content_hashes: Sequence[str]) -> Dict[str, InsightData]:
+        ...
+
+    @abstractmethod
+    async def put_many(self, version: str, results: Dict[str, InsightData]) -> None:
+        ...
+
+    @abstractmethod
+    async def purge_stale(self, version: str) -> int:
+        ...
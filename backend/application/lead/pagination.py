@@ -0,0 +1,41 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from uuid import UUID
+from .exceptions import InvalidCursorException
+
+# Курсор непрозрачен для клиента: base64 от позиции (created_at, id) последнего элемента
+
+
+def encode_cursor(created_at: datetime, lead_id: UUID) -> str:
+    raw = json.dumps([created_at.isoformat(), str(lead_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, lead_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), UUID(lead_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursorException("cursor is malformed.") from e
+
+
+# Курсор поиска: позиция (rank, id); rank — float4 из Postgres, repr сохраняет его без потерь
+
+
+def encode_search_cursor(rank: float, lead_id: UUID) -> str:
+    raw = json.dumps([rank, str(lead_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, UUID]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        rank, lead_id = json.loads(raw)
+        if isinstance(rank, bool) or not isinstance(rank, (int, float)):
+            raise TypeError("rank must be a number")
+        return float(rank), UUID(lead_id)
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise InvalidCursorException("cursor is malformed.") from e
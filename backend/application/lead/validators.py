@@ -8,6 +8,16 @@ from domen.entities import (
     MIN_NAME_LEN,
 )
 
+def normalize_email(email: str | None) -> str | None:
+    # Ключ поиска дубликатов: как в ValidateLead (strip) плюс регистр
+    email = email.strip().lower() if email is not None else ""
+    return email or None
+
+def normalize_phone(phone: str | None) -> str | None:
+    # ValidateLead пропускает только цифры; во входе поиска убираем пробелы, скобки, +, дефисы
+    digits = "".join(ch for ch in phone if ch.isdigit()) if phone is not None else ""
+    return digits or None
+
 class ValidateLead:
     def __init__(self, lead: LeadCreateInDTO) -> None:
         self.lead = lead
@@ -75,7 +85,7 @@ class ValidateInsight:
         self.insight.lead_id = self._norm(self.insight.lead_id)
         self.insight.content_hash = self._norm(self.insight.content_hash)
 
-        if not self.insight.content:
+        if self.insight.content is not None and not self.insight.content:
             errors.append("content is required and cannot be blank.")
         if not self.insight.lead_id:
             errors.append("lead_id is required and cannot be blank.")
@@ -0,0 +1,87 @@
+"""
+Кодеки сообщений lead.created: байты на проводе и время encode/decode по размеру заметки.
+
+    python -m benchmarks.bench_codecs -n 5000 --note-sizes 200 2000 20000 --output codecs.json
+
+Варианты: legacy (json.dumps/json.loads, как публиковалось раньше), json (orjson), msgpack —
+каждый без сжатия и со сжатием zlib выше порога. msgpack пропускается, если пакет не установлен.
+"""
+import argparse
+import hashlib
+import json
+import uuid
+from datetime import datetime, timezone
+from benchmarks.bench_generator import make_notes
+from benchmarks.harness import emit, environment, measure_sync
+from infrastructure.queue.codec import MessageSerializer, UnsupportedMessageFormat, decode_message
+
+
+def _note(size: int) -> str:
+    note, notes = "", iter(make_notes(max(1, size // 20) + 1))
+    while len(note.encode("utf-8")) < size:
+        note += next(notes) + ". "
+    return note.encode("utf-8")[:size].decode("utf-8", "ignore")
+
+
+def _message(note: str) -> dict:
+    return {
+        "lead_id": uuid.uuid4(),
+        "content_hash": hashlib.sha256(note.encode("utf-8")).hexdigest(),
+        "occurred_at": datetime.now(timezone.utc).isoformat(),
+        "content": note,
+    }
+
+
+def _legacy(message: dict) -> tuple[dict, dict]:
+    def encode(i: int) -> bytes:
+        return json.dumps(message, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+    body = encode(0)
+    return (
+        {"bytes": len(body), "content_encoding": None},
+        {"encode": encode, "decode": lambda i: json.loads(body.decode("utf-8"))},
+    )
+
+
+def _variant(message: dict, codec: str, threshold: int) -> tuple[dict, dict]:
+    serializer = MessageSerializer(codec, compress_threshold=threshold)
+    encoded = serializer.encode(message)
+    return (
+        {"bytes": len(encoded.body), "content_encoding": encoded.content_encoding},
+        {
+            "encode": lambda i: serializer.encode(message),
+            "decode": lambda i: decode_message(encoded.body, encoded.content_type, encoded.content_encoding),
+        },
+    )
+
+
+def bench(args: argparse.Namespace) -> list[dict]:
+    results = []
+    for size in args.note_sizes:
+        message = _message(_note(size))
+        variants = {"legacy": _legacy(message)}
+        for codec in ("json", "msgpack"):
+            try:
+                variants[codec] = _variant(message, codec, 0)
+                variants[f"{codec}+deflate"] = _variant(message, codec, args.compress_threshold)
+            except UnsupportedMessageFormat:
+                continue
+        for name, (wire, ops) in variants.items():
+            for op, fn in ops.items():
+                result = measure_sync(op, fn, args.iterations, codec=name, note_bytes=size)
+                result["wire"] = wire
+                results.append(result)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Message codecs: bytes on the wire and encode/decode time")
+    parser.add_argument("-n", "--iterations", type=int, default=5000)
+    parser.add_argument("--note-sizes", type=int, nargs="+", default=[200, 2000, 20000])
+    parser.add_argument("--compress-threshold", type=int, default=1024)
+    parser.add_argument("--output", help="записать JSON-отчёт в файл")
+    args = parser.parse_args()
+    emit({"environment": environment(), "results": bench(args)}, args.output)
+
+
+if __name__ == "__main__":
+    main()
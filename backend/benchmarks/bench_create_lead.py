@@ -0,0 +1,134 @@
+"""
+Бенчмарк пути записи POST /leads: число обращений к Postgres и p50/p99 латентности
+CreateLeadInteractor до и после перехода на INSERT ... RETURNING + CTE с захватом ключа.
+
+"before" воспроизводит прежнюю реализацию (add/flush/refresh лида, затем отдельный INSERT ключа),
+"after" — текущий LeadRepository.create_with_key. Нужна база с применёнными миграциями:
+
+    alembic upgrade head
+    python -m benchmarks.bench_create_lead -n 2000 --output create_lead.json
+
+Параметры подключения берутся из POSTGRES_* (как у приложения).
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import uuid
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from application.lead.dto import LeadCreateInDTO, LeadKeyedCreateDTO, LeadOutDTO
+from application.lead.interactors import CreateLeadInteractor
+from application.lead import interfaces
+from benchmarks.harness import emit, environment, summarize
+from config import PostgresConfig
+from infrastructure.db import models
+from infrastructure.db.database import new_session_maker
+from infrastructure.db.repositories import KeysRepository, LeadRepository, _lead_model_to_entity
+from infrastructure.queue.outbox import OutboxMessageBroker
+from infrastructure.cache import LeadCache, LRUCache
+
+
+class _LegacyLeadRepository(LeadRepository):
+    # Прежний путь: ORM add + flush + refresh, ключ — отдельным INSERT ... ON CONFLICT
+    async def create_with_key(self, lead: LeadCreateInDTO, key: str) -> LeadKeyedCreateDTO:
+        model = models.Lead(**lead.to_dict())
+        self.session.add(model)
+        await self.session.flush()
+        await self.session.refresh(model)
+        entity = _lead_model_to_entity(model)
+        claimed = await KeysRepository(self.session).claim(
+            key, entity.id, LeadOutDTO.from_model(entity).to_dict()
+        )
+        return LeadKeyedCreateDTO(lead=entity, claimed=claimed)
+
+
+class _StaticContext(interfaces.ContextProvider):
+    def __init__(self, key: str) -> None:
+        self._key = key
+
+    def get_idempotency_key(self) -> str:
+        return self._key
+
+
+class RoundTripCounter:
+    """Считает запросы к серверу: BEGIN, выполненные выражения и COMMIT/ROLLBACK."""
+    def __init__(self, engine) -> None:
+        self.count = 0
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "begin", self._inc)
+        event.listen(sync_engine, "commit", self._inc)
+        event.listen(sync_engine, "rollback", self._inc)
+        event.listen(sync_engine, "before_cursor_execute", self._inc)
+
+    def _inc(self, *args, **kwargs) -> None:
+        self.count += 1
+
+
+async def _run(
+    session_maker: async_sessionmaker[AsyncSession],
+    counter: RoundTripCounter,
+    lead_repo_cls: type[LeadRepository],
+    requests: int,
+    variant: str,
+) -> dict:
+    latencies: list[float] = []
+    round_trips: list[int] = []
+    run_started = time.perf_counter()
+    cache = LeadCache(LRUCache(max_size=0))
+    for i in range(requests):
+        async with session_maker() as session:
+            interactor = CreateLeadInteractor(
+                lead_repo=lead_repo_cls(session),
+                keys_repo=KeysRepository(session),
+                message_broker=OutboxMessageBroker(session),
+                session=session,
+                context=_StaticContext(f"bench-{uuid.uuid4()}"),
+                lead_cache=cache,
+            )
+            before = counter.count
+            started = time.perf_counter()
+            await interactor.create_lead(LeadCreateInDTO(note=f"benchmark lead {i}", source="bench"))
+            latencies.append(time.perf_counter() - started)
+            round_trips.append(counter.count - before)
+    result = summarize("create_lead", latencies, time.perf_counter() - run_started, variant=variant)
+    result["round_trips_per_request"] = statistics.mean(round_trips)
+    return result
+
+
+async def main_async(args: argparse.Namespace) -> list[dict]:
+    session_maker = await new_session_maker(PostgresConfig(**os.environ))
+    engine = session_maker.kw["bind"]
+    counter = RoundTripCounter(engine)
+    try:
+        # Прогрев: пул соединений и кеш подготовленных выражений
+        await _run(session_maker, counter, LeadRepository, min(50, args.requests), "warmup")
+        await _run(session_maker, counter, _LegacyLeadRepository, min(50, args.requests), "warmup")
+        result = [
+            await _run(session_maker, counter, _LegacyLeadRepository, args.requests, "before"),
+            await _run(session_maker, counter, LeadRepository, args.requests, "after"),
+        ]
+        if args.cleanup:
+            async with session_maker() as session:
+                await session.execute(text("DELETE FROM keys WHERE response->>'source' = 'bench'"))
+                await session.execute(text("DELETE FROM insights WHERE lead_id IN (SELECT id FROM leads WHERE source = 'bench')"))
+                await session.execute(text("DELETE FROM leads WHERE source = 'bench'"))
+                await session.execute(text("DELETE FROM outbox WHERE payload->>'content' LIKE 'benchmark lead %'"))
+                await session.commit()
+        return result
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="POST /leads write path: round trips and latency")
+    parser.add_argument("-n", "--requests", type=int, default=1000)
+    parser.add_argument("--cleanup", action="store_true", help="удалить созданные лиды и outbox после прогона")
+    parser.add_argument("--output", help="записать JSON-отчёт в файл")
+    args = parser.parse_args()
+    emit({"environment": environment(), "results": asyncio.run(main_async(args))}, args.output)
+
+
+if __name__ == "__main__":
+    main()
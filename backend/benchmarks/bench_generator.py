@@ -0,0 +1,68 @@
+"""
+Пропускная способность классификатора инсайтов: gen() по одной заметке против gen_many() пачками.
+
+    python -m benchmarks.bench_generator -n 50000 --batch-sizes 1 100 1000 10000 --output generator.json
+
+Латентность в отчёте — на один вызов: gen() на заметку или gen_many() на пачку.
+"""
+import argparse
+import random
+import time
+from benchmarks.harness import emit, environment, summarize
+from infrastructure.generator import GENERATOR_VERSION, InsightGenerator
+
+_FRAGMENTS = [
+    "хочу купить", "пришлите цену", "нужен счёт на оплату", "срочно", "не работает вход",
+    "ошибка при оплате", "верните деньги", "казино", "выиграй приз", "резюме на вакансию",
+    "стажировка", "please send a quote", "refund please", "login error", "job application",
+    "добрый день", "спасибо", "перезвоните", "менеджеру", "по поводу", "заказа №", "доставка",
+]
+
+
+def make_notes(count: int, seed: int = 42) -> list[str]:
+    # Фиксированный seed: прогоны сравнимы между собой
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(3, 12))) + f" #{i}"
+        for i in range(count)
+    ]
+
+
+def measure(generator: InsightGenerator, notes: list[str], batch_size: int) -> dict:
+    samples: list[float] = []
+    clock = time.perf_counter
+    started = clock()
+    if batch_size == 1:
+        for note in notes:
+            t0 = clock()
+            generator.gen(note)
+            samples.append(clock() - t0)
+    else:
+        for start in range(0, len(notes), batch_size):
+            t0 = clock()
+            generator.gen_many(notes[start:start + batch_size])
+            samples.append(clock() - t0)
+    elapsed = clock() - started
+    result = summarize("gen" if batch_size == 1 else "gen_many", samples, elapsed, batch_size=batch_size)
+    result["notes_per_sec"] = round(len(notes) / elapsed, 1)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Insight classifier throughput")
+    parser.add_argument("-n", "--notes", type=int, default=50_000)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 100, 1000, 10_000])
+    parser.add_argument("--output", help="записать JSON-отчёт в файл")
+    args = parser.parse_args()
+
+    notes = make_notes(args.notes)
+    generator = InsightGenerator()
+    generator.gen_many(notes[:1000])  # прогрев кеша токенов
+    emit({
+        "environment": {**environment(), "generator_version": GENERATOR_VERSION},
+        "results": [measure(generator, notes, b) for b in args.batch_sizes],
+    }, args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+Горячие пути API и воркера: пропускная способность и p50/p90/p99 по операциям, отчёт в JSON.
+
+    python -m benchmarks.bench_hot_paths -n 2000 --output bench.json
+    python -m benchmarks.bench_hot_paths --postgres --cleanup   # плюс прогон на локальном Postgres
+
+Сценарии:
+  validate_lead            — ValidateLead на типичном лиде;
+  lead_conversion          — models.Lead → LeadEntity → LeadOutDTO → LeadOut (pydantic) → JSON, 0/10/100 инсайтов;
+  post_lead                — POST /leads через ASGI-стек FastAPI + dishka с ключом идемпотентности;
+  get_lead                 — GET /leads/{id} с 0/10/100 инсайтами, кеш лидов выключен (cold) и включён (warm);
+  worker_message           — LeadCreatedWorker._on_message, одно сообщение на вызов;
+  worker_batch             — LeadCreatedWorker._flush пачками по --batch-size.
+
+Бэкенд memory — in-memory репозитории и брокер из benchmarks.memory: видна собственная стоимость
+приложения без сети. Бэкенд postgres — реальные репозитории и outbox; база из POSTGRES_* с применёнными
+миграциями, если она недоступна, в отчёте будет "skipped". Строки прогона помечены source = 'bench'.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import uuid
+from datetime import datetime, timezone
+from dishka import AsyncContainer, Provider, Scope, make_async_container, provide
+from dishka.integrations.fastapi import FastapiProvider, setup_dishka
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from application.common_interfaces import DBSession
+from application.lead import interfaces
+from application.lead.dto import LeadCreateInDTO, LeadOutDTO
+from application.lead.validators import ValidateLead
+from benchmarks.bench_generator import make_notes
+from benchmarks.harness import emit, environment, measure_async, measure_sync
+from benchmarks.memory import (
+    InMemoryInsightMemoRepository,
+    InMemoryInsightRepository,
+    InMemoryInsightRollupRepository,
+    InMemoryKeysRepository,
+    InMemoryLeadRepository,
+    InMemoryMessageBroker,
+    InMemoryPartitionRepository,
+    InMemoryStore,
+    NullSession,
+)
+from config import Config
+from handlers.api import metrics as metrics_api
+from handlers.api.v1 import exceptions_handlers, leads
+from handlers.rabbitmq.worker import LeadCreatedWorker
+from infrastructure.cache import LeadCache, LRUCache
+from infrastructure.db import models
+from infrastructure.db import repositories as db_repositories
+from infrastructure.generator import InsightGenerator
+from ioc import ConfigProvider, DBProviders, FastApiProviders, RabbitMQProviders
+
+BENCH_SOURCE = "bench"
+
+
+class InMemoryProviders(Provider):
+    store = provide(InMemoryStore, scope=Scope.APP)
+
+    @provide(scope=Scope.REQUEST)
+    def session(self) -> DBSession:
+        return NullSession()
+
+    @provide(scope=Scope.REQUEST)
+    def lead_repository(self, store: InMemoryStore) -> interfaces.LeadRepository:
+        return InMemoryLeadRepository(store)
+
+    @provide(scope=Scope.REQUEST)
+    def keys_repository(self, store: InMemoryStore) -> interfaces.KeysRepository:
+        return InMemoryKeysRepository(store)
+
+    @provide(scope=Scope.REQUEST)
+    def insight_repository(self, store: InMemoryStore) -> interfaces.InsightRepository:
+        return InMemoryInsightRepository(store)
+
+    @provide(scope=Scope.REQUEST)
+    def insight_rollup_repository(self, store: InMemoryStore) -> interfaces.InsightRollupRepository:
+        return InMemoryInsightRollupRepository(store)
+
+    @provide(scope=Scope.REQUEST)
+    def partition_repository(self) -> interfaces.PartitionRepository:
+        return InMemoryPartitionRepository()
+
+    @provide(scope=Scope.REQUEST)
+    def message_broker(self, store: InMemoryStore) -> interfaces.MessageBroker:
+        return InMemoryMessageBroker(store)
+
+    @provide(scope=Scope.REQUEST)
+    def insight_memo_repository(self, store: InMemoryStore) -> db_repositories.InsightMemoRepository:
+        return InMemoryInsightMemoRepository(store)  # type: ignore[return-value]
+
+
+class LeadCacheProvider(Provider):
+    # Подменяет кеш лидов: max_size=0 — каждый GET идёт в репозиторий
+    def __init__(self, max_size: int) -> None:
+        super().__init__()
+        self._max_size = max_size
+
+    @provide(scope=Scope.APP)
+    def lead_cache(self) -> interfaces.LeadCache:
+        return LeadCache(LRUCache(max_size=self._max_size, ttl_seconds=3600))
+
+
+class _BenchMessage:
+    __slots__ = ("body", "outcome")
+    content_type = "application/json"
+    content_encoding = None
+
+    def __init__(self, body: bytes) -> None:
+        self.body = body
+        self.outcome: str | None = None
+
+    async def ack(self) -> None:
+        self.outcome = "ack"
+
+    async def reject(self, requeue: bool = False) -> None:
+        self.outcome = "reject"
+
+    async def nack(self, requeue: bool = False) -> None:
+        self.outcome = "requeue"
+
+
+def _build_app(container: AsyncContainer) -> FastAPI:
+    app = FastAPI()
+    for exc_type, handler in exceptions_handlers.all_handlers.items():
+        app.add_exception_handler(exc_type, handler)
+    app.include_router(leads.router)
+    app.add_middleware(metrics_api.HttpMetricsMiddleware)
+    setup_dishka(container, app)
+    return app
+
+
+def _lead_model(insights: int, generated: list[dict]) -> models.Lead:
+    lead_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    return models.Lead(
+        id=lead_id,
+        note="Хочу купить 10 лицензий, пришлите счёт",
+        email="buyer@example.com",
+        phone="79000000000",
+        name="Иван",
+        source=BENCH_SOURCE,
+        created_at=now,
+        insights=[
+            models.Insight(
+                id=uuid.uuid4(),
+                lead_id=lead_id,
+                intent=data["intent"],
+                priority=data["priority"],
+                next_action=data["next_action"],
+                confidence=data["confidence"],
+                tags=data["tags"],
+                content_hash=f"{i:064x}",
+                created_at=now,
+            )
+            for i, data in enumerate(generated[:insights])
+        ],
+    )
+
+
+def bench_sync(args: argparse.Namespace, generated: list[dict]) -> list[dict]:
+    lead = LeadCreateInDTO(
+        note="  Хочу купить 10 лицензий  ", email="buyer@example.com", phone="79000000000",
+        name="Иван", source=BENCH_SOURCE,
+    )
+    results = [measure_sync("validate_lead", lambda i: ValidateLead(lead).validate(), args.iterations * 10)]
+    for count in args.insights:
+        model = _lead_model(count, generated)
+
+        def convert(i: int, model: models.Lead = model) -> bytes:
+            entity = db_repositories._lead_model_to_entity(model)
+            return leads._lead_out(LeadOutDTO.from_model(entity)).model_dump_json()
+        results.append(measure_sync("lead_conversion", convert, args.iterations, insights=count))
+    return results
+
+
+async def _seed_lead(container: AsyncContainer, insights: int, generated: list[dict]) -> str:
+    async with container() as request_container:
+        lead_repo = await request_container.get(interfaces.LeadRepository)
+        insight_repo = await request_container.get(interfaces.InsightRepository)
+        session = await request_container.get(DBSession)
+        (lead,) = await lead_repo.create_many([LeadCreateInDTO(note="seed", source=BENCH_SOURCE)])
+        await insight_repo.create_many([
+            (str(lead.id), {**data, "content_hash": f"{i:064x}"}) for i, data in enumerate(generated[:insights])
+        ])
+        await session.commit()
+    return str(lead.id)
+
+
+async def bench_api(args: argparse.Namespace, storage: list[Provider], config: Config, generated: list[dict]) -> list[dict]:
+    results = []
+    for cache, max_size in (("cold", 0), ("warm", 10_000)):
+        container = make_async_container(
+            ConfigProvider(), FastApiProviders(), FastapiProvider(), *storage, LeadCacheProvider(max_size),
+            context={Config: config},
+        )
+        transport = ASGITransport(app=_build_app(container))
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            if cache == "cold":
+                async def post(i: int) -> None:
+                    response = await client.post(
+                        "/leads",
+                        json={"note": f"Хочу купить, заявка {i}", "email": "buyer@example.com", "source": BENCH_SOURCE},
+                        headers={"Idempotency-Key": str(uuid.uuid4())},
+                    )
+                    assert response.status_code == 201, response.text
+                results.append(await measure_async("post_lead", post, args.iterations))
+
+            for count in args.insights:
+                lead_id = await _seed_lead(container, count, generated)
+
+                async def get(i: int, lead_id: str = lead_id) -> None:
+                    response = await client.get(f"/leads/{lead_id}")
+                    assert response.status_code == 200, response.text
+                results.append(await measure_async("get_lead", get, args.iterations, insights=count, cache=cache))
+        await container.close()
+    return results
+
+
+def _messages(lead_ids: list[str], notes: list[str]) -> list[_BenchMessage]:
+    occurred_at = datetime.now(timezone.utc).isoformat()
+    return [
+        _BenchMessage(json.dumps({
+            "lead_id": lead_id,
+            "content_hash": hashlib.sha256(note.encode("utf-8")).hexdigest(),
+            "occurred_at": occurred_at,
+            "content": note,
+        }, ensure_ascii=False).encode())
+        for lead_id, note in zip(lead_ids, notes)
+    ]
+
+
+async def bench_worker(args: argparse.Namespace, storage: list[Provider], config: Config) -> list[dict]:
+    container = make_async_container(
+        ConfigProvider(), RabbitMQProviders(), *storage, LeadCacheProvider(0), context={Config: config},
+    )
+    total = args.iterations + 100 + args.batches * args.batch_size + args.batch_size * 10
+    async with container() as request_container:
+        lead_repo = await request_container.get(interfaces.LeadRepository)
+        created = await lead_repo.create_many(
+            [LeadCreateInDTO(note=f"seed {i}", source=BENCH_SOURCE) for i in range(total)]
+        )
+        await (await request_container.get(DBSession)).commit()
+    # Уникальные заметки: каждое сообщение проходит классификатор, а не memo
+    messages = iter(_messages([str(lead.id) for lead in created], make_notes(total, seed=7)))
+
+    worker = LeadCreatedWorker(None, container, batch_size=1)  # type: ignore[arg-type]
+
+    async def single(i: int) -> None:
+        message = next(messages)
+        await worker._on_message(message)  # type: ignore[arg-type]
+        assert message.outcome == "ack", message.outcome
+    results = [await measure_async("worker_message", single, args.iterations)]
+
+    batched = LeadCreatedWorker(None, container, batch_size=args.batch_size)  # type: ignore[arg-type]
+
+    async def batch(i: int) -> None:
+        chunk = [next(messages) for _ in range(args.batch_size)]
+        await batched._flush(chunk)  # type: ignore[arg-type]
+        assert all(m.outcome == "ack" for m in chunk)
+    result = await measure_async("worker_batch", batch, args.batches, warmup=10, batch_size=args.batch_size)
+    result["messages_per_sec"] = round(result["ops_per_sec"] * args.batch_size, 1)
+    results.append(result)
+    await container.close()
+    return results
+
+
+async def _postgres_cleanup(config: Config) -> None:
+    container = make_async_container(ConfigProvider(), DBProviders(), context={Config: config})
+    session_maker = await container.get(async_sessionmaker[AsyncSession])
+    async with session_maker() as session:
+        await session.execute(text("DELETE FROM keys WHERE response->>'source' = :s"), {"s": BENCH_SOURCE})
+        await session.execute(text("DELETE FROM outbox WHERE payload->>'lead_id' IN (SELECT id::text FROM leads WHERE source = :s)"), {"s": BENCH_SOURCE})
+        # Внешнего ключа с каскадом нет (таблицы секционированы): инсайты удаляются явно
+        await session.execute(text("DELETE FROM insights WHERE lead_id IN (SELECT id FROM leads WHERE source = :s)"), {"s": BENCH_SOURCE})
+        await session.execute(text("DELETE FROM leads WHERE source = :s"), {"s": BENCH_SOURCE})
+        await session.commit()
+    await container.close()
+
+
+async def _postgres_available(config: Config) -> str | None:
+    container = make_async_container(ConfigProvider(), DBProviders(), context={Config: config})
+    try:
+        session_maker = await container.get(async_sessionmaker[AsyncSession])
+        async with session_maker() as session:
+            await session.execute(text("SELECT 1 FROM leads LIMIT 1"))
+        return None
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    finally:
+        await container.close()
+
+
+async def main_async(args: argparse.Namespace) -> dict:
+    config = Config()
+    generated = InsightGenerator().gen_many(make_notes(max(args.insights, default=0) or 1))
+    report = {"environment": environment(), "results": {}}
+
+    memory = [InMemoryProviders()]
+    report["results"]["memory"] = (
+        bench_sync(args, generated)
+        + await bench_api(args, memory, config, generated)
+        + await bench_worker(args, memory, config)
+    )
+
+    if args.postgres:
+        error = await _postgres_available(config)
+        if error is not None:
+            report["results"]["postgres"] = {"skipped": error}
+        else:
+            storage = [DBProviders()]
+            try:
+                report["results"]["postgres"] = (
+                    await bench_api(args, storage, config, generated)
+                    + await bench_worker(args, storage, config)
+                )
+            finally:
+                if args.cleanup:
+                    await _postgres_cleanup(config)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="API and worker hot paths")
+    parser.add_argument("-n", "--iterations", type=int, default=2000)
+    parser.add_argument("--insights", type=int, nargs="+", default=[0, 10, 100])
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--batches", type=int, default=50)
+    parser.add_argument("--postgres", action="store_true", help="дополнительно прогнать на Postgres из POSTGRES_*")
+    parser.add_argument("--cleanup", action="store_true", help="удалить строки прогона из Postgres")
+    parser.add_argument("--output", help="записать JSON-отчёт в файл")
+    args = parser.parse_args()
+    emit(asyncio.run(main_async(args)), args.output)
+
+
+if __name__ == "__main__":
+    main()
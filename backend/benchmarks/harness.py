@@ -0,0 +1,103 @@
+"""
+Замеры и JSON-отчёт бенчмарков: пропускная способность и перцентили латентности по операции,
+плюс окружение прогона (коммит, Python, платформа) — чтобы сравнивать прогоны между коммитами.
+"""
+import asyncio
+import json
+import math
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    # Nearest-rank: значение, ниже которого не больше q процентов замеров
+    index = max(0, math.ceil(q / 100 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+def summarize(name: str, samples: list[float], elapsed: float, **params: Any) -> dict:
+    ordered = sorted(samples)
+    return {
+        "name": name,
+        "params": params,
+        "iterations": len(samples),
+        "elapsed_seconds": round(elapsed, 4),
+        "ops_per_sec": round(len(samples) / elapsed, 1) if elapsed else None,
+        "latency_ms": {
+            "mean": round(sum(ordered) / len(ordered) * 1000, 4),
+            "p50": round(_percentile(ordered, 50) * 1000, 4),
+            "p90": round(_percentile(ordered, 90) * 1000, 4),
+            "p99": round(_percentile(ordered, 99) * 1000, 4),
+            "max": round(ordered[-1] * 1000, 4),
+        },
+    }
+
+
+def measure_sync(name: str, fn: Callable[[int], Any], iterations: int, warmup: int = 100, **params: Any) -> dict:
+    """fn(i) вызывается iterations раз подряд; warmup вызовов до замера не учитываются."""
+    for i in range(warmup):
+        fn(i)
+    samples = [0.0] * iterations
+    clock = time.perf_counter
+    started = clock()
+    for i in range(iterations):
+        t0 = clock()
+        fn(i)
+        samples[i] = clock() - t0
+    return summarize(name, samples, clock() - started, **params)
+
+
+async def measure_async(
+    name: str,
+    fn: Callable[[int], Awaitable[Any]],
+    iterations: int,
+    warmup: int = 100,
+    **params: Any,
+) -> dict:
+    for i in range(warmup):
+        await fn(i)
+    samples = [0.0] * iterations
+    clock = time.perf_counter
+    started = clock()
+    for i in range(iterations):
+        t0 = clock()
+        await fn(i)
+        samples[i] = clock() - t0
+    return summarize(name, samples, clock() - started, **params)
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).parent, capture_output=True, text=True, timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment() -> dict:
+    return {
+        "commit": _git_commit(),
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "event_loop_policy": type(asyncio.get_event_loop_policy()).__name__,
+        "started_at": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def emit(report: dict, output: str | None) -> None:
+    text = json.dumps(report, indent=2, ensure_ascii=False, default=str)
+    if output:
+        Path(output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+__all__ = ["summarize", "measure_sync", "measure_async", "environment", "emit"]
@@ -0,0 +1,257 @@
+"""
+In-memory реализации репозиториев, брокера и сессии для бенчмарков.
+
+Измеряется собственная стоимость приложения (валидация, интеракторы, DI, конвертации, HTTP-стек)
+без сети и Postgres. Транзакций нет: commit/rollback — no-op, записи видны сразу.
+"""
+import uuid
+from datetime import date, datetime, timezone
+from typing import Any, AsyncIterator, Mapping, Sequence
+from application.lead import dto as lead_dto
+from application.lead import exceptions as lead_exceptions
+from application.lead import interfaces
+from application.lead.validators import normalize_email, normalize_phone
+from application.common_interfaces import DBSession
+from domen import entities
+
+
+class InMemoryStore:
+    """Общее состояние на процесс бенчмарка (APP-scope): репозитории запроса читают и пишут сюда."""
+    def __init__(self) -> None:
+        self.leads: dict[uuid.UUID, entities.LeadEntity] = {}
+        self.keys: dict[str, dict | None] = {}
+        self.insight_pairs: set[tuple[str, str]] = set()
+        self.memo: dict[tuple[str, str], dict] = {}
+        self.messages: list[dict] = []
+        self.rollup_applied = 0
+
+
+class NullSession(DBSession):
+    async def commit(self) -> None:
+        pass
+
+    async def rollback(self) -> None:
+        pass
+
+
+def _insight_entity(lead_id: str, data: entities.InsightEntity | Mapping[str, Any]) -> entities.InsightEntity:
+    if isinstance(data, entities.InsightEntity):
+        return data
+    return entities.InsightEntity(
+        id=uuid.uuid4(),
+        lead_id=uuid.UUID(lead_id),
+        intent=entities.IntentEnum(data["intent"]),
+        priority=entities.PriorityEnum(data["priority"]),
+        next_action=entities.NextActionEnum(data["next_action"]),
+        confidence=float(data.get("confidence", 0)),
+        tags=data.get("tags"),
+        content_hash=data["content_hash"],
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+class InMemoryLeadRepository(interfaces.LeadRepository):
+    def __init__(self, store: InMemoryStore) -> None:
+        self._store = store
+
+    def _add(self, lead: lead_dto.LeadCreateInDTO | Mapping[str, Any]) -> entities.LeadEntity:
+        data = lead.to_dict() if isinstance(lead, lead_dto.LeadCreateInDTO) else dict(lead)
+        entity = entities.LeadEntity(
+            id=data.get("id") or uuid.uuid4(),
+            note=data["note"],
+            email=data.get("email"),
+            phone=data.get("phone"),
+            name=data.get("name"),
+            source=data.get("source"),
+            created_at=data.get("created_at") or datetime.now(timezone.utc),
+        )
+        self._store.leads[entity.id] = entity
+        return entity
+
+    async def create(self, lead: lead_dto.LeadCreateInDTO | Mapping[str, Any]) -> entities.LeadEntity:
+        return self._add(lead)
+
+    async def create_with_key(self, lead: lead_dto.LeadCreateInDTO, key: str) -> lead_dto.LeadKeyedCreateDTO:
+        entity = self._add(lead)
+        if key in self._store.keys:
+            return lead_dto.LeadKeyedCreateDTO(lead=entity, claimed=False, stored_response=self._store.keys[key])
+        self._store.keys[key] = lead_dto.LeadOutDTO.from_model(entity).to_dict()
+        return lead_dto.LeadKeyedCreateDTO(lead=entity, claimed=True)
+
+    async def create_many(self, leads: Sequence[lead_dto.LeadCreateInDTO | Mapping[str, Any]]) -> list[entities.LeadEntity]:
+        return [self._add(lead) for lead in leads]
+
+    async def copy_many(self, rows: Sequence[lead_dto.LeadImportRowDTO]) -> list[entities.LeadEntity]:
+        return [self._add({**row.lead.to_dict(), "created_at": row.created_at}) for row in rows]
+
+    async def get(self, lead_id: str) -> entities.LeadEntity:
+        lead = self._store.leads.get(uuid.UUID(str(lead_id)))
+        if lead is None:
+            raise lead_exceptions.LeadNotFoundException()
+        return lead
+
+    async def list_page(self, filters, after, limit: int) -> list[entities.LeadEntity]:
+        leads = sorted(self._store.leads.values(), key=lambda e: (e.created_at, e.id), reverse=True)
+        if after is not None:
+            leads = [e for e in leads if (e.created_at, e.id) < after]
+        return leads[:limit]
+
+    async def search(self, query: str, after, limit: int) -> list[lead_dto.LeadSearchHitDTO]:
+        # Без индексов: подстрока в заметке или контактах, ранг — число совпавших полей
+        needle = query.lower()
+        hits = []
+        for e in self._store.leads.values():
+            rank = float(sum(needle in (v or "").lower() for v in (e.note, e.email, e.phone, e.name)))
+            if rank and (after is None or (rank, e.id) < after):
+                hits.append(lead_dto.LeadSearchHitDTO(lead=e, rank=rank))
+        hits.sort(key=lambda h: (h.rank, h.lead.id), reverse=True)
+        return hits[:limit]
+
+    async def find_by_contacts(self, emails: Sequence[str], phones: Sequence[str]) -> lead_dto.LeadContactMatchesDTO:
+        matches = lead_dto.LeadContactMatchesDTO()
+        wanted_emails, wanted_phones = set(emails), set(phones)
+        for e in sorted(self._store.leads.values(), key=lambda e: (e.created_at, e.id)):
+            email, phone = normalize_email(e.email), normalize_phone(e.phone)
+            if email in wanted_emails:
+                matches.emails.setdefault(email, []).append(e.id)
+            if phone in wanted_phones:
+                matches.phones.setdefault(phone, []).append(e.id)
+        return matches
+
+    async def get_notes(self, lead_ids: Sequence[str]) -> dict[str, str]:
+        leads = (self._store.leads.get(uuid.UUID(str(i))) for i in lead_ids)
+        return {str(e.id): e.note for e in leads if e is not None}
+
+    async def existing_ids(self, lead_ids: Sequence[str]) -> set[str]:
+        return {i for i in lead_ids if uuid.UUID(str(i)) in self._store.leads}
+
+    async def stream_with_insights(self, filters, chunk_size: int) -> AsyncIterator[list[dict]]:
+        leads = list(self._store.leads.values())
+        for start in range(0, len(leads), chunk_size):
+            yield [lead_dto.LeadOutDTO.from_model(e).to_dict() for e in leads[start:start + chunk_size]]
+
+
+class InMemoryKeysRepository(interfaces.KeysRepository):
+    def __init__(self, store: InMemoryStore) -> None:
+        self._store = store
+
+    async def claim(self, key: str, lead_id: uuid.UUID, response: dict) -> bool:
+        if key in self._store.keys:
+            return False
+        self._store.keys[key] = response
+        return True
+
+    async def claim_many(self, keys: Sequence[str]) -> set[str]:
+        claimed = {k for k in keys if k not in self._store.keys}
+        for key in claimed:
+            self._store.keys[key] = None
+        return claimed
+
+    async def store_responses(self, responses: Sequence[tuple[str, uuid.UUID, dict]]) -> None:
+        for key, _, response in responses:
+            self._store.keys[key] = response
+
+    async def get_responses(self, keys: Sequence[str]) -> dict[str, dict | None]:
+        return {k: self._store.keys[k] for k in keys if k in self._store.keys}
+
+    async def purge_expired(self, older_than: datetime, batch_size: int) -> int:
+        return 0
+
+
+class InMemoryInsightRepository(interfaces.InsightRepository):
+    def __init__(self, store: InMemoryStore) -> None:
+        self._store = store
+
+    async def create(self, lead_id: str, insight: entities.InsightEntity | Mapping[str, Any]) -> entities.InsightEntity:
+        entity = _insight_entity(lead_id, insight)
+        self._store.insight_pairs.add((lead_id, entity.content_hash))
+        lead = self._store.leads.get(entity.lead_id)
+        if lead is not None:
+            lead.insights.append(entity)
+        return entity
+
+    async def create_many(self, insights: Sequence[tuple[str, Mapping[str, Any]]]) -> list[entities.InsightEntity]:
+        return [await self.create(lead_id, insight) for lead_id, insight in insights]
+
+    async def exists(self, lead_id: str, content_hash: str) -> bool:
+        return (lead_id, content_hash) in self._store.insight_pairs
+
+    async def existing_pairs(self, pairs: Sequence[tuple[str, str]]) -> set[tuple[str, str]]:
+        return {p for p in pairs if p in self._store.insight_pairs}
+
+
+class InMemoryInsightMemoRepository:
+    # Тот же контракт, что у InsightMemoRepository (таблица insight_memo)
+    def __init__(self, store: InMemoryStore) -> None:
+        self._store = store
+
+    async def get_many(self, version: str, content_hashes: Sequence[str]) -> dict[str, dict]:
+        memo = self._store.memo
+        return {h: memo[(version, h)] for h in content_hashes if (version, h) in memo}
+
+    async def put_many(self, version: str, results: Mapping[str, dict]) -> None:
+        for content_hash, result in results.items():
+            self._store.memo.setdefault((version, content_hash), result)
+
+    async def delete_other_versions(self, version: str) -> int:
+        return 0
+
+
+class InMemoryInsightRollupRepository(interfaces.InsightRollupRepository):
+    # Сводки в бенчмарках не читаются: учитывается только вызов на пути записи
+    def __init__(self, store: InMemoryStore) -> None:
+        self._store = store
+
+    async def apply(self, insight_ids: Sequence[uuid.UUID]) -> None:
+        self._store.rollup_applied += len(insight_ids)
+
+    async def rebuild(self, since: datetime | None) -> int:
+        return 0
+
+    async def query(self, filters) -> list[lead_dto.InsightAnalyticsRowDTO]:
+        return []
+
+    async def refresh(self, hours: Sequence[datetime]) -> None:
+        pass
+
+    async def delete_before(self, bound: datetime) -> int:
+        return 0
+
+
+class InMemoryPartitionRepository(interfaces.PartitionRepository):
+    # Одна партиция на всё время: импорт в бенчмарках не отклоняет строки по created_at
+    async def list_partitions(self, table: str) -> list[lead_dto.PartitionDTO]:
+        return [lead_dto.PartitionDTO(name=f"{table}_all", lower=None, upper=date.max)]
+
+    async def create_partition(self, table: str, month: date) -> str:
+        return f"{table}_p{month:%Y_%m}"
+
+    async def drop_partition(self, table: str, name: str) -> None:
+        pass
+
+    async def delete_insights_of_leads(self, name: str) -> list[datetime]:
+        return []
+
+
+class InMemoryMessageBroker(interfaces.MessageBroker):
+    def __init__(self, store: InMemoryStore) -> None:
+        self._store = store
+
+    def publish(self, message: dict) -> None:
+        self._store.messages.append(message)
+
+    def publish_many(self, messages: Sequence[dict]) -> None:
+        self._store.messages.extend(messages)
+
+
+__all__ = [
+    "InMemoryStore",
+    "NullSession",
+    "InMemoryLeadRepository",
+    "InMemoryKeysRepository",
+    "InMemoryInsightRepository",
+    "InMemoryInsightMemoRepository",
+    "InMemoryInsightRollupRepository",
+    "InMemoryPartitionRepository",
+    "InMemoryMessageBroker",
+]
@@ -1,5 +1,6 @@
+from importlib.util import find_spec
 from os import environ as env
-from pydantic import Field, BaseModel
+from pydantic import Field, BaseModel, field_validator
 
 class PostgresConfig(BaseModel):
     host: str = Field(alias='POSTGRES_HOST', default='127.0.0.1')
@@ -7,6 +8,15 @@ class PostgresConfig(BaseModel):
     login: str = Field(alias='POSTGRES_USER', default='postgres')
     password: str = Field(alias='POSTGRES_PASSWORD', default='postgres')
     database: str = Field(alias='POSTGRES_DB', default='postgres')
+    pool_size: int = Field(alias='POSTGRES_POOL_SIZE', default=5)
+    max_overflow: int = Field(alias='POSTGRES_MAX_OVERFLOW', default=10)
+    pool_timeout: float = Field(alias='POSTGRES_POOL_TIMEOUT', default=30.0)
+    pool_recycle: int = Field(alias='POSTGRES_POOL_RECYCLE', default=1800)
+    pool_pre_ping: bool = Field(alias='POSTGRES_POOL_PRE_PING', default=False)
+    statement_cache_size: int = Field(alias='POSTGRES_STATEMENT_CACHE_SIZE', default=100)
+    command_timeout: float | None = Field(alias='POSTGRES_COMMAND_TIMEOUT', default=60.0)
+    statement_timeout_ms: int = Field(alias='POSTGRES_STATEMENT_TIMEOUT_MS', default=0)
+    application_name: str = Field(alias='POSTGRES_APPLICATION_NAME', default='')
 
 class FastApiConfig(BaseModel):
     title: str = Field(default='example')
@@ -23,8 +33,87 @@ class RabbitMqConfig(BaseModel):
     user: str = Field(alias='RABBITMQ_USER', default='guest')
     password: str = Field(alias='RABBITMQ_PASSWORD', default='guest')
     virtual_host: str = Field(alias='RABBITMQ_VHOST', default='/')
+    worker_prefetch: int = Field(alias='RABBITMQ_WORKER_PREFETCH', default=10)
+    worker_batch_size: int = Field(alias='RABBITMQ_WORKER_BATCH_SIZE', default=1)
+    worker_batch_timeout_ms: int = Field(alias='RABBITMQ_WORKER_BATCH_TIMEOUT_MS', default=50)
+    # >1 — супервизор с N процессами воркера (у каждого свои пулы; INSIGHT_GENERATOR_PROCESSES — на процесс)
+    worker_processes: int = Field(alias='RABBITMQ_WORKER_PROCESSES', default=1)
+    worker_shutdown_timeout: float = Field(alias='RABBITMQ_WORKER_SHUTDOWN_TIMEOUT', default=30.0)
+    worker_restart_backoff_max: float = Field(alias='RABBITMQ_WORKER_RESTART_BACKOFF_MAX', default=30.0)
+    worker_report_interval: float = Field(alias='RABBITMQ_WORKER_REPORT_INTERVAL', default=10.0)
+    # Поштучный режим: предел параллельности подстраивается под задержку и ожидание пула БД,
+    # RABBITMQ_WORKER_PREFETCH — начальное значение prefetch
+    worker_adaptive: bool = Field(alias='RABBITMQ_WORKER_ADAPTIVE', default=True)
+    worker_concurrency_min: int = Field(alias='RABBITMQ_WORKER_CONCURRENCY_MIN', default=1)
+    worker_concurrency_max: int = Field(alias='RABBITMQ_WORKER_CONCURRENCY_MAX', default=64)
+    worker_flow_interval: float = Field(alias='RABBITMQ_WORKER_FLOW_INTERVAL', default=5.0)
+    worker_pool_wait_threshold_ms: float = Field(alias='RABBITMQ_WORKER_POOL_WAIT_THRESHOLD_MS', default=5.0)
+    worker_latency_tolerance: float = Field(alias='RABBITMQ_WORKER_LATENCY_TOLERANCE', default=2.0)
+    # Сбойное сообщение повторяется через очереди ожидания (задержка удваивается), затем уходит
+    # в parking-очередь (`crm replay-parked`); 0 — немедленный возврат в очередь, как раньше
+    worker_max_retries: int = Field(alias='RABBITMQ_WORKER_MAX_RETRIES', default=5)
+    worker_retry_delay_ms: int = Field(alias='RABBITMQ_WORKER_RETRY_DELAY_MS', default=1000)
+    worker_retry_delay_max_ms: int = Field(alias='RABBITMQ_WORKER_RETRY_DELAY_MAX_MS', default=60000)
+    publisher_channels: int = Field(alias='RABBITMQ_PUBLISHER_CHANNELS', default=4)
+    publisher_max_in_flight: int = Field(alias='RABBITMQ_PUBLISHER_MAX_IN_FLIGHT', default=1000)
+    publisher_max_pending: int = Field(alias='RABBITMQ_PUBLISHER_MAX_PENDING', default=10000)
+    # json | msgpack; воркеры читают оба формата — msgpack включать после обновления всех потребителей
+    message_codec: str = Field(alias='RABBITMQ_MESSAGE_CODEC', default='json')
+    # Тело больше порога сжимается zlib; 0 — не сжимать
+    message_compress_threshold: int = Field(alias='RABBITMQ_MESSAGE_COMPRESS_THRESHOLD', default=1024)
+    message_compress_level: int = Field(alias='RABBITMQ_MESSAGE_COMPRESS_LEVEL', default=1)
+    # lead.created без текста заметки: воркер читает заметки из leads; включать после обновления воркеров
+    claim_check: bool = Field(alias='RABBITMQ_CLAIM_CHECK', default=False)
+
+    @field_validator('message_codec')
+    @classmethod
+    def _codec_available(cls, codec: str) -> str:
+        # Ошибка при старте процесса, а не на первой публикации
+        if codec not in ('json', 'msgpack'):
+            raise ValueError(f"unknown RABBITMQ_MESSAGE_CODEC {codec!r}")
+        if codec == 'msgpack' and find_spec('msgpack') is None:
+            raise ValueError("RABBITMQ_MESSAGE_CODEC=msgpack requires the 'msgpack' package (poetry install -E msgpack)")
+        return codec
+
+class CacheConfig(BaseModel):
+    lead_max_size: int = Field(alias='LEAD_CACHE_MAX_SIZE', default=10000)
+    lead_ttl_seconds: float = Field(alias='LEAD_CACHE_TTL_SECONDS', default=30.0)
+
+class IdempotencyConfig(BaseModel):
+    key_ttl_hours: int = Field(alias='IDEMPOTENCY_KEY_TTL_HOURS', default=48)
+    purge_batch_size: int = Field(alias='IDEMPOTENCY_PURGE_BATCH_SIZE', default=5000)
+
+class InsightGeneratorConfig(BaseModel):
+    # 0 — классификатор в цикле событий, без пула процессов
+    processes: int = Field(alias='INSIGHT_GENERATOR_PROCESSES', default=0)
+    max_queue: int = Field(alias='INSIGHT_GENERATOR_MAX_QUEUE', default=64)
+    min_chunk: int = Field(alias='INSIGHT_GENERATOR_MIN_CHUNK', default=256)
+    memo_max_size: int = Field(alias='INSIGHT_MEMO_MAX_SIZE', default=50000)
+    memo_ttl_seconds: float = Field(alias='INSIGHT_MEMO_TTL_SECONDS', default=3600.0)
+
+class OutboxConfig(BaseModel):
+    relay_batch_size: int = Field(alias='OUTBOX_RELAY_BATCH_SIZE', default=500)
+    relay_poll_interval_ms: int = Field(alias='OUTBOX_RELAY_POLL_INTERVAL_MS', default=200)
+
+class PartitionConfig(BaseModel):
+    # Сколько будущих месяцев держать созданными; 0 в retention — хранить всё
+    months_ahead: int = Field(alias='PARTITION_MONTHS_AHEAD', default=3)
+    retention_months: int = Field(alias='PARTITION_RETENTION_MONTHS', default=0)
+    # API и воркер создают недостающие партиции при старте и затем раз в интервал (сек); 0 — не создавать
+    maintenance_interval: float = Field(alias='PARTITION_MAINTENANCE_INTERVAL', default=3600.0)
+
+class MetricsConfig(BaseModel):
+    # Порт /metrics у воркера (у API метрики на его же порту); 0 — не открывать
+    host: str = Field(alias='METRICS_HOST', default='0.0.0.0')
+    worker_port: int = Field(alias='METRICS_WORKER_PORT', default=9100)
 
 class Config(BaseModel):
     postgres: PostgresConfig = Field(default_factory=lambda: PostgresConfig(**env))
     fastapi: FastApiConfig = Field(default_factory=lambda: FastApiConfig(**env))
-    rabbitmq: RabbitMqConfig = Field(default_factory=lambda: RabbitMqConfig(**env))
\ No newline at end of file
+    rabbitmq: RabbitMqConfig = Field(default_factory=lambda: RabbitMqConfig(**env))
+    idempotency: IdempotencyConfig = Field(default_factory=lambda: IdempotencyConfig(**env))
+    cache: CacheConfig = Field(default_factory=lambda: CacheConfig(**env))
+    outbox: OutboxConfig = Field(default_factory=lambda: OutboxConfig(**env))
+    generator: InsightGeneratorConfig = Field(default_factory=lambda: InsightGeneratorConfig(**env))
+    metrics: MetricsConfig = Field(default_factory=lambda: MetricsConfig(**env))
+    partitions: PartitionConfig = Field(default_factory=lambda: PartitionConfig(**env))
\ No newline at end of file
@@ -0,0 +1,52 @@
+import time
+from fastapi import APIRouter, Response, status
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from metrics import CONTENT_TYPE, REGISTRY
+
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    "crm_http_request_seconds", "HTTP request latency", ["method", "route", "status"]
+)
+
+router = APIRouter(tags=["System"])
+
+@router.get(
+    "/metrics",
+    status_code=status.HTTP_200_OK,
+    name="Metrics",
+    summary="Метрики процесса в формате Prometheus",
+    include_in_schema=False,
+)
+async def metrics() -> Response:
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+class HttpMetricsMiddleware:
+    """
+    ASGI-middleware без BaseHTTPMiddleware (тот добавляет задачу и очередь на каждый запрос).
+    Метка route — шаблон пути (/leads/{lead_id}), чтобы число серий не росло с числом лидов.
+    """
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            path = getattr(route, "path", "<unmatched>")
+            if path != "/metrics":
+                HTTP_REQUEST_SECONDS.labels(scope["method"], path, status_code).observe(
+                    time.perf_counter() - started
+                )
@@ -0,0 +1,47 @@
+from datetime import datetime
+from typing import List, Optional
+from fastapi import APIRouter, Query, status
+from dishka.integrations.fastapi import FromDishka, DishkaRoute
+from application.lead.dto import InsightAnalyticsDimension, InsightAnalyticsFilterDTO
+from application.lead.interactors import GetInsightAnalyticsInteractor
+from .schemas import InsightAnalyticsOut, InsightAnalyticsRowOut
+from .responses_descriptions import analytics_responses
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"], route_class=DishkaRoute)
+
+@router.get(
+    "/insights",
+    status_code=status.HTTP_200_OK,
+    name="Insight analytics",
+    summary="Инсайты и лиды по часу, источнику, intent, priority и next_action",
+    responses={
+        status.HTTP_200_OK: analytics_responses["insights"][200],
+        status.HTTP_422_UNPROCESSABLE_ENTITY: analytics_responses["insights"][422],
+    },
+    response_model=InsightAnalyticsOut,
+)
+async def insight_analytics(
+    interactor: FromDishka[GetInsightAnalyticsInteractor],
+    group_by: List[InsightAnalyticsDimension] = Query([]),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    source: Optional[str] = Query(None),
+) -> InsightAnalyticsOut:
+    filters = InsightAnalyticsFilterDTO(
+        group_by=group_by,
+        created_from=created_from,
+        created_to=created_to,
+        source=source,
+    )
+    rows = await interactor.get_analytics(filters)
+    return InsightAnalyticsOut(
+        group_by=[d.value for d in filters.group_by],
+        rows=[
+            InsightAnalyticsRowOut(
+                key={k: v.isoformat() if isinstance(v, datetime) else v for k, v in row.key.items()},
+                insights=row.insights,
+                leads=row.leads,
+            )
+            for row in rows
+        ],
+    )
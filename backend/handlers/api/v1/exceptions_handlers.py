@@ -3,6 +3,12 @@ from fastapi.responses import JSONResponse
 from application.lead import exceptions as lead_exc
 
 def lead_already_exists_handler(request: Request, exc: lead_exc.LeadAlreadyExistsException):
+    # Повтор с тем же Idempotency-Key получает исходный ответ 201
+    if exc.response is not None:
+        return JSONResponse(
+            status_code=201,
+            content=exc.response
+        )
     return JSONResponse(
         status_code=200,
         content={"detail": "OK"}
@@ -38,6 +44,24 @@ def invalid_insight_data_handler(request: Request, exc: lead_exc.InvalidInsightD
         content={"detail": str(exc)}
     )
 
+def invalid_lead_import_handler(request: Request, exc: lead_exc.InvalidLeadImportException):
+    return JSONResponse(
+        status_code=422,
+        content={"detail": str(exc)}
+    )
+
+def invalid_cursor_handler(request: Request, exc: lead_exc.InvalidCursorException):
+    return JSONResponse(
+        status_code=422,
+        content={"detail": str(exc)}
+    )
+
+def invalid_analytics_filter_handler(request: Request, exc: lead_exc.InvalidAnalyticsFilterException):
+    return JSONResponse(
+        status_code=422,
+        content={"detail": str(exc)}
+    )
+
 all_handlers = {
     lead_exc.LeadAlreadyExistsException: lead_already_exists_handler,
     lead_exc.LeadNotFoundException: lead_not_found_handler,
@@ -45,4 +69,7 @@ all_handlers = {
     lead_exc.InsightAlreadyExistsException: insight_already_exists_handler,
     lead_exc.InsightNotFoundException: insight_not_found_handler,
     lead_exc.InvalidInsightDataException: invalid_insight_data_handler,
+    lead_exc.InvalidLeadImportException: invalid_lead_import_handler,
+    lead_exc.InvalidCursorException: invalid_cursor_handler,
+    lead_exc.InvalidAnalyticsFilterException: invalid_analytics_filter_handler,
 }
@@ -1,13 +1,60 @@
-from fastapi import APIRouter, status
+from datetime import datetime
+from typing import Optional
+from fastapi import APIRouter, Query, Request, status
+from fastapi.responses import StreamingResponse
 from dishka.integrations.fastapi import FromDishka, DishkaRoute
-from application.lead.dto import LeadCreateInDTO
-from application.lead.interactors import CreateLeadInteractor, GetLeadInteractor
+from application.lead.dto import (
+    LeadCreateInDTO,
+    LeadOutDTO,
+    LeadBatchItemInDTO,
+    LeadBatchStatus,
+    LeadListFilterDTO,
+    LeadSearchFilterDTO,
+    LeadContactLookupDTO,
+    LeadExportFilterDTO,
+    LeadExportStatsDTO,
+)
+from application.lead.interactors import (
+    CreateLeadInteractor,
+    CreateLeadsBatchInteractor,
+    GetLeadInteractor,
+    ImportLeadsInteractor,
+    ListLeadsInteractor,
+    SearchLeadsInteractor,
+    FindLeadsByContactInteractor,
+    ExportLeadsInteractor,
+)
+from application.lead.exceptions import InvalidLeadImportException
 from uuid import UUID
-from .schemas import LeadCreateIn, LeadOut
+from .schemas import (
+    LeadCreateIn,
+    LeadOut,
+    LeadsBatchIn,
+    LeadsBatchOut,
+    LeadBatchResultOut,
+    LeadImportSummaryOut,
+    LeadImportRejectedRowOut,
+    LeadPageOut,
+    LeadContactLookupIn,
+    LeadContactLookupOut,
+)
+from .readers import read_csv, read_ndjson
 from .responses_descriptions import lead_responses
 
 router = APIRouter(prefix="/leads", tags=["Leads"], route_class=DishkaRoute)
 
+def _lead_out(result: LeadOutDTO) -> LeadOut:
+    return LeadOut(
+        id=result.id,
+        note=result.note,
+        email=result.email,
+        phone=result.phone,
+        name=result.name,
+        source=result.source,
+        created_at=result.created_at.isoformat(),
+        insights=[],
+    )
+
 @router.post(
     "",
     status_code=status.HTTP_201_CREATED,
@@ -32,15 +79,181 @@ async def create_lead(
         source=payload.source,
     )
     result = await interactor.create_lead(dto)
-    return LeadOut(
-        id=result.id,  
-        note=result.note,
-        email=result.email,
-        phone=result.phone,
-        name=result.name,
-        source=result.source,
-        created_at=result.created_at.isoformat(),
-        insights=[],
+    return _lead_out(result)
+
+@router.post(
+    ":batch",
+    status_code=status.HTTP_200_OK,
+    name="Create leads batch",
+    summary="Создать лидов пачкой",
+    responses={
+        status.HTTP_200_OK: lead_responses["batch"][200],
+        status.HTTP_422_UNPROCESSABLE_ENTITY: lead_responses["batch"][422],
+    },
+    response_model=LeadsBatchOut,
+)
+async def create_leads_batch(
+    payload: LeadsBatchIn,
+    interactor: FromDishka[CreateLeadsBatchInteractor],
+) -> LeadsBatchOut:
+    items = [
+        LeadBatchItemInDTO(
+            lead=LeadCreateInDTO(
+                note=row.note,
+                email=row.email,
+                phone=row.phone,
+                name=row.name,
+                source=row.source,
+            ),
+            idempotency_key=row.idempotency_key,
+        )
+        for row in payload.leads
+    ]
+    results = await interactor.create_leads(items)
+    counts = {s: 0 for s in LeadBatchStatus}
+    out = []
+    for r in results:
+        counts[r.status] += 1
+        out.append(LeadBatchResultOut(
+            index=r.index,
+            status=r.status.value,
+            lead=_lead_out(r.lead) if r.lead is not None else None,
+            error=r.error,
+        ))
+    return LeadsBatchOut(
+        created=counts[LeadBatchStatus.CREATED],
+        duplicates=counts[LeadBatchStatus.DUPLICATE],
+        invalid=counts[LeadBatchStatus.INVALID],
+        results=out,
+    )
+
+@router.post(
+    ":lookup",
+    status_code=status.HTTP_200_OK,
+    name="Find leads by contact",
+    summary="Найти лидов по email и телефонам (пачкой, для дедупликации)",
+    responses={
+        status.HTTP_200_OK: lead_responses["lookup"][200],
+        status.HTTP_422_UNPROCESSABLE_ENTITY: lead_responses["lookup"][422],
+    },
+    response_model=LeadContactLookupOut,
+)
+async def find_leads_by_contact(
+    payload: LeadContactLookupIn,
+    interactor: FromDishka[FindLeadsByContactInteractor],
+) -> LeadContactLookupOut:
+    found = await interactor.find_leads(LeadContactLookupDTO(emails=payload.emails, phones=payload.phones))
+    return LeadContactLookupOut(emails=found.emails, phones=found.phones)
+
+@router.post(
+    ":import",
+    status_code=status.HTTP_200_OK,
+    name="Import leads",
+    summary="Потоковый импорт лидов (NDJSON / CSV)",
+    responses={
+        status.HTTP_200_OK: lead_responses["import"][200],
+        status.HTTP_422_UNPROCESSABLE_ENTITY: lead_responses["import"][422],
+    },
+    response_model=LeadImportSummaryOut,
+)
+async def import_leads(
+    request: Request,
+    interactor: FromDishka[ImportLeadsInteractor],
+) -> LeadImportSummaryOut:
+    content_type = request.headers.get("content-type", "").split(";", 1)[0].strip().lower()
+    if content_type == "text/csv":
+        rows = read_csv(request.stream())
+    elif content_type in ("application/x-ndjson", "application/jsonl", "application/json-lines"):
+        rows = read_ndjson(request.stream())
+    else:
+        raise InvalidLeadImportException(
+            "Content-Type must be text/csv or application/x-ndjson."
+        )
+    summary = await interactor.import_leads(rows)
+    return LeadImportSummaryOut(
+        total=summary.total,
+        imported=summary.imported,
+        rejected=summary.rejected,
+        chunks=summary.chunks,
+        elapsed_seconds=summary.elapsed_seconds,
+        rejected_rows=[
+            LeadImportRejectedRowOut(line=r.line, error=r.error) for r in summary.rejected_rows
+        ],
+        rejected_rows_truncated=summary.rejected_rows_truncated,
+    )
+
+@router.get(
+    "",
+    status_code=status.HTTP_200_OK,
+    name="List leads",
+    summary="Список лидов (keyset-пагинация)",
+    responses={
+        status.HTTP_200_OK: lead_responses["list"][200],
+        status.HTTP_422_UNPROCESSABLE_ENTITY: lead_responses["list"][422],
+    },
+    response_model=LeadPageOut,
+)
+async def list_leads(
+    interactor: FromDishka[ListLeadsInteractor],
+    cursor: Optional[str] = Query(None),
+    source: Optional[str] = Query(None),
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+) -> LeadPageOut:
+    page = await interactor.list_leads(LeadListFilterDTO(
+        limit=limit,
+        cursor=cursor,
+        source=source,
+        created_from=created_from,
+        created_to=created_to,
+    ))
+    return LeadPageOut(
+        items=[_lead_out(item) for item in page.items],
+        next_cursor=page.next_cursor,
+    )
+
+@router.get(
+    ":export",
+    status_code=status.HTTP_200_OK,
+    name="Export leads",
+    summary="Выгрузка лидов с инсайтами (NDJSON-поток)",
+    responses={
+        status.HTTP_200_OK: lead_responses["export"][200],
+    },
+    response_class=StreamingResponse,
+)
+async def export_leads(
+    interactor: FromDishka[ExportLeadsInteractor],
+    created_from: Optional[datetime] = Query(None),
+    created_to: Optional[datetime] = Query(None),
+) -> StreamingResponse:
+    filters = LeadExportFilterDTO(created_from=created_from, created_to=created_to)
+    stream = interactor.export_ndjson(filters, LeadExportStatsDTO())
+    return StreamingResponse(stream, media_type="application/x-ndjson")
+
+# Объявлен до /{lead_id}: иначе "search" разбирался бы как идентификатор лида
+@router.get(
+    "/search",
+    status_code=status.HTTP_200_OK,
+    name="Search leads",
+    summary="Поиск лидов по словам заметки и части email, телефона или имени",
+    responses={
+        status.HTTP_200_OK: lead_responses["search"][200],
+        status.HTTP_422_UNPROCESSABLE_ENTITY: lead_responses["search"][422],
+    },
+    response_model=LeadPageOut,
+)
+async def search_leads(
+    interactor: FromDishka[SearchLeadsInteractor],
+    q: str = Query(..., min_length=1, max_length=200),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+) -> LeadPageOut:
+    page = await interactor.search_leads(LeadSearchFilterDTO(query=q, limit=limit, cursor=cursor))
+    return LeadPageOut(
+        items=[_lead_out(item) for item in page.items],
+        next_cursor=page.next_cursor,
     )
 
 @router.get(
@@ -59,13 +272,4 @@ async def get_lead(
     interactor: FromDishka[GetLeadInteractor],
 ) -> LeadOut:
     result = await interactor.get_lead(lead_id)
-    return LeadOut(
-        id=result.id,
-        note=result.note,
-        email=result.email,
-        phone=result.phone,
-        name=result.name,
-        source=result.source,
-        created_at=result.created_at.isoformat(),
-        insights=[],
-    )
\ No newline at end of file
+    return _lead_out(result)
\ No newline at end of file
@@ -0,0 +1,121 @@
+import codecs
+import csv
+import json
+from datetime import datetime, timezone
+from typing import Any, AsyncIterable, AsyncIterator, Mapping
+from application.lead.dto import LeadCreateInDTO, LeadImportRowDTO
+from application.lead.exceptions import InvalidLeadImportException
+
+LEAD_FIELDS = ("note", "email", "phone", "name", "source")
+# Незакрытая кавычка не должна затянуть в память остаток файла
+MAX_CSV_RECORD_LINES = 1000
+
+
+async def _iter_lines(stream: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    # Тело читается по кускам, в памяти держим только незавершённую строку
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    tail = ""
+    async for chunk in stream:
+        tail += decoder.decode(chunk)
+        *lines, tail = tail.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    tail += decoder.decode(b"", final=True)
+    if tail:
+        yield tail.rstrip("\r")
+
+
+def _parse_created_at(value: Any) -> datetime | None:
+    if value in (None, ""):
+        return None
+    if not isinstance(value, str):
+        raise ValueError("created_at must be an ISO 8601 string.")
+    dt = datetime.fromisoformat(value)
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def _row_from_mapping(line: int, data: Mapping[str, Any]) -> LeadImportRowDTO:
+    values: dict[str, str | None] = {}
+    for key in LEAD_FIELDS:
+        value = data.get(key)
+        if value == "" and key != "note":
+            value = None
+        if value is not None and not isinstance(value, str):
+            return LeadImportRowDTO(line=line, error=f"{key} must be a string.")
+        values[key] = value
+    try:
+        created_at = _parse_created_at(data.get("created_at"))
+    except ValueError as e:
+        return LeadImportRowDTO(line=line, error=str(e))
+    return LeadImportRowDTO(
+        line=line,
+        lead=LeadCreateInDTO(
+            note=values["note"] or "",
+            email=values["email"],
+            phone=values["phone"],
+            name=values["name"],
+            source=values["source"],
+        ),
+        created_at=created_at,
+    )
+
+
+async def read_ndjson(stream: AsyncIterable[bytes]) -> AsyncIterator[LeadImportRowDTO]:
+    line_no = 0
+    async for line in _iter_lines(stream):
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            data = json.loads(line)
+        except ValueError as e:
+            yield LeadImportRowDTO(line=line_no, error=f"invalid JSON: {e}")
+            continue
+        if not isinstance(data, dict):
+            yield LeadImportRowDTO(line=line_no, error="row must be a JSON object.")
+            continue
+        yield _row_from_mapping(line_no, data)
+
+
+async def read_csv(stream: AsyncIterable[bytes]) -> AsyncIterator[LeadImportRowDTO]:
+    header: list[str] | None = None
+    line_no = 0
+    record_line = 0
+    pending: list[str] = []
+    async for line in _iter_lines(stream):
+        line_no += 1
+        if not pending:
+            record_line = line_no
+        pending.append(line)
+        # Поле в кавычках может содержать перевод строки: копим строки до закрытия кавычек
+        if sum(part.count('"') for part in pending) % 2:
+            if len(pending) < MAX_CSV_RECORD_LINES:
+                continue
+            pending = []
+            yield LeadImportRowDTO(line=record_line, error="invalid CSV: unterminated quoted field.")
+            continue
+        text, pending = "\n".join(pending), []
+        if not text.strip():
+            continue
+        try:
+            values = next(csv.reader([text]))
+        except csv.Error as e:
+            yield LeadImportRowDTO(line=record_line, error=f"invalid CSV: {e}")
+            continue
+        if header is None:
+            header = [h.strip().lower() for h in values]
+            if "note" not in header:
+                raise InvalidLeadImportException("CSV header must contain a 'note' column.")
+            continue
+        if len(values) != len(header):
+            yield LeadImportRowDTO(
+                line=record_line,
+                error=f"expected {len(header)} columns, got {len(values)}.",
+            )
+            continue
+        yield _row_from_mapping(record_line, dict(zip(header, values)))
+    if pending:
+        yield LeadImportRowDTO(line=record_line, error="invalid CSV: unterminated quoted field.")
+
+
+__all__ = ["read_ndjson", "read_csv"]
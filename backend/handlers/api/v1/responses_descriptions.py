@@ -1,14 +1,43 @@
 lead_responses = {
     "create": {
-        201: {"description": "Лид создан"},
-        200: {"description": "OK"}, #если лид уже существует
+        201: {"description": "Лид создан (повтор с тем же Idempotency-Key получает исходный ответ)"},
+        200: {"description": "OK"}, #если ключ уже занят, но исходный ответ не сохранён
         422: {"description": "Некорректные данные лида"},
     },
+    "batch": {
+        200: {"description": "Пачка обработана, результат по каждой строке"},
+        422: {"description": "Некорректный формат запроса"},
+    },
+    "import": {
+        200: {"description": "Импорт завершён, сводка и отклонённые строки"},
+        422: {"description": "Тело импорта не удалось разобрать"},
+    },
+    "list": {
+        200: {"description": "Страница лидов"},
+        422: {"description": "Некорректный курсор или фильтры"},
+    },
+    "lookup": {
+        200: {"description": "id лидов по каждому email и телефону запроса"},
+        422: {"description": "Слишком много значений в запросе"},
+    },
+    "search": {
+        200: {"description": "Найденные лиды по убыванию релевантности"},
+        422: {"description": "Слишком короткий запрос или некорректный курсор"},
+    },
+    "export": {
+        200: {"description": "NDJSON: по одному лиду с инсайтами на строку"},
+    },
     "get": {
         200: {"description": "Лид найден"},
         404: {"description": "Лид не найден"},
     },
 }
+analytics_responses = {
+    "insights": {
+        200: {"description": "Счётчики инсайтов и лидов из почасовых сводок"},
+        422: {"description": "Неизвестное измерение, некорректная дата или граница периода не на начале часа UTC"},
+    },
+}
 common_responses = {
     500: {"description": "Внутренняя ошибка"},
 }
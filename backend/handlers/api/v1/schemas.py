@@ -1,6 +1,6 @@
 from __future__ import annotations
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Dict, List, Optional
 from uuid import UUID
 
 class LeadCreateIn(BaseModel):
@@ -29,3 +29,62 @@ class LeadOut(BaseModel):
     source: Optional[str] = None
     created_at: str
     insights: List[InsightOut] = Field(default_factory=list)
+
+
+class LeadBatchItemIn(LeadCreateIn):
+    # Пустая или отсутствующая заметка — результат invalid для строки, а не 422 на всю пачку
+    note: Optional[str] = Field(None)
+    idempotency_key: Optional[str] = Field(None)
+
+class LeadsBatchIn(BaseModel):
+    leads: List[LeadBatchItemIn] = Field(..., min_length=1, max_length=1000)
+
+class LeadBatchResultOut(BaseModel):
+    index: int
+    status: str
+    lead: Optional[LeadOut] = None
+    error: Optional[str] = None
+
+class LeadsBatchOut(BaseModel):
+    created: int
+    duplicates: int
+    invalid: int
+    results: List[LeadBatchResultOut]
+
+
+class LeadImportRejectedRowOut(BaseModel):
+    line: int
+    error: str
+
+class LeadImportSummaryOut(BaseModel):
+    total: int
+    imported: int
+    rejected: int
+    chunks: int
+    elapsed_seconds: float
+    rejected_rows: List[LeadImportRejectedRowOut] = Field(default_factory=list)
+    rejected_rows_truncated: bool = False
+
+
+class LeadContactLookupIn(BaseModel):
+    emails: List[str] = Field(default_factory=list, max_length=1000)
+    phones: List[str] = Field(default_factory=list, max_length=1000)
+
+class LeadContactLookupOut(BaseModel):
+    emails: Dict[str, List[UUID]]
+    phones: Dict[str, List[UUID]]
+
+
+class LeadPageOut(BaseModel):
+    items: List[LeadOut]
+    next_cursor: Optional[str] = None
+
+
+class InsightAnalyticsRowOut(BaseModel):
+    key: Dict[str, Optional[str]]
+    insights: int
+    leads: int
+
+class InsightAnalyticsOut(BaseModel):
+    group_by: List[str]
+    rows: List[InsightAnalyticsRowOut]
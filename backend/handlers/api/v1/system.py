@@ -0,0 +1,25 @@
+from fastapi import APIRouter, status
+from dishka.integrations.fastapi import FromDishka, DishkaRoute
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from infrastructure.cache import LeadCache
+from infrastructure.db.database import pool_stats
+
+router = APIRouter(prefix="/system", tags=["System"], route_class=DishkaRoute)
+
+@router.get(
+    "/cache",
+    status_code=status.HTTP_200_OK,
+    name="Cache stats",
+    summary="Счётчики кеша лидов",
+)
+async def cache_stats(cache: FromDishka[LeadCache]) -> dict:
+    return cache.stats()
+
+@router.get(
+    "/db-pool",
+    status_code=status.HTTP_200_OK,
+    name="DB pool stats",
+    summary="Состояние пула соединений Postgres",
+)
+async def db_pool_stats(session_maker: FromDishka[async_sessionmaker[AsyncSession]]) -> dict:
+    return pool_stats(session_maker)
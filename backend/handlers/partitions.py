@@ -0,0 +1,31 @@
+import asyncio
+import logging
+from dishka import AsyncContainer
+from application.lead.interactors import MaintainPartitionsInteractor
+
+logger = logging.getLogger(__name__)
+
+
+async def ensure_partitions(container: AsyncContainer, months_ahead: int) -> None:
+    """
+    Создаёт недостающие помесячные партиции leads / insights при старте API и воркера.
+    Без партиции на текущий месяц вставки падают, поэтому запас не зависит только от cron
+    с `crm maintain-partitions`. Удаление по ретенции остаётся за ним: здесь только создание.
+    Ошибка логируется и не мешает запуску — существующие партиции продолжают работать.
+    """
+    try:
+        async with container() as request_container:
+            interactor = await request_container.get(MaintainPartitionsInteractor)
+            report = await interactor.maintain(months_ahead, 0)
+    except Exception:
+        logger.exception("partition maintenance failed")
+        return
+    if report.created:
+        logger.info("partitions created: %s", ", ".join(report.created))
+
+
+async def keep_partitions(container: AsyncContainer, months_ahead: int, interval: float) -> None:
+    # Долгоживущий процесс переходит границу месяца без перезапуска
+    while True:
+        await asyncio.sleep(interval)
+        await ensure_partitions(container, months_ahead)
@@ -0,0 +1,72 @@
+import asyncio
+from typing import Optional
+import aio_pika
+from infrastructure.cache import LeadCache
+from infrastructure.queue.codec import decode_message
+
+LEAD_INVALIDATED_ROUTING_KEY = "lead.invalidated"
+
+
+class LeadCacheInvalidationListener:
+    """
+    Подписка реплики API на инвалидации кеша лидов.
+    У каждой реплики своя эксклюзивная auto-delete очередь, привязанная к 'lead.invalidated',
+    поэтому событие получают все реплики. Подтверждения не нужны: потеря события
+    ограничена TTL локального кеша.
+    """
+    def __init__(
+        self,
+        connection: aio_pika.RobustConnection,
+        cache: LeadCache,
+        *,
+        exchange: str = "leads",
+        routing_key: str = LEAD_INVALIDATED_ROUTING_KEY,
+    ) -> None:
+        self._connection = connection
+        self._cache = cache
+        self._exchange_name = exchange
+        self._routing_key = routing_key
+        self._channel: Optional[aio_pika.RobustChannel] = None
+        self._queue: Optional[aio_pika.RobustQueue] = None
+        self._consume_tag: Optional[str] = None
+        self._lock = asyncio.Lock()
+
+    async def start(self) -> None:
+        async with self._lock:
+            if self._channel is not None:
+                return
+            self._channel = await self._connection.channel()
+            exchange = await self._channel.declare_exchange(
+                self._exchange_name,
+                type=aio_pika.ExchangeType.TOPIC,
+                durable=True,
+            )
+            self._queue = await self._channel.declare_queue(exclusive=True, auto_delete=True)
+            await self._queue.bind(exchange, routing_key=self._routing_key)
+            self._consume_tag = await self._queue.consume(self._on_message, no_ack=True)
+
+    async def stop(self) -> None:
+        async with self._lock:
+            if self._queue and self._consume_tag:
+                try:
+                    await self._queue.cancel(self._consume_tag)
+                except Exception:
+                    pass
+            if self._channel:
+                try:
+                    await self._channel.close()
+                except Exception:
+                    pass
+            self._channel = None
+            self._queue = None
+            self._consume_tag = None
+
+    async def _on_message(self, message: aio_pika.IncomingMessage) -> None:
+        try:
+            lead_id = decode_message(message.body, message.content_type, message.content_encoding)["lead_id"]
+        except Exception:
+            return
+        self._cache.evict_local(str(lead_id))
+
+
+__all__ = ["LeadCacheInvalidationListener", "LEAD_INVALIDATED_ROUTING_KEY"]
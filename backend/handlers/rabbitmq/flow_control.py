@@ -0,0 +1,211 @@
+import asyncio
+import logging
+import math
+from collections import deque
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ConcurrencyLimiter:
+    """Семафор с изменяемым пределом: уменьшение не прерывает начатые сообщения, а не пускает новые."""
+    def __init__(self, limit: int) -> None:
+        self._limit = limit
+        self._active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def limit(self) -> int:
+        return self._limit
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        if self._active < self._limit and not self._waiters:
+            self._active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Слот уже передан, но задача отменена — возвращаем его следующему
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self) -> None:
+        self._active -= 1
+        self._wake()
+
+    def set_limit(self, limit: int) -> None:
+        self._limit = limit
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._active < self._limit:
+            waiter = self._waiters.popleft()
+            if waiter.done():
+                continue
+            self._active += 1
+            waiter.set_result(None)
+
+
+class AdaptiveFlowController:
+    """
+    Подбирает предел одновременно обрабатываемых сообщений и prefetch канала (AIMD по окнам interval).
+
+    Перегрузка — среднее ожидание соединения из пула БД выше pool_wait_threshold, таймауты пула
+    или задержка обработки выше базовой в latency_tolerance раз: предел уменьшается на четверть.
+    Базовая задержка — минимум по окнам, медленно забываемый (+5% за окно), чтобы пережить смену нагрузки.
+    Без перегрузки, если предел был исчерпан (сообщения ждали слота), он растёт на 10% (не меньше 1).
+    prefetch = предел * prefetch_ratio: у процесса всегда есть следующие сообщения, пока идут текущие.
+    """
+    BASELINE_DECAY = 1.05
+    DECREASE = 0.75
+    INCREASE = 0.1
+
+    def __init__(
+        self,
+        initial_limit: int,
+        *,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        prefetch_ratio: float = 2.0,
+        interval: float = 5.0,
+        latency_tolerance: float = 2.0,
+        pool_wait_threshold: float = 0.005,
+        pool_stats: Optional[Callable[[], dict]] = None,
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max(max_limit, min_limit)
+        self.limiter = ConcurrencyLimiter(min(max(initial_limit, self.min_limit), self.max_limit))
+        self.prefetch_ratio = prefetch_ratio
+        self.interval = interval
+        self.latency_tolerance = latency_tolerance
+        self.pool_wait_threshold = pool_wait_threshold
+        self._pool_stats = pool_stats
+        self._apply_prefetch: Optional[Callable[[int], Awaitable[None]]] = None
+        self.prefetch = self._prefetch_for(self.limiter.limit)
+        self._window_count = 0
+        self._window_seconds = 0.0
+        self._saturated = False
+        self._pool_mark = self._read_pool()
+        self._baseline: Optional[float] = None
+        self._latency = 0.0
+        self._pool_wait = 0.0
+        self._increases = 0
+        self._decreases = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def _prefetch_for(self, limit: int) -> int:
+        return max(1, math.ceil(limit * self.prefetch_ratio))
+
+    def _read_pool(self) -> tuple[int, float, int]:
+        if self._pool_stats is None:
+            return 0, 0.0, 0
+        stats = self._pool_stats()
+        return stats.get("checkouts", 0), stats.get("wait_seconds_total", 0.0), stats.get("timeouts", 0)
+
+    async def acquire(self) -> None:
+        if self.limiter.active >= self.limiter.limit:
+            self._saturated = True
+        await self.limiter.acquire()
+
+    def release(self, seconds: float) -> None:
+        self.limiter.release()
+        self._window_count += 1
+        self._window_seconds += seconds
+
+    def decide(self) -> int:
+        """Новый предел по итогам окна; сбрасывает накопленное окно."""
+        limit = self.limiter.limit
+        checkouts, wait_total, timeouts = self._read_pool()
+        mark_checkouts, mark_wait, mark_timeouts = self._pool_mark
+        self._pool_mark = (checkouts, wait_total, timeouts)
+        pool_timeouts = timeouts - mark_timeouts
+        window_checkouts = checkouts - mark_checkouts
+        self._pool_wait = (wait_total - mark_wait) / window_checkouts if window_checkouts > 0 else 0.0
+
+        count, seconds, saturated = self._window_count, self._window_seconds, self._saturated
+        self._window_count, self._window_seconds, self._saturated = 0, 0.0, False
+        if not count:
+            return limit
+        self._latency = seconds / count
+        if self._baseline is None:
+            self._baseline = self._latency
+        else:
+            self._baseline = min(self._latency, self._baseline * self.BASELINE_DECAY)
+
+        overloaded = (
+            pool_timeouts > 0
+            or self._pool_wait > self.pool_wait_threshold
+            or self._latency > self._baseline * self.latency_tolerance
+        )
+        if overloaded:
+            return max(self.min_limit, math.floor(limit * self.DECREASE))
+        if saturated:
+            return min(self.max_limit, limit + max(1, math.floor(limit * self.INCREASE)))
+        return limit
+
+    async def adjust(self) -> None:
+        limit = self.decide()
+        if limit == self.limiter.limit:
+            return
+        if limit > self.limiter.limit:
+            self._increases += 1
+        else:
+            self._decreases += 1
+        logger.info(
+            "worker flow: limit %d -> %d (latency %.1fms, baseline %.1fms, pool wait %.1fms)",
+            self.limiter.limit, limit, self._latency * 1000, (self._baseline or 0.0) * 1000, self._pool_wait * 1000,
+        )
+        self.limiter.set_limit(limit)
+        prefetch = self._prefetch_for(limit)
+        if prefetch != self.prefetch:
+            self.prefetch = prefetch
+            if self._apply_prefetch is not None:
+                await self._apply_prefetch(prefetch)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.adjust()
+            except Exception:
+                logger.exception("worker flow: adjustment failed")
+
+    def start(self, apply_prefetch: Callable[[int], Awaitable[None]]) -> None:
+        self._apply_prefetch = apply_prefetch
+        self._pool_mark = self._read_pool()
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limiter.limit,
+            "prefetch": self.prefetch,
+            "in_flight": self.limiter.active,
+            "waiting": self.limiter.waiting,
+            "latency_ms": round(self._latency * 1000, 3),
+            "baseline_ms": round((self._baseline or 0.0) * 1000, 3),
+            "pool_wait_ms": round(self._pool_wait * 1000, 3),
+            "increases": self._increases,
+            "decreases": self._decreases,
+        }
+
+
+__all__ = ["ConcurrencyLimiter", "AdaptiveFlowController"]
@@ -0,0 +1,149 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Optional
+import aio_pika
+from config import RabbitMqConfig
+
+logger = logging.getLogger(__name__)
+
+# Сколько раз сообщение уже откладывалось на повтор; у исходной публикации заголовка нет
+RETRY_COUNT_HEADER = "x-retry-count"
+# Тип последнего исключения — чтобы в parking-очереди было видно, почему сообщение остановлено
+RETRY_ERROR_HEADER = "x-retry-error"
+
+
+@dataclass(slots=True, frozen=True)
+class RetryPolicy:
+    """
+    Отложенные повторы через очереди ожидания: сообщение публикуется в очередь
+    с x-message-ttl своей задержки, по истечении которой брокер возвращает его
+    (dead-letter в default exchange) в рабочую очередь. Задержка растёт вдвое
+    с каждой попыткой; после max_retries сообщение уходит в parking-очередь.
+
+    У каждой задержки своя очередь: TTL отдельного сообщения истекает, только когда
+    оно дошло до головы очереди, и короткая задержка ждала бы длинную перед собой.
+    Задержка входит в имя очереди — смена настроек объявляет новые очереди,
+    а не конфликтует с аргументами существующих.
+    """
+    max_retries: int = 5
+    initial_delay_ms: int = 1000
+    max_delay_ms: int = 60_000
+
+    @classmethod
+    def from_config(cls, config: RabbitMqConfig) -> "RetryPolicy":
+        return cls(
+            max_retries=config.worker_max_retries,
+            initial_delay_ms=config.worker_retry_delay_ms,
+            max_delay_ms=config.worker_retry_delay_max_ms,
+        )
+
+    def delay_ms(self, attempt: int) -> int:
+        return min(self.max_delay_ms, self.initial_delay_ms * 2 ** (attempt - 1))
+
+    def delays_ms(self) -> list[int]:
+        return sorted({self.delay_ms(a) for a in range(1, self.max_retries + 1)})
+
+    @staticmethod
+    def retry_queue(queue_name: str, delay_ms: int) -> str:
+        return f"{queue_name}.retry.{delay_ms}ms"
+
+    @staticmethod
+    def parking_queue(queue_name: str) -> str:
+        return f"{queue_name}.parking"
+
+
+async def declare_retry_topology(
+    channel: aio_pika.abc.AbstractChannel, queue_name: str, policy: RetryPolicy, durable: bool = True
+) -> None:
+    for delay in policy.delays_ms():
+        await channel.declare_queue(
+            policy.retry_queue(queue_name, delay),
+            durable=durable,
+            arguments={
+                "x-message-ttl": delay,
+                "x-dead-letter-exchange": "",
+                "x-dead-letter-routing-key": queue_name,
+            },
+        )
+    await channel.declare_queue(policy.parking_queue(queue_name), durable=durable)
+
+
+def retry_count(message: aio_pika.abc.AbstractIncomingMessage) -> int:
+    try:
+        return int((message.headers or {}).get(RETRY_COUNT_HEADER, 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def copy_message(
+    message: aio_pika.abc.AbstractIncomingMessage, attempts: int, error: Optional[str] = None
+) -> aio_pika.Message:
+    headers = dict(message.headers or {})
+    headers[RETRY_COUNT_HEADER] = attempts
+    if error is not None:
+        headers[RETRY_ERROR_HEADER] = error
+    else:
+        headers.pop(RETRY_ERROR_HEADER, None)
+    return aio_pika.Message(
+        body=message.body,
+        headers=headers,
+        content_type=message.content_type,
+        content_encoding=message.content_encoding,
+        message_id=message.message_id,
+        timestamp=message.timestamp,
+        delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+    )
+
+
+async def replay_parked(
+    connection: aio_pika.abc.AbstractConnection,
+    queue_name: str,
+    policy: RetryPolicy,
+    *,
+    limit: Optional[int] = None,
+    batch_size: int = 100,
+) -> int:
+    """
+    Возвращает сообщения из parking-очереди в рабочую со сброшенным счётчиком попыток.
+    Переносится не больше сообщений, чем было в очереди на момент запуска: снова
+    упавшие сообщения вернутся в parking, но не будут переиграны повторно тем же вызовом.
+    Пачка публикуется с подтверждениями брокера и только после этого подтверждается в parking.
+    """
+    channel = await connection.channel(publisher_confirms=True)
+    try:
+        await channel.set_qos(prefetch_count=batch_size)
+        parking = await channel.declare_queue(policy.parking_queue(queue_name), durable=True)
+        remaining = parking.declaration_result.message_count
+        if limit is not None:
+            remaining = min(remaining, limit)
+        moved = 0
+        while moved < remaining:
+            batch: list[aio_pika.abc.AbstractIncomingMessage] = []
+            while len(batch) < min(batch_size, remaining - moved):
+                message = await parking.get(no_ack=False, fail=False)
+                if message is None:
+                    break
+                batch.append(message)
+            if not batch:
+                break
+            await asyncio.gather(*(
+                channel.default_exchange.publish(copy_message(m, 0), routing_key=queue_name) for m in batch
+            ))
+            await batch[-1].ack(multiple=True)
+            moved += len(batch)
+            logger.info("replay %s: %d/%d messages moved", queue_name, moved, remaining)
+        return moved
+    finally:
+        await channel.close()
+
+
+__all__ = [
+    "RetryPolicy",
+    "RETRY_COUNT_HEADER",
+    "RETRY_ERROR_HEADER",
+    "declare_retry_topology",
+    "retry_count",
+    "copy_message",
+    "replay_parked",
+]
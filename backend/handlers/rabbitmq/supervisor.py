@@ -0,0 +1,193 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+import time
+from contextlib import suppress
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Счётчики сообщений, которые дочерний процесс присылает в отчётах
+OUTCOMES = ("ack", "reject", "requeue", "retry", "park")
+
+# target(index, reports): точка входа дочернего процесса; reports — очередь отчётов
+# вида (index, pid, {outcome: count}) с накопленными с запуска процесса значениями
+WorkerTarget = Callable[[int, "multiprocessing.Queue"], None]
+
+
+class _Slot:
+    __slots__ = ("index", "process", "started_at", "failures", "restart_at", "counts")
+
+    def __init__(self, index: int) -> None:
+        self.index = index
+        self.process: Optional[multiprocessing.process.BaseProcess] = None
+        self.started_at = 0.0
+        self.failures = 0
+        self.restart_at: Optional[float] = None
+        self.counts: dict[str, float] = dict.fromkeys(OUTCOMES, 0.0)
+
+
+class WorkerSupervisor:
+    """
+    Держит N процессов воркера; у каждого свой цикл событий, DI-контейнер, пул БД и AMQP-соединение.
+    Процессы запускаются через spawn: родитель сам работает в цикле событий, а fork
+    из такого процесса копирует его дескрипторы и состояние потоков.
+
+    Упавший процесс перезапускается с экспоненциальной задержкой; процесс, проработавший
+    stable_after секунд, снова начинает с initial_backoff. При остановке дочерние процессы
+    получают SIGTERM и дочитывают начатые сообщения; не успевшие за shutdown_timeout — SIGKILL.
+    """
+    def __init__(
+        self,
+        target: WorkerTarget,
+        processes: int,
+        *,
+        shutdown_timeout: float = 30.0,
+        initial_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+        stable_after: float = 60.0,
+        report_interval: float = 10.0,
+        poll_interval: float = 0.5,
+    ) -> None:
+        self._target = target
+        self._context = multiprocessing.get_context("spawn")
+        self._reports = self._context.Queue()
+        self._slots = [_Slot(i) for i in range(processes)]
+        self._shutdown_timeout = shutdown_timeout
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._stable_after = stable_after
+        self._report_interval = report_interval
+        self._poll_interval = poll_interval
+        self._stopping = asyncio.Event()
+        self._restarts = 0
+        # Итоги процессов, которые уже завершились: счётчики нового процесса начинаются с нуля
+        self._retired: dict[str, float] = dict.fromkeys(OUTCOMES, 0.0)
+        self._rate = 0.0
+        self._rate_mark: tuple[float, float] = (time.monotonic(), 0.0)
+
+    def _spawn(self, slot: _Slot) -> None:
+        process = self._context.Process(
+            target=self._target,
+            args=(slot.index, self._reports),
+            name=f"lead-worker-{slot.index}",
+        )
+        process.start()
+        slot.process = process
+        slot.started_at = time.monotonic()
+        slot.restart_at = None
+        logger.info("worker %d started (pid %d)", slot.index, process.pid)
+
+    def _backoff(self, slot: _Slot) -> float:
+        return min(self._max_backoff, self._initial_backoff * 2 ** (slot.failures - 1))
+
+    def _check(self, slot: _Slot, now: float) -> None:
+        process = slot.process
+        if process is None:
+            if slot.restart_at is not None and now >= slot.restart_at:
+                self._spawn(slot)
+                self._restarts += 1
+            return
+        if process.is_alive():
+            return
+        process.join()
+        slot.process = None
+        self._retire(slot)
+        if now - slot.started_at >= self._stable_after:
+            slot.failures = 0
+        slot.failures += 1
+        delay = self._backoff(slot)
+        slot.restart_at = now + delay
+        logger.warning(
+            "worker %d (pid %s) exited with code %s, restart in %.1fs",
+            slot.index, process.pid, process.exitcode, delay,
+        )
+
+    def _retire(self, slot: _Slot) -> None:
+        for outcome in OUTCOMES:
+            self._retired[outcome] += slot.counts[outcome]
+        slot.counts = dict.fromkeys(OUTCOMES, 0.0)
+
+    def _drain_reports(self) -> None:
+        while True:
+            try:
+                index, pid, counts = self._reports.get_nowait()
+            except queue.Empty:
+                return
+            slot = self._slots[index]
+            # Отчёт от процесса, который уже сменился, не должен затирать счётчики нового
+            if slot.process is None or slot.process.pid != pid:
+                continue
+            slot.counts = {o: float(counts.get(o, 0.0)) for o in OUTCOMES}
+
+    def totals(self) -> dict[str, float]:
+        totals = dict(self._retired)
+        for slot in self._slots:
+            for outcome in OUTCOMES:
+                totals[outcome] += slot.counts[outcome]
+        return totals
+
+    def stats(self) -> dict:
+        totals = self.totals()
+        return {
+            "processes": len(self._slots),
+            "alive": sum(1 for s in self._slots if s.process is not None and s.process.is_alive()),
+            "restarts": self._restarts,
+            "messages": {o: int(v) for o, v in totals.items()},
+            "messages_per_sec": round(self._rate, 1),
+        }
+
+    def _report(self, now: float) -> None:
+        handled = sum(self.totals().values())
+        mark_at, mark_handled = self._rate_mark
+        if now > mark_at:
+            self._rate = (handled - mark_handled) / (now - mark_at)
+        self._rate_mark = (now, handled)
+        stats = self.stats()
+        logger.info(
+            "workers: %d/%d alive, %.1f msg/s, %s, restarts %d",
+            stats["alive"], stats["processes"], stats["messages_per_sec"], stats["messages"], stats["restarts"],
+        )
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    async def run(self) -> None:
+        for slot in self._slots:
+            self._spawn(slot)
+        next_report = time.monotonic() + self._report_interval
+        while not self._stopping.is_set():
+            now = time.monotonic()
+            self._drain_reports()
+            for slot in self._slots:
+                self._check(slot, now)
+            if now >= next_report:
+                self._report(now)
+                next_report = now + self._report_interval
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._stopping.wait(), self._poll_interval)
+        await self._shutdown()
+
+    async def _shutdown(self) -> None:
+        running = [s.process for s in self._slots if s.process is not None and s.process.is_alive()]
+        for process in running:
+            process.terminate()
+        deadline = time.monotonic() + self._shutdown_timeout
+        while any(p.is_alive() for p in running) and time.monotonic() < deadline:
+            self._drain_reports()
+            await asyncio.sleep(self._poll_interval)
+        for process in running:
+            if process.is_alive():
+                logger.warning("worker pid %d did not drain in %.0fs, killing", process.pid, self._shutdown_timeout)
+                process.kill()
+            process.join()
+        self._drain_reports()
+        self._report(time.monotonic())
+        for slot in self._slots:
+            slot.process = None
+        self._reports.close()
+        self._reports.join_thread()
+
+
+__all__ = ["WorkerSupervisor", "OUTCOMES"]
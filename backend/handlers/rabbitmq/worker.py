@@ -1,10 +1,46 @@
-import json
 import asyncio
+import logging
+import time
+from datetime import datetime, timezone
 from typing import Optional
 import aio_pika
 from dishka import AsyncContainer  # removed Scope
 from application.lead import dto as lead_dto
-from application.lead.interactors import CreateInsightInteractor
+from application.lead import exceptions as lead_exceptions
+from application.lead.interactors import CreateInsightInteractor, CreateInsightsBatchInteractor
+from handlers.rabbitmq.flow_control import AdaptiveFlowController
+from handlers.rabbitmq.retry import RetryPolicy, copy_message, declare_retry_topology, retry_count
+from infrastructure.queue.codec import UnsupportedMessageFormat, decode_message
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MESSAGE_SECONDS = REGISTRY.histogram(
+    "crm_worker_message_seconds", "Single message handling latency", ["outcome"]
+)
+BATCH_SECONDS = REGISTRY.histogram(
+    "crm_worker_batch_seconds", "Batch handling latency", ["outcome"]
+)
+BATCH_SIZE = REGISTRY.histogram(
+    "crm_worker_batch_size", "Messages per flushed batch", buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000)
+)
+MESSAGES = REGISTRY.counter("crm_worker_messages", "Handled lead.created messages", ["outcome"])
+# Задержка от создания лида до разбора сообщения воркером (очередь + outbox-relay)
+QUEUE_LAG_SECONDS = REGISTRY.histogram(
+    "crm_worker_queue_lag_seconds",
+    "Delay between lead creation and message handling",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0),
+)
+
+
+def _observe_lag(occurred_at: Optional[str]) -> None:
+    # Метрика не должна влиять на разбор сообщения: битая или наивная дата просто пропускается
+    try:
+        lag = datetime.now(timezone.utc) - datetime.fromisoformat(occurred_at)
+    except (TypeError, ValueError):
+        return
+    QUEUE_LAG_SECONDS.observe(max(0.0, lag.total_seconds()))
+
 
 class LeadCreatedWorker:
     def __init__(
@@ -18,13 +54,19 @@ class LeadCreatedWorker:
         prefetch: int = 10,
         durable_queue: bool = True,
         durable_exchange: bool = True,
+        batch_size: int = 1,
+        batch_timeout_ms: int = 50,
+        drain_timeout: float = 30.0,
+        flow: Optional[AdaptiveFlowController] = None,
+        retry: Optional[RetryPolicy] = None,
     ) -> None:
         self._connection = connection
         self._container = container
         self._exchange_name = exchange
         self._routing_key = routing_key
         self._queue_name = queue_name
-        self._prefetch = prefetch
+        # В пакетном режиме брокер должен успевать наполнять буфер, пока идёт предыдущая пачка
+        self._prefetch = max(prefetch, batch_size * 2) if batch_size > 1 else prefetch
         self._durable_queue = durable_queue
         self._durable_exchange = durable_exchange
         self._channel: Optional[aio_pika.RobustChannel] = None
@@ -33,6 +75,21 @@ class LeadCreatedWorker:
         self._consume_tag: Optional[str] = None
         self._started = False
         self._lock = asyncio.Lock()
+        self._batch_size = batch_size
+        self._batch_timeout = batch_timeout_ms / 1000
+        self._buffer: list[aio_pika.IncomingMessage] = []
+        self._flush_timer: Optional[asyncio.TimerHandle] = None
+        self._flush_lock = asyncio.Lock()
+        self._flush_tasks: set[asyncio.Task] = set()
+        # Сообщения, обработка которых уже началась: stop() дожидается их до закрытия канала
+        self._in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._drain_timeout = drain_timeout
+        # Адаптивный предел параллельности и prefetch; только для поштучного режима
+        self._flow = flow if batch_size == 1 else None
+        # Без политики сбойное сообщение возвращается в очередь сразу (nack requeue)
+        self._retry = retry if retry is not None and retry.max_retries > 0 else None
 
     async def start(self) -> None:
         if self._started:
@@ -41,7 +98,13 @@ class LeadCreatedWorker:
             if self._started:
                 return
             self._channel = await self._connection.channel()
-            await self._channel.set_qos(prefetch_count=self._prefetch)
+            if self._flow is not None:
+                # Per-consumer prefetch брокер применяет только к новым подпискам;
+                # лимит канала (global) меняется на лету, а подписка на канале одна
+                await self._channel.set_qos(prefetch_count=self._flow.prefetch, global_=True)
+                self._flow.start(self._set_prefetch)
+            else:
+                await self._channel.set_qos(prefetch_count=self._prefetch)
             self._exchange = await self._channel.declare_exchange(
                 self._exchange_name,
                 type=aio_pika.ExchangeType.TOPIC,
@@ -52,7 +115,10 @@ class LeadCreatedWorker:
                 durable=self._durable_queue,
             )
             await self._queue.bind(self._exchange, routing_key=self._routing_key)
-            self._consume_tag = await self._queue.consume(self._on_message)
+            if self._retry is not None:
+                await declare_retry_topology(self._channel, self._queue_name, self._retry, self._durable_queue)
+            on_message = self._on_message_batched if self._batch_size > 1 else self._on_message
+            self._consume_tag = await self._queue.consume(on_message)
             self._started = True
 
     async def stop(self) -> None:
@@ -64,6 +130,18 @@ class LeadCreatedWorker:
                     await self._queue.cancel(self._consume_tag)
                 except Exception:
                     pass
+            if self._flow is not None:
+                self._flow.stop()
+            # Дожидаемся уже начатых сообщений и пачек, сбрасываем остаток буфера до закрытия канала:
+            # иначе их ack не дойдёт и брокер доставит их повторно
+            self._schedule_flush()
+            pending = [*self._flush_tasks]
+            if not self._idle.is_set():
+                pending.append(asyncio.ensure_future(self._idle.wait()))
+            if pending:
+                _, not_done = await asyncio.wait(pending, timeout=self._drain_timeout)
+                for task in not_done:
+                    task.cancel()
             if self._channel:
                 try:
                     await self._channel.close()
@@ -75,25 +153,176 @@ class LeadCreatedWorker:
             self._consume_tag = None
             self._started = False
 
+    async def _set_prefetch(self, prefetch: int) -> None:
+        if self._channel is not None:
+            await self._channel.set_qos(prefetch_count=prefetch, global_=True)
+
+    def _decode(self, message: aio_pika.IncomingMessage) -> Optional[lead_dto.InsighCreateInDto]:
+        # None — битое сообщение. UnsupportedMessageFormat пробрасывается: формат (msgpack без пакета,
+        # новый content_type) может разобрать обновлённый воркер, поэтому сообщение не выбрасывается
+        try:
+            payload = decode_message(message.body, message.content_type, message.content_encoding)
+            _observe_lag(payload.get("occurred_at"))
+            return lead_dto.InsighCreateInDto(
+                lead_id=payload["lead_id"],
+                content_hash=payload["content_hash"],
+                # Claim-check сообщение без content: заметку прочитает интерактор
+                content=payload.get("content"),
+            )
+        except UnsupportedMessageFormat:
+            raise
+        except Exception:
+            return None
+
     async def _on_message(self, message: aio_pika.IncomingMessage) -> None:
-        async with message.process(requeue=True):
+        self._in_flight += 1
+        self._idle.clear()
+        try:
+            if self._flow is None:
+                await self._handle(message)
+                return
+            # Сверх предела сообщение ждёт слота, не открывая сессию БД
+            await self._flow.acquire()
+            started = time.perf_counter()
             try:
-                payload = json.loads(message.body.decode("utf-8"))
-                lead_id = payload["lead_id"]
-                content_hash = payload["content_hash"]
-                content = payload.get("content", "")
-            except Exception:
-                message.reject(requeue=False)
+                await self._handle(message)
+            finally:
+                self._flow.release(time.perf_counter() - started)
+        finally:
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._idle.set()
+
+    async def _handle(self, message: aio_pika.IncomingMessage) -> None:
+        started = time.perf_counter()
+        # Исключение при подтверждении (канал закрыт) — брокер доставит сообщение повторно
+        outcome = "requeue"
+        try:
+            try:
+                insight_dto = self._decode(message)
+            except UnsupportedMessageFormat as exc:
+                outcome = await self._retry_later(message, exc)
                 return
-            print(content)
-            insight_dto = lead_dto.InsighCreateInDto(
-                lead_id=lead_id,
-                content_hash=content_hash,
-                content=content,
-            )
+            if insight_dto is None:
+                await message.reject(requeue=False)
+                outcome = "reject"
+            else:
+                outcome = await self._process_one(message, insight_dto)
+        finally:
+            MESSAGES.labels(outcome).inc()
+            MESSAGE_SECONDS.labels(outcome).observe(time.perf_counter() - started)
 
+    async def _process_one(self, message: aio_pika.IncomingMessage, insight_dto: lead_dto.InsighCreateInDto) -> str:
+        try:
             async with self._container() as request_container:
                 interactor: CreateInsightInteractor = await request_container.get(CreateInsightInteractor)
                 await interactor.create_insight(insight_dto)
+        except lead_exceptions.InsightAlreadyExistsException:
+            # Повторная доставка уже обработанного сообщения
+            await message.ack()
+            return "ack"
+        except (lead_exceptions.InvalidInsightDataException, ValueError):
+            await message.reject(requeue=False)
+            return "reject"
+        except Exception as exc:
+            return await self._retry_later(message, exc)
+        await message.ack()
+        return "ack"
+
+    async def _retry_later(self, message: aio_pika.IncomingMessage, exc: Exception) -> str:
+        if self._retry is None or self._channel is None:
+            await message.nack(requeue=True)
+            return "requeue"
+        attempt = retry_count(message) + 1
+        if attempt > self._retry.max_retries:
+            target, outcome = RetryPolicy.parking_queue(self._queue_name), "park"
+            logger.warning("message %s parked after %d attempts: %r", message.message_id, attempt, exc)
+        else:
+            target, outcome = RetryPolicy.retry_queue(self._queue_name, self._retry.delay_ms(attempt)), "retry"
+        try:
+            # Копия публикуется с подтверждением брокера до ack оригинала: сообщение не теряется
+            await self._channel.default_exchange.publish(
+                copy_message(message, attempt, type(exc).__name__), routing_key=target
+            )
+        except Exception:
+            logger.exception("retry publish failed, message %s requeued", message.message_id)
+            await message.nack(requeue=True)
+            return "requeue"
+        await message.ack()
+        return outcome
+
+    async def _on_message_batched(self, message: aio_pika.IncomingMessage) -> None:
+        self._buffer.append(message)
+        if len(self._buffer) >= self._batch_size:
+            self._schedule_flush()
+        elif self._flush_timer is None:
+            loop = asyncio.get_running_loop()
+            self._flush_timer = loop.call_later(self._batch_timeout, self._schedule_flush)
+
+    def _schedule_flush(self) -> None:
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+            self._flush_timer = None
+        if not self._buffer:
+            return
+        batch, self._buffer = self._buffer, []
+        task = asyncio.get_running_loop().create_task(self._flush(batch))
+        self._flush_tasks.add(task)
+        task.add_done_callback(self._flush_tasks.discard)
+
+    async def _flush(self, batch: list[aio_pika.IncomingMessage]) -> None:
+        # Пачки обрабатываются по очереди: проверка дубликатов одной пачки
+        # должна видеть инсайты, закоммиченные предыдущей
+        async with self._flush_lock:
+            started = time.perf_counter()
+            BATCH_SIZE.observe(len(batch))
+            messages: list[aio_pika.IncomingMessage] = []
+            items: list[lead_dto.InsighCreateInDto] = []
+            for message in batch:
+                try:
+                    insight_dto = self._decode(message)
+                except UnsupportedMessageFormat as exc:
+                    MESSAGES.labels(await self._retry_later(message, exc)).inc()
+                    continue
+                if insight_dto is None:
+                    await message.reject(requeue=False)
+                    MESSAGES.labels("reject").inc()
+                    continue
+                messages.append(message)
+                items.append(insight_dto)
+            if not items:
+                return
+
+            try:
+                async with self._container() as request_container:
+                    interactor: CreateInsightsBatchInteractor = await request_container.get(
+                        CreateInsightsBatchInteractor
+                    )
+                    results = await interactor.create_insights(items)
+            except Exception:
+                # Пачка откатилась целиком — разбираем её по одному сообщению,
+                # чтобы сбойная строка не тянула за собой остальные
+                await self._process_individually(messages, items)
+                BATCH_SECONDS.labels("fallback").observe(time.perf_counter() - started)
+                return
+
+            await asyncio.gather(*(
+                messages[r.index].reject(requeue=False)
+                if r.status == lead_dto.InsightBatchStatus.INVALID
+                else messages[r.index].ack()
+                for r in results
+            ))
+            rejected = sum(r.status == lead_dto.InsightBatchStatus.INVALID for r in results)
+            MESSAGES.labels("reject").inc(rejected)
+            MESSAGES.labels("ack").inc(len(results) - rejected)
+            BATCH_SECONDS.labels("ok").observe(time.perf_counter() - started)
+
+    async def _process_individually(
+        self,
+        messages: list[aio_pika.IncomingMessage],
+        items: list[lead_dto.InsighCreateInDto],
+    ) -> None:
+        for message, insight_dto in zip(messages, items):
+            MESSAGES.labels(await self._process_one(message, insight_dto)).inc()
 
 __all__ = ["LeadCreatedWorker"]
@@ -0,0 +1,153 @@
+import json
+import time
+from abc import abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional, Protocol, Sequence
+from application.lead import interfaces
+from application.lead.dto import LeadOutDTO
+
+
+class LRUCache:
+    """
+    Внутрипроцессный LRU с TTL.
+    Запись живёт не дольше ttl_seconds; при переполнении max_size вытесняется
+    самая давно использованная. Счётчики попаданий доступны через stats().
+    """
+    def __init__(
+        self,
+        max_size: int = 10_000,
+        ttl_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_size = max_size
+        self._ttl = ttl_seconds
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple[Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        value, expires_at = entry
+        if expires_at <= self._clock():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (value, self._clock() + self._ttl)
+        self._data.move_to_end(key)
+        while len(self._data) > self._max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self._max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SharedCacheTier(Protocol):
+    """Общий для реплик уровень кеша (Redis, memcached и т.п.)."""
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+
+class LeadCache(interfaces.LeadCache):
+    """
+    Кеш лидов для GetLeadInteractor: локальный LRU, за ним необязательный общий уровень.
+    invalidate() убирает запись из обоих уровней и рассылает событие другим репликам
+    через invalidation_broker (если задан); реплики вызывают evict_local().
+    """
+    KEY_PREFIX = "lead:"
+
+    def __init__(
+        self,
+        local: LRUCache,
+        shared: Optional[SharedCacheTier] = None,
+        invalidation_broker: Optional[interfaces.MessageBroker] = None,
+        shared_ttl_seconds: float = 300.0,
+    ) -> None:
+        self._local = local
+        self._shared = shared
+        self._invalidation_broker = invalidation_broker
+        self._shared_ttl = shared_ttl_seconds
+        self.shared_hits = 0
+        self.shared_misses = 0
+
+    async def get(self, lead_id: str) -> LeadOutDTO | None:
+        lead = self._local.get(lead_id)
+        if lead is not None or self._shared is None:
+            return lead
+        raw = await self._shared.get(self.KEY_PREFIX + lead_id)
+        if raw is None:
+            self.shared_misses += 1
+            return None
+        self.shared_hits += 1
+        lead = LeadOutDTO.from_dict(json.loads(raw))
+        self._local.set(lead_id, lead)
+        return lead
+
+    async def set(self, lead: LeadOutDTO) -> None:
+        lead_id = str(lead.id)
+        self._local.set(lead_id, lead)
+        if self._shared is not None:
+            raw = json.dumps(lead.to_dict(), ensure_ascii=False, separators=(",", ":")).encode()
+            await self._shared.set(self.KEY_PREFIX + lead_id, raw, self._shared_ttl)
+
+    async def invalidate(self, lead_ids: Sequence[str]) -> None:
+        for lead_id in lead_ids:
+            self._local.delete(lead_id)
+            if self._shared is not None:
+                await self._shared.delete(self.KEY_PREFIX + lead_id)
+        if self._invalidation_broker is not None and lead_ids:
+            self._invalidation_broker.publish_many([{"lead_id": lead_id} for lead_id in lead_ids])
+
+    def evict_local(self, lead_id: str) -> None:
+        self._local.delete(lead_id)
+
+    def stats(self) -> dict:
+        shared_lookups = self.shared_hits + self.shared_misses
+        return {
+            "local": self._local.stats(),
+            "shared": {
+                "enabled": self._shared is not None,
+                "hits": self.shared_hits,
+                "misses": self.shared_misses,
+                "hit_rate": round(self.shared_hits / shared_lookups, 4) if shared_lookups else 0.0,
+            },
+        }
+
+
+__all__ = ["LRUCache", "SharedCacheTier", "LeadCache"]
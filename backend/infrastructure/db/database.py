@@ -1,7 +1,93 @@
+import time
+from typing import Any
+from sqlalchemy import exc
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from config import PostgresConfig
 
 
+class PoolWaitStats:
+    """Сколько раз и как долго процесс ждал соединение из пула."""
+    __slots__ = ("checkouts", "timeouts", "wait_seconds_total", "wait_seconds_max")
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.checkouts += 1
+        self.wait_seconds_total += seconds
+        if seconds > self.wait_seconds_max:
+            self.wait_seconds_max = seconds
+
+
+class PoolWaitTimingMixin:
+    """
+    Замеряет время получения соединения из пула (_do_get): ожидание свободного соединения
+    при исчерпанном overflow или открытие нового. Таймауты пула считаются отдельно.
+    """
+    wait_stats: PoolWaitStats
+
+    def __init__(self, *args: Any, **kw: Any) -> None:
+        super().__init__(*args, **kw)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            entry = super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.timeouts += 1
+            raise
+        self.wait_stats.observe(time.perf_counter() - started)
+        return entry
+
+
+class InstrumentedAsyncPool(PoolWaitTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(session_maker: async_sessionmaker[AsyncSession]) -> dict:
+    pool = session_maker.kw["bind"].pool
+    stats = {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": pool.overflow(),
+    }
+    wait_stats: PoolWaitStats | None = getattr(pool, "wait_stats", None)
+    if wait_stats is not None:
+        stats.update(
+            checkouts=wait_stats.checkouts,
+            timeouts=wait_stats.timeouts,
+            wait_seconds_total=round(wait_stats.wait_seconds_total, 6),
+            wait_seconds_max=round(wait_stats.wait_seconds_max, 6),
+            wait_seconds_avg=round(wait_stats.wait_seconds_total / wait_stats.checkouts, 6)
+            if wait_stats.checkouts else 0.0,
+        )
+    return stats
+
+
+def _connect_args(psql_config: PostgresConfig) -> dict:
+    # statement_cache_size — кеш подготовленных выражений asyncpg,
+    # prepared_statement_cache_size — кеш SQLAlchemy поверх него; за pgbouncer (transaction) оба 0
+    connect_args: dict[str, Any] = {
+        "statement_cache_size": psql_config.statement_cache_size,
+        "prepared_statement_cache_size": psql_config.statement_cache_size,
+        "command_timeout": psql_config.command_timeout,
+    }
+    server_settings = {}
+    if psql_config.statement_timeout_ms:
+        server_settings["statement_timeout"] = str(psql_config.statement_timeout_ms)
+    if psql_config.application_name:
+        server_settings["application_name"] = psql_config.application_name
+    if server_settings:
+        connect_args["server_settings"] = server_settings
+    return connect_args
+
+
 async def new_session_maker(psql_config: PostgresConfig) -> async_sessionmaker[AsyncSession]:
     database_uri = "postgresql+asyncpg://{login}:{password}@{host}:{port}/{database}".format(
         login=psql_config.login,
@@ -13,6 +99,13 @@ async def new_session_maker(psql_config: PostgresConfig) -> async_sessionmaker[A
 
     engine = create_async_engine(
         database_uri,
+        poolclass=InstrumentedAsyncPool,
+        pool_size=psql_config.pool_size,
+        max_overflow=psql_config.max_overflow,
+        pool_timeout=psql_config.pool_timeout,
+        pool_recycle=psql_config.pool_recycle,
+        pool_pre_ping=psql_config.pool_pre_ping,
+        connect_args=_connect_args(psql_config),
     )
-    
-    return async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
\ No newline at end of file
+
+    return async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
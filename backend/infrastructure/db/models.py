@@ -1,6 +1,6 @@
 import sqlalchemy as sa
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
 import uuid
 from sqlalchemy.orm import relationship
 from typing import Optional, List
@@ -30,8 +30,27 @@ class NextActionEnum(str, Enum):
     qualify = "qualify"
 
 
+# Конфигурация полнотекстового поиска: русские слова стеммятся, латиница — английским стеммером
+SEARCH_CONFIG = "russian"
+
+# leads и insights секционированы помесячно по created_at (партиции: <table>_pYYYY_MM).
+# Ключ секционирования входит в первичный ключ таблицы; для ORM идентичность — по id
+PARTITION_BY = "RANGE (created_at)"
+
+
 class Lead(Base):
     __tablename__ = "leads"
+    __table_args__ = (
+        sa.Index("ix_leads_created_at_id", "created_at", "id"),
+        sa.Index("ix_leads_source_created_at_id", "source", "created_at", "id"),
+        sa.Index("ix_leads_note_tsv", "note_tsv", postgresql_using="gin"),
+        sa.Index("ix_leads_email_trgm", "email", postgresql_using="gin", postgresql_ops={"email": "gin_trgm_ops"}),
+        sa.Index("ix_leads_phone_trgm", "phone", postgresql_using="gin", postgresql_ops={"phone": "gin_trgm_ops"}),
+        sa.Index("ix_leads_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        sa.Index("ix_leads_email_normalized", "email_normalized", postgresql_where=sa.text("email_normalized IS NOT NULL")),
+        sa.Index("ix_leads_phone_normalized", "phone_normalized", postgresql_where=sa.text("phone_normalized IS NOT NULL")),
+        {"postgresql_partition_by": PARTITION_BY},
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
@@ -42,25 +61,39 @@ class Lead(Base):
     note: Mapped[str] = mapped_column(sa.Text, nullable=False)
     source: Mapped[str | None] = mapped_column(sa.String(100), nullable=True)
     created_at: Mapped[sa.DateTime] = mapped_column(
-        sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        sa.DateTime(timezone=True), primary_key=True, server_default=sa.func.now(), nullable=False
+    )
+    # Ключи поиска дубликатов: заполняются репозиторием при вставке (validators.normalize_*)
+    email_normalized: Mapped[str | None] = mapped_column(sa.String(255), nullable=True)
+    phone_normalized: Mapped[str | None] = mapped_column(sa.String(50), nullable=True)
+    # Только для поиска: не читается вместе с лидом (deferred, в RETURNING репозиториев не входит)
+    note_tsv: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR,
+        sa.Computed(f"to_tsvector('{SEARCH_CONFIG}'::regconfig, coalesce(note, ''))", persisted=True),
+        deferred=True,
     )
 
     insights: Mapped[List["Insight"]] = relationship(
+        primaryjoin="Lead.id == foreign(Insight.lead_id)",
         back_populates="lead", cascade="all, delete-orphan", lazy="selectin"
     )
 
+    __mapper_args__ = {"primary_key": [id]}
+
 
 class Insight(Base):
     __tablename__ = "insights"
     __table_args__ = (
         sa.CheckConstraint("confidence >= 0 AND confidence <= 1", name="ck_insight_confidence_range"),
+        {"postgresql_partition_by": PARTITION_BY},
     )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
+    # Без внешнего ключа: он должен был бы включать created_at лида; связь поддерживает приложение
     lead_id: Mapped[uuid.UUID] = mapped_column(
-        UUID(as_uuid=True), sa.ForeignKey("leads.id", ondelete="CASCADE"), nullable=False, index=True
+        UUID(as_uuid=True), nullable=False, index=True
     )
     intent: Mapped[IntentEnum] = mapped_column(
         sa.Enum(IntentEnum, name="intent_enum"), nullable=False
@@ -79,10 +112,32 @@ class Insight(Base):
     )
     content_hash: Mapped[str] = mapped_column(sa.String(64), nullable=False)
     created_at: Mapped[sa.DateTime] = mapped_column(
-        sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+        sa.DateTime(timezone=True), primary_key=True, server_default=sa.func.now(), nullable=False
+    )
+
+    lead: Mapped["Lead"] = relationship(
+        primaryjoin="Lead.id == foreign(Insight.lead_id)", back_populates="insights"
     )
 
-    lead: Mapped["Lead"] = relationship(back_populates="insights")
+    __mapper_args__ = {"primary_key": [id]}
+
+class InsightRollup(Base):
+    """
+    Счётчики инсайтов по часу и измерениям; обновляются в транзакции записи инсайтов.
+    leads — лиды, у которых первый инсайт попал в эту строку (каждый лид учитывается один раз).
+    """
+    __tablename__ = "insight_rollups"
+
+    bucket: Mapped[sa.DateTime] = mapped_column(sa.DateTime(timezone=True), primary_key=True)
+    # NULL в первичном ключе недопустим: лид без источника — пустая строка
+    source: Mapped[str] = mapped_column(sa.String(100), primary_key=True, server_default="")
+    intent: Mapped[IntentEnum] = mapped_column(sa.Enum(IntentEnum, name="intent_enum"), primary_key=True)
+    priority: Mapped[PriorityEnum] = mapped_column(sa.Enum(PriorityEnum, name="priority_enum"), primary_key=True)
+    next_action: Mapped[NextActionEnum] = mapped_column(
+        sa.Enum(NextActionEnum, name="next_action_enum"), primary_key=True
+    )
+    insights: Mapped[int] = mapped_column(sa.BigInteger, nullable=False, server_default=sa.text("0"))
+    leads: Mapped[int] = mapped_column(sa.BigInteger, nullable=False, server_default=sa.text("0"))
 
 class Keys(Base):
     __tablename__ = "keys"
@@ -90,3 +145,33 @@ class Keys(Base):
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True), primary_key=True, default=uuid.uuid4
     )
+    lead_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    # Тело исходного ответа 201 — повтор запроса отдаёт его без чтения лида
+    response: Mapped[dict | None] = mapped_column(JSONB, nullable=True)
+    created_at: Mapped[sa.DateTime] = mapped_column(
+        sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False, index=True
+    )
+
+
+class Outbox(Base):
+    """Исходящие события: пишутся в транзакции лида, в RabbitMQ их переносит OutboxRelay."""
+    __tablename__ = "outbox"
+
+    id: Mapped[int] = mapped_column(sa.BigInteger, sa.Identity(), primary_key=True)
+    routing_key: Mapped[str] = mapped_column(sa.String(255), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    created_at: Mapped[sa.DateTime] = mapped_column(
+        sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+    )
+
+
+class InsightMemo(Base):
+    """Результат классификатора по content_hash заметки; версия генератора входит в ключ."""
+    __tablename__ = "insight_memo"
+
+    content_hash: Mapped[str] = mapped_column(sa.String(64), primary_key=True)
+    generator_version: Mapped[str] = mapped_column(sa.String(32), primary_key=True)
+    result: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    created_at: Mapped[sa.DateTime] = mapped_column(
+        sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False
+    )
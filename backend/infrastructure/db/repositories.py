@@ -1,15 +1,30 @@
+import re
 import uuid
-from typing import Any, Mapping, Sequence
+from enum import Enum
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Mapping, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, insert, tuple_, update, delete, column, exists, literal, literal_column, or_, and_, cast, any_, all_, text, REAL, Text, String
+from sqlalchemy import values as sa_values
+from sqlalchemy.dialects.postgresql import insert as pg_insert, ARRAY, JSONB, TIMESTAMP, UUID as PG_UUID
 from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import NoResultFound
 from application.lead import dto as lead_dto_module
 from application.lead import interfaces
 from application.lead import exceptions as lead_exceptions
+from application.lead.validators import normalize_email, normalize_phone
 from domen import entities
 from . import models
 from application import common_interfaces
+from metrics import REPOSITORY_SECONDS, instrument_methods
+
+async def _asyncpg_connection(session: AsyncSession):
+    conn = await session.connection()
+    # asyncpg-адаптер SQLAlchemy открывает транзакцию лениво, на первом запросе;
+    # без него COPY выполнился бы вне транзакции сессии
+    await conn.exec_driver_sql("SELECT 1")
+    raw = await conn.get_raw_connection()
+    return raw.driver_connection
 
 def _lead_model_to_entity(m: models.Lead) -> entities.LeadEntity:
     return entities.LeadEntity(
@@ -36,6 +51,45 @@ def _lead_model_to_entity(m: models.Lead) -> entities.LeadEntity:
         ],
     )
 
+# Колонки, которые нужны для LeadEntity; служебные (note_tsv) в RETURNING и выборки не попадают
+_LEAD_ENTITY_COLUMNS = ("id", "email", "phone", "name", "note", "source", "created_at")
+
+def _lead_columns() -> list[Any]:
+    columns = models.Lead.__table__.c
+    return [columns[name] for name in _LEAD_ENTITY_COLUMNS]
+
+def _lead_payload(lead: lead_dto_module.LeadCreateInDTO | Mapping[str, Any]) -> dict[str, Any]:
+    payload = lead.to_dict() if isinstance(lead, lead_dto_module.LeadCreateInDTO) else dict(lead)
+    payload["email_normalized"] = normalize_email(payload.get("email"))
+    payload["phone_normalized"] = normalize_phone(payload.get("phone"))
+    return payload
+
+def _lead_row_to_entity(row: Any) -> entities.LeadEntity:
+    return entities.LeadEntity(
+        id=row.id,
+        note=row.note,
+        email=row.email,
+        phone=row.phone,
+        name=row.name,
+        source=row.source,
+        created_at=row.created_at,
+        insights=[],
+    )
+
+_KEY_NAMESPACE = uuid.NAMESPACE_DNS
+
+def _normalize_key(key: str) -> uuid.UUID:
+    try:
+        return uuid.UUID(key)
+    except ValueError:
+        return uuid.uuid5(_KEY_NAMESPACE, key)
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _enum_value(v: Any) -> Any:
+    return v.value if isinstance(v, Enum) else v
+
 def _insight_model_to_entity(m: models.Insight) -> entities.InsightEntity:
     return entities.InsightEntity(
         id=m.id,
@@ -49,27 +103,129 @@ def _insight_model_to_entity(m: models.Insight) -> entities.InsightEntity:
         created_at=m.created_at,
     )
 
+@instrument_methods(REPOSITORY_SECONDS, "LeadRepository")
 class LeadRepository(interfaces.LeadRepository):
     def __init__(self, session: common_interfaces.DBSession) -> None:
         self.session: AsyncSession = session
 
     async def create(self, lead: lead_dto_module.LeadCreateInDTO | Mapping[str, Any]) -> entities.LeadEntity:
-        if isinstance(lead, lead_dto_module.LeadCreateInDTO):
-            payload = lead.to_dict()
-        else:
-            payload = dict(lead)
-
-        model = models.Lead(**payload)
-        self.session.add(model)
-        await self.session.flush()          
-        await self.session.refresh(model)   
-        return _lead_model_to_entity(model)
+        payload = _lead_payload(lead)
+
+        # INSERT ... RETURNING отдаёт серверные значения (created_at) без отдельного SELECT
+        lead_table = models.Lead.__table__
+        payload.setdefault("id", uuid.uuid4())
+        res = await self.session.execute(insert(lead_table).values(payload).returning(*_lead_columns()))
+        return _lead_row_to_entity(res.one())
+
+    async def create_with_key(
+        self, lead: lead_dto_module.LeadCreateInDTO, key: str
+    ) -> lead_dto_module.LeadKeyedCreateDTO:
+        # Один запрос: вставка лида, захват ключа вместе с телом ответа и чтение ответа,
+        # сохранённого ранее под этим ключом. Ответ собирается в SQL в формате LeadOutDTO.to_dict()
+        lead_table = models.Lead.__table__
+        keys_table = models.Keys.__table__
+        key_id = _normalize_key(key)
+        payload = _lead_payload(lead)
+        payload["id"] = uuid.uuid4()
+
+        new_lead = insert(lead_table).values(payload).returning(*_lead_columns()).cte("new_lead")
+        created_at = func.to_char(
+            func.timezone("UTC", new_lead.c.created_at), literal_column("'YYYY-MM-DD\"T\"HH24:MI:SS.US'")
+        ).concat(literal_column("'+00:00'"))
+        response = func.jsonb_build_object(
+            literal_column("'id'"), new_lead.c.id,
+            literal_column("'note'"), new_lead.c.note,
+            literal_column("'email'"), new_lead.c.email,
+            literal_column("'phone'"), new_lead.c.phone,
+            literal_column("'name'"), new_lead.c.name,
+            literal_column("'source'"), new_lead.c.source,
+            literal_column("'created_at'"), created_at,
+            literal_column("'insights'"), literal_column("'[]'::jsonb"),
+        )
+        claimed = (
+            pg_insert(keys_table)
+            .from_select(
+                ["id", "lead_id", "response"],
+                select(literal(key_id, PG_UUID(as_uuid=True)), new_lead.c.id, response),
+            )
+            .on_conflict_do_nothing(index_elements=[keys_table.c.id])
+            .returning(keys_table.c.id)
+            .cte("claimed")
+        )
+        # Подзапрос видит снимок на начало запроса: ответ уже зафиксированного владельца ключа
+        stored = select(keys_table.c.response).where(keys_table.c.id == key_id).scalar_subquery()
+        stmt = select(
+            *new_lead.c,
+            exists(select(claimed.c.id)).label("claimed"),
+            stored.label("stored_response"),
+        )
+        row = (await self.session.execute(stmt)).one()
+        return lead_dto_module.LeadKeyedCreateDTO(
+            lead=_lead_row_to_entity(row),
+            claimed=row.claimed,
+            stored_response=row.stored_response,
+        )
+
+    async def create_many(
+        self, leads: Sequence[lead_dto_module.LeadCreateInDTO | Mapping[str, Any]]
+    ) -> list[entities.LeadEntity]:
+        if not leads:
+            return []
+        payloads = []
+        for lead in leads:
+            payload = _lead_payload(lead)
+            payload.setdefault("id", uuid.uuid4())
+            payloads.append(payload)
+
+        # Один multi-row INSERT ... RETURNING вместо add/flush/refresh на каждую строку
+        lead_table = models.Lead.__table__
+        stmt = insert(lead_table).values(payloads).returning(*_lead_columns())
+        res = await self.session.execute(stmt)
+        by_id = {row.id: row for row in res}
+        return [_lead_row_to_entity(by_id[p["id"]]) for p in payloads]
+
+    _COPY_COLUMNS = (
+        "id", "email", "phone", "name", "note", "source", "created_at", "email_normalized", "phone_normalized",
+    )
+
+    async def copy_many(self, rows: Sequence[lead_dto_module.LeadImportRowDTO]) -> list[entities.LeadEntity]:
+        if not rows:
+            return []
+        # id и created_at задаём на клиенте: COPY не умеет RETURNING
+        now = datetime.now(timezone.utc)
+        created = [
+            entities.LeadEntity(
+                id=uuid.uuid4(),
+                note=row.lead.note,
+                email=row.lead.email,
+                phone=row.lead.phone,
+                name=row.lead.name,
+                source=row.lead.source,
+                created_at=row.created_at or now,
+            )
+            for row in rows
+        ]
+        conn = await _asyncpg_connection(self.session)
+        await conn.copy_records_to_table(
+            models.Lead.__tablename__,
+            columns=self._COPY_COLUMNS,
+            records=[
+                (
+                    e.id, e.email, e.phone, e.name, e.note, e.source, e.created_at,
+                    normalize_email(e.email), normalize_phone(e.phone),
+                )
+                for e in created
+            ],
+        )
+        return created
 
     async def get(self, lead_id: str) -> entities.LeadEntity:
         try:
             lead_uuid = uuid.UUID(str(lead_id))
         except ValueError:
             raise ValueError("lead_id must be a valid UUID string")
+        # created_at лида неизвестен: без отсечения партиций — по одному поиску в индексе
+        # (id, created_at) каждой партиции; инсайты так же находятся по ix_insights_lead_id
         stmt = (
             select(models.Lead)
             .options(selectinload(models.Lead.insights))  # eager load для async
@@ -82,42 +238,265 @@ class LeadRepository(interfaces.LeadRepository):
             raise lead_exceptions.LeadNotFoundException()
         return _lead_model_to_entity(model)
 
+    async def list_page(
+        self,
+        filters: lead_dto_module.LeadListFilterDTO,
+        after: tuple[datetime, uuid.UUID] | None,
+        limit: int,
+    ) -> list[entities.LeadEntity]:
+        # Только колонки лида, без selectin-подгрузки инсайтов на каждую строку
+        lead_table = models.Lead.__table__
+        stmt = select(*_lead_columns())
+        if filters.source is not None:
+            stmt = stmt.where(lead_table.c.source == filters.source)
+        if filters.created_from is not None:
+            stmt = stmt.where(lead_table.c.created_at >= filters.created_from)
+        if filters.created_to is not None:
+            stmt = stmt.where(lead_table.c.created_at < filters.created_to)
+        if after is not None:
+            stmt = stmt.where(tuple_(lead_table.c.created_at, lead_table.c.id) < tuple_(*after))
+        stmt = stmt.order_by(lead_table.c.created_at.desc(), lead_table.c.id.desc()).limit(limit)
+        res = await self.session.execute(stmt)
+        return [_lead_row_to_entity(row) for row in res]
 
-class KeysRepository(interfaces.KeysRepository):
+    async def search(
+        self,
+        query: str,
+        after: tuple[float, uuid.UUID] | None,
+        limit: int,
+    ) -> list[lead_dto_module.LeadSearchHitDTO]:
+        # Кандидаты — по индексам: GIN по note_tsv (слова заметки) и триграммные GIN по контактам (подстрока).
+        # Ранг: ts_rank_cd по заметке плюс лучшая триграммная похожесть контакта;
+        # keyset по (rank, id) — без OFFSET на глубоких страницах
+        lead_table = models.Lead.__table__
+        config = literal_column(f"'{models.SEARCH_CONFIG}'::regconfig")
+        term = cast(literal(query), Text)
+        tsquery = func.websearch_to_tsquery(config, term)
+        pattern = "%" + _escape_like(query) + "%"
+        contacts = (lead_table.c.email, lead_table.c.phone, lead_table.c.name)
+        rank = (
+            func.ts_rank_cd(lead_table.c.note_tsv, tsquery)
+            + func.coalesce(func.greatest(*(func.similarity(c, term) for c in contacts)), 0)
+        )
+        matches = (
+            select(*_lead_columns(), rank.label("rank"))
+            .where(or_(
+                lead_table.c.note_tsv.op("@@")(tsquery),
+                *(c.ilike(pattern, escape="\\") for c in contacts),
+            ))
+            .subquery("matches")
+        )
+        stmt = select(matches)
+        if after is not None:
+            stmt = stmt.where(
+                tuple_(matches.c.rank, matches.c.id) < tuple_(cast(literal(after[0]), REAL), literal(after[1]))
+            )
+        stmt = stmt.order_by(matches.c.rank.desc(), matches.c.id.desc()).limit(limit)
+        res = await self.session.execute(stmt)
+        return [lead_dto_module.LeadSearchHitDTO(lead=_lead_row_to_entity(row), rank=row.rank) for row in res]
 
-    _NAMESPACE = uuid.NAMESPACE_DNS
+    async def find_by_contacts(
+        self,
+        emails: Sequence[str],
+        phones: Sequence[str],
+    ) -> lead_dto_module.LeadContactMatchesDTO:
+        # Значения уже нормализованы. Один запрос: = ANY($1) по каждому частичному индексу (BitmapOr);
+        # массив — один параметр, поэтому план кешируется независимо от размера пачки
+        matches = lead_dto_module.LeadContactMatchesDTO()
+        lead_table = models.Lead.__table__
+        conditions = []
+        if emails:
+            conditions.append(lead_table.c.email_normalized == any_(literal(list(emails), ARRAY(String))))
+        if phones:
+            conditions.append(lead_table.c.phone_normalized == any_(literal(list(phones), ARRAY(String))))
+        if not conditions:
+            return matches
+        stmt = (
+            select(lead_table.c.id, lead_table.c.email_normalized, lead_table.c.phone_normalized)
+            .where(or_(*conditions))
+            .order_by(lead_table.c.created_at, lead_table.c.id)
+        )
+        wanted_emails, wanted_phones = set(emails), set(phones)
+        for row in await self.session.execute(stmt):
+            if row.email_normalized in wanted_emails:
+                matches.emails.setdefault(row.email_normalized, []).append(row.id)
+            if row.phone_normalized in wanted_phones:
+                matches.phones.setdefault(row.phone_normalized, []).append(row.id)
+        return matches
+
+    async def get_notes(self, lead_ids: Sequence[str]) -> dict[str, str]:
+        # Заметки для claim-check сообщений: одна выборка по PK на пачку, массив — один параметр
+        if not lead_ids:
+            return {}
+        lead_table = models.Lead.__table__
+        ids = list(dict.fromkeys(uuid.UUID(str(i)) for i in lead_ids))
+        stmt = select(lead_table.c.id, lead_table.c.note).where(
+            lead_table.c.id == any_(literal(ids, ARRAY(PG_UUID(as_uuid=True))))
+        )
+        return {str(row.id): row.note for row in await self.session.execute(stmt)}
+
+    async def existing_ids(self, lead_ids: Sequence[str]) -> set[str]:
+        # Только id: проверка не тянет заметки, поиск — по индексу (id, created_at) каждой партиции.
+        # Возвращаются переданные строки; не-UUID лида не найти — его просто нет в результате
+        by_uuid: dict[uuid.UUID, list[str]] = {}
+        for lead_id in lead_ids:
+            try:
+                by_uuid.setdefault(uuid.UUID(str(lead_id)), []).append(lead_id)
+            except ValueError:
+                continue
+        if not by_uuid:
+            return set()
+        lead_table = models.Lead.__table__
+        stmt = select(lead_table.c.id).where(
+            lead_table.c.id == any_(literal(list(by_uuid), ARRAY(PG_UUID(as_uuid=True))))
+        )
+        return {i for found in (await self.session.execute(stmt)).scalars() for i in by_uuid[found]}
+
+    async def stream_with_insights(
+        self,
+        filters: lead_dto_module.LeadExportFilterDTO,
+        chunk_size: int,
+    ) -> AsyncIterator[list[dict]]:
+        lead_table = models.Lead.__table__
+        insight_table = models.Insight.__table__
+        stmt = (
+            select(
+                *_lead_columns(),
+                insight_table.c.id.label("insight_id"),
+                insight_table.c.intent,
+                insight_table.c.priority,
+                insight_table.c.next_action,
+                insight_table.c.confidence,
+                insight_table.c.tags,
+                insight_table.c.content_hash,
+                insight_table.c.created_at.label("insight_created_at"),
+            )
+            .select_from(lead_table.outerjoin(insight_table, insight_table.c.lead_id == lead_table.c.id))
+            .order_by(lead_table.c.created_at, lead_table.c.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        if filters.created_from is not None:
+            stmt = stmt.where(lead_table.c.created_at >= filters.created_from)
+        if filters.created_to is not None:
+            stmt = stmt.where(lead_table.c.created_at < filters.created_to)
+
+        # Серверный курсор: строки приходят порциями по chunk_size, ORM-объекты не строятся.
+        # Строки одного лида идут подряд, поэтому незавершённый лид переносится в следующую порцию.
+        result = await self.session.stream(stmt)
+        current: dict | None = None
+        async for partition in result.partitions():
+            done: list[dict] = []
+            for row in partition:
+                if current is None or current["id"] != row.id:
+                    if current is not None:
+                        done.append(current)
+                    current = {
+                        "id": row.id,
+                        "email": row.email,
+                        "phone": row.phone,
+                        "name": row.name,
+                        "note": row.note,
+                        "source": row.source,
+                        "created_at": row.created_at,
+                        "insights": [],
+                    }
+                if row.insight_id is not None:
+                    current["insights"].append({
+                        "id": row.insight_id,
+                        "intent": _enum_value(row.intent),
+                        "priority": _enum_value(row.priority),
+                        "next_action": _enum_value(row.next_action),
+                        "confidence": row.confidence,
+                        "tags": row.tags,
+                        "content_hash": row.content_hash,
+                        "created_at": row.insight_created_at,
+                    })
+            if done:
+                yield done
+        if current is not None:
+            yield [current]
+
+
+@instrument_methods(REPOSITORY_SECONDS, "KeysRepository")
+class KeysRepository(interfaces.KeysRepository):
 
     def __init__(self, session: common_interfaces.DBSession) -> None:
         self.session: AsyncSession = session
 
     def _normalize_key(self, key: str) -> uuid.UUID:
-        try:
-            return uuid.UUID(key)
-        except ValueError:
-            return uuid.uuid5(self._NAMESPACE, key)
+        return _normalize_key(key)
 
-    async def exists(self, key: str) -> bool:
-        key_uuid = self._normalize_key(key)
-        stmt = select(func.count()).select_from(models.Keys).where(models.Keys.id == key_uuid)
+    async def claim(self, key: str, lead_id: uuid.UUID, response: dict) -> bool:
+        stmt = (
+            pg_insert(models.Keys)
+            .values(id=self._normalize_key(key), lead_id=lead_id, response=response)
+            .on_conflict_do_nothing(index_elements=[models.Keys.id])
+            .returning(models.Keys.id)
+        )
         res = await self.session.execute(stmt)
-        return bool(res.scalar_one())
+        return res.scalar_one_or_none() is not None
+
+    async def claim_many(self, keys: Sequence[str]) -> set[str]:
+        if not keys:
+            return set()
+        by_uuid = {self._normalize_key(k): k for k in keys}
+        stmt = (
+            pg_insert(models.Keys)
+            .values([{"id": key_uuid} for key_uuid in by_uuid])
+            .on_conflict_do_nothing(index_elements=[models.Keys.id])
+            .returning(models.Keys.id)
+        )
+        res = await self.session.execute(stmt)
+        return {by_uuid[key_uuid] for key_uuid in res.scalars()}
+
+    async def store_responses(self, responses: Sequence[tuple[str, uuid.UUID, dict]]) -> None:
+        if not responses:
+            return
+        # Одним UPDATE ... FROM (VALUES ...) для всей пачки
+        values = sa_values(
+            column("key_id", PG_UUID(as_uuid=True)),
+            column("lead_id", PG_UUID(as_uuid=True)),
+            column("response", JSONB),
+            name="v",
+        ).data([(self._normalize_key(k), lead_id, response) for k, lead_id, response in responses])
+        stmt = (
+            update(models.Keys)
+            .where(models.Keys.id == values.c.key_id)
+            .values(lead_id=values.c.lead_id, response=values.c.response)
+        )
+        await self.session.execute(stmt)
+
+    async def get_responses(self, keys: Sequence[str]) -> dict[str, dict | None]:
+        if not keys:
+            return {}
+        by_uuid = {self._normalize_key(k): k for k in keys}
+        stmt = select(models.Keys.id, models.Keys.response).where(models.Keys.id.in_(list(by_uuid)))
+        res = await self.session.execute(stmt)
+        return {by_uuid[row.id]: row.response for row in res}
 
-    async def create(self, key: str) -> None:
-        key_uuid = self._normalize_key(key)
-        self.session.add(models.Keys(id=key_uuid))
-        await self.session.flush()
+    async def purge_expired(self, older_than: datetime, batch_size: int) -> int:
+        expired = (
+            select(models.Keys.id)
+            .where(models.Keys.created_at < older_than)
+            .order_by(models.Keys.created_at)
+            .limit(batch_size)
+            .scalar_subquery()
+        )
+        res = await self.session.execute(delete(models.Keys).where(models.Keys.id.in_(expired)))
+        return res.rowcount
 
 
+@instrument_methods(REPOSITORY_SECONDS, "InsightRepository")
 class InsightRepository(interfaces.InsightRepository):
     def __init__(self, session: common_interfaces.DBSession) -> None:
         self.session: AsyncSession = session
 
-    async def create(self, lead_id: str, insight: entities.InsightEntity | Mapping[str, Any]) -> entities.InsightEntity:
+    def _values(self, lead_id: str, insight: entities.InsightEntity | Mapping[str, Any]) -> dict[str, Any]:
         try:
             lead_uuid = uuid.UUID(lead_id)
         except ValueError:
             raise ValueError("lead_id must be a valid UUID string")
-        
+
         if isinstance(insight, Mapping):
             data = dict(insight)
             try:
@@ -134,7 +513,7 @@ class InsightRepository(interfaces.InsightRepository):
             priority_str = entities.PriorityEnum(priority_val).value if not isinstance(priority_val, entities.PriorityEnum) else priority_val.value
             next_action_str = entities.NextActionEnum(next_action_val).value if not isinstance(next_action_val, entities.NextActionEnum) else next_action_val.value
 
-            model = models.Insight(
+            return dict(
                 lead_id=lead_uuid,
                 intent=intent_str,
                 priority=priority_str,
@@ -143,21 +522,39 @@ class InsightRepository(interfaces.InsightRepository):
                 tags=tags,
                 content_hash=content_hash,
             )
-        else:
-            model = models.Insight(
-                lead_id=lead_uuid,
-                intent=insight.intent.value,
-                priority=insight.priority.value,
-                next_action=insight.next_action.value,
-                confidence=insight.confidence,
-                tags=insight.tags,
-                content_hash=insight.content_hash,
-            )
+        return dict(
+            lead_id=lead_uuid,
+            intent=insight.intent.value,
+            priority=insight.priority.value,
+            next_action=insight.next_action.value,
+            confidence=insight.confidence,
+            tags=insight.tags,
+            content_hash=insight.content_hash,
+        )
 
-        self.session.add(model)
-        await self.session.flush()
-        await self.session.refresh(model)
-        return _insight_model_to_entity(model)
+    async def create(self, lead_id: str, insight: entities.InsightEntity | Mapping[str, Any]) -> entities.InsightEntity:
+        values = self._values(lead_id, insight)
+        values["id"] = uuid.uuid4()
+        insight_table = models.Insight.__table__
+        res = await self.session.execute(insert(insight_table).values(values).returning(*insight_table.c))
+        return _insight_model_to_entity(res.one())
+
+    async def create_many(
+        self, insights: Sequence[tuple[str, entities.InsightEntity | Mapping[str, Any]]]
+    ) -> list[entities.InsightEntity]:
+        if not insights:
+            return []
+        payloads = []
+        for lead_id, insight in insights:
+            values = self._values(lead_id, insight)
+            values["id"] = uuid.uuid4()
+            payloads.append(values)
+
+        insight_table = models.Insight.__table__
+        stmt = insert(insight_table).values(payloads).returning(*insight_table.c)
+        res = await self.session.execute(stmt)
+        by_id = {row.id: row for row in res}
+        return [_insight_model_to_entity(by_id[p["id"]]) for p in payloads]
 
     async def exists(self, lead_id: str, content_hash: str) -> bool:
         try:
@@ -172,10 +569,320 @@ class InsightRepository(interfaces.InsightRepository):
         res = await self.session.execute(stmt)
         return bool(res.scalar_one())
 
+    async def existing_pairs(self, pairs: Sequence[tuple[str, str]]) -> set[tuple[str, str]]:
+        by_key: dict[tuple[uuid.UUID, str], tuple[str, str]] = {}
+        for lead_id, content_hash in pairs:
+            try:
+                by_key[(uuid.UUID(lead_id), content_hash)] = (lead_id, content_hash)
+            except ValueError:
+                continue
+        if not by_key:
+            return set()
+        stmt = (
+            select(models.Insight.lead_id, models.Insight.content_hash)
+            .where(tuple_(models.Insight.lead_id, models.Insight.content_hash).in_(list(by_key)))
+            .distinct()
+        )
+        res = await self.session.execute(stmt)
+        return {by_key[(row.lead_id, row.content_hash)] for row in res}
+
+
+
+def _hour_bucket(ts):
+    # Явная зона: границы часа не зависят от TimeZone сессии
+    return func.date_trunc("hour", ts, "UTC")
+
+def _utc_hour(ts: datetime) -> datetime:
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+@instrument_methods(REPOSITORY_SECONDS, "InsightRollupRepository")
+class InsightRollupRepository(interfaces.InsightRollupRepository):
+    def __init__(self, session: common_interfaces.DBSession) -> None:
+        self.session: AsyncSession = session
+
+    def _upsert(self, condition, new_ids=None):
+        # Агрегат по вставленным инсайтам прибавляется к счётчикам одним INSERT ... ON CONFLICT.
+        # Лид учитывается в leads по своему первому инсайту (created_at, id) — как и при пересчёте.
+        # ORDER BY по ключу: параллельные транзакции блокируют строки сводки в одном порядке, без дедлоков
+        rollup_table = models.InsightRollup.__table__
+        insight = models.Insight.__table__.alias("i")
+        earlier = models.Insight.__table__.alias("p")
+        lead_table = models.Lead.__table__
+        is_first = ~exists().where(
+            earlier.c.lead_id == insight.c.lead_id,
+            tuple_(earlier.c.created_at, earlier.c.id) < tuple_(insight.c.created_at, insight.c.id),
+        )
+        if new_ids is not None:
+            # Прибавка: лид уже учтён, если у него есть любой инсайт вне пачки. Иначе закоммиченный
+            # позже инсайт с более ранним created_at (now() — время начала транзакции) учёл бы лида второй раз
+            other = models.Insight.__table__.alias("o")
+            is_first = and_(is_first, ~exists().where(
+                other.c.lead_id == insight.c.lead_id,
+                other.c.id != all_(new_ids),
+            ))
+        key = (
+            _hour_bucket(insight.c.created_at),
+            func.coalesce(lead_table.c.source, ""),
+            insight.c.intent,
+            insight.c.priority,
+            insight.c.next_action,
+        )
+        aggregate = (
+            select(*key, func.count(), func.count().filter(is_first))
+            .select_from(insight.join(lead_table, lead_table.c.id == insight.c.lead_id))
+            .where(condition(insight))
+            .group_by(*key)
+            .order_by(*key)
+        )
+        stmt = pg_insert(rollup_table).from_select(
+            ["bucket", "source", "intent", "priority", "next_action", "insights", "leads"], aggregate
+        )
+        return stmt.on_conflict_do_update(
+            index_elements=[c for c in rollup_table.primary_key.columns],
+            set_={
+                "insights": rollup_table.c.insights + stmt.excluded.insights,
+                "leads": rollup_table.c.leads + stmt.excluded.leads,
+            },
+        )
+
+    async def apply(self, insight_ids: Sequence[uuid.UUID]) -> None:
+        if not insight_ids:
+            return
+        ids = literal(list(insight_ids), ARRAY(PG_UUID(as_uuid=True)))
+        # Транзакции с инсайтами одного лида прибавляют по очереди: после блокировки следующий запрос
+        # видит закоммиченный инсайт соседа и не учитывает лида повторно. Блокировки берутся
+        # по возрастанию lead_id (функция считается после сортировки) — без дедлоков
+        leads = select(models.Insight.lead_id).where(models.Insight.id == any_(ids)).distinct().subquery()
+        await self.session.execute(
+            select(func.pg_advisory_xact_lock(func.hashtext(cast(leads.c.lead_id, Text))))
+            .order_by(leads.c.lead_id)
+        )
+        await self.session.execute(self._upsert(lambda i: i.c.id == any_(ids), new_ids=ids))
+
+    async def rebuild(self, since: datetime | None) -> int:
+        rollup_table = models.InsightRollup.__table__
+        # Воркеры ждут окончания пересчёта: их прибавки не смешиваются с удалёнными строками
+        await self.session.execute(text("LOCK TABLE insight_rollups IN SHARE ROW EXCLUSIVE MODE"))
+        if since is None:
+            await self.session.execute(delete(rollup_table))
+            res = await self.session.execute(self._upsert(lambda i: literal(True)))
+            return res.rowcount
+        since = _utc_hour(since)
+        await self.session.execute(delete(rollup_table).where(rollup_table.c.bucket >= since))
+        res = await self.session.execute(self._upsert(lambda i: i.c.created_at >= since))
+        return res.rowcount
+
+    async def refresh(self, hours: Sequence[datetime]) -> None:
+        if not hours:
+            return
+        rollup_table = models.InsightRollup.__table__
+        hours = sorted({_utc_hour(h) for h in hours})
+        await self.session.execute(text("LOCK TABLE insight_rollups IN SHARE ROW EXCLUSIVE MODE"))
+        buckets = literal(hours, ARRAY(TIMESTAMP(timezone=True)))
+        await self.session.execute(delete(rollup_table).where(rollup_table.c.bucket == any_(buckets)))
+        # Границы по created_at отсекают лишние партиции, час сверяется уже внутри диапазона
+        await self.session.execute(self._upsert(lambda i: and_(
+            i.c.created_at >= hours[0],
+            i.c.created_at < hours[-1] + timedelta(hours=1),
+            _hour_bucket(i.c.created_at) == any_(buckets),
+        )))
+
+    async def delete_before(self, bound: datetime) -> int:
+        rollup_table = models.InsightRollup.__table__
+        res = await self.session.execute(delete(rollup_table).where(rollup_table.c.bucket < _utc_hour(bound)))
+        return res.rowcount
+
+    async def query(
+        self, filters: lead_dto_module.InsightAnalyticsFilterDTO
+    ) -> list[lead_dto_module.InsightAnalyticsRowDTO]:
+        # Читаются только сводки: строк не больше, чем часов в диапазоне на число сочетаний измерений
+        rollup_table = models.InsightRollup.__table__
+        Dimension = lead_dto_module.InsightAnalyticsDimension
+        columns = {
+            Dimension.HOUR: rollup_table.c.bucket,
+            Dimension.DAY: func.date_trunc("day", rollup_table.c.bucket, "UTC"),
+            Dimension.SOURCE: rollup_table.c.source,
+            Dimension.INTENT: rollup_table.c.intent,
+            Dimension.PRIORITY: rollup_table.c.priority,
+            Dimension.NEXT_ACTION: rollup_table.c.next_action,
+        }
+        group = [columns[d].label(d.value) for d in filters.group_by]
+        stmt = select(
+            *group,
+            func.coalesce(func.sum(rollup_table.c.insights), 0).label("insights"),
+            func.coalesce(func.sum(rollup_table.c.leads), 0).label("leads"),
+        )
+        # Границы выровнены по часу (проверяет интерактор); _utc_hour только задаёт зону наивным датам
+        if filters.created_from is not None:
+            stmt = stmt.where(rollup_table.c.bucket >= _utc_hour(filters.created_from))
+        if filters.created_to is not None:
+            stmt = stmt.where(rollup_table.c.bucket < _utc_hour(filters.created_to))
+        if filters.source is not None:
+            stmt = stmt.where(rollup_table.c.source == filters.source)
+        if group:
+            stmt = stmt.group_by(*group).order_by(*group)
+        rows = []
+        for row in await self.session.execute(stmt):
+            values = row._mapping
+            key = {d.value: _enum_value(values[d.value]) for d in filters.group_by}
+            if Dimension.SOURCE.value in key:
+                key[Dimension.SOURCE.value] = key[Dimension.SOURCE.value] or None
+            rows.append(lead_dto_module.InsightAnalyticsRowDTO(
+                key=key,
+                insights=int(values["insights"]),
+                leads=int(values["leads"]),
+            ))
+        return rows
+
+
+def _month_bound(month: date) -> str:
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+def _next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+@instrument_methods(REPOSITORY_SECONDS, "PartitionRepository")
+class PartitionRepository(interfaces.PartitionRepository):
+    # Имена партиций: <table>_pYYYY_MM — месяц, <table>_until_YYYY_MM — всё до месяца (таблица до секционирования)
+    TABLES = frozenset({models.Lead.__tablename__, models.Insight.__tablename__})
+    _NAME = re.compile(r"^(?P<table>\w+?)_(?P<kind>p|until_)(?P<year>\d{4})_(?P<month>\d{2})$")
+
+    def __init__(self, session: common_interfaces.DBSession) -> None:
+        self.session: AsyncSession = session
+
+    def _table(self, table: str) -> str:
+        # Имя подставляется в DDL: только известные таблицы
+        if table not in self.TABLES:
+            raise ValueError(f"{table} is not a partitioned table")
+        return table
+
+    async def list_partitions(self, table: str) -> list[lead_dto_module.PartitionDTO]:
+        stmt = text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :table AND p.relnamespace = to_regnamespace(current_schema())"
+        )
+        res = await self.session.execute(stmt, {"table": self._table(table)})
+        partitions = []
+        for name in res.scalars():
+            match = self._NAME.match(name)
+            # Партиции с другими именами созданы вручную — не трогаем
+            if match is None or match["table"] != table:
+                continue
+            month = date(int(match["year"]), int(match["month"]), 1)
+            if match["kind"] == "p":
+                partitions.append(lead_dto_module.PartitionDTO(name=name, lower=month, upper=_next_month(month)))
+            else:
+                partitions.append(lead_dto_module.PartitionDTO(name=name, lower=None, upper=month))
+        partitions.sort(key=lambda p: p.upper)
+        return partitions
+
+    async def create_partition(self, table: str, month: date) -> str:
+        table = self._table(table)
+        name = f"{table}_p{month:%Y_%m}"
+        # Партиции создают одновременно несколько процессов: IF NOT EXISTS не защищает от гонки
+        # в каталоге, поэтому создание одной партиции сериализуется до конца транзакции
+        await self.session.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": name})
+        await self.session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+            f"FOR VALUES FROM ({_month_bound(month)}) TO ({_month_bound(_next_month(month))})"
+        ))
+        return name
+
+    async def drop_partition(self, table: str, name: str) -> None:
+        # Отсоединение и DROP TABLE вместо DELETE: без построчного удаления, мёртвых строк и VACUUM
+        table = self._table(table)
+        match = self._NAME.match(name)
+        if match is None or match["table"] != table:
+            raise ValueError(f"{name} is not a partition of {table}")
+        await self.session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        await self.session.execute(text(f"DROP TABLE {name}"))
+
+    async def delete_insights_of_leads(self, name: str) -> int:
+        # Каскада нет (внешний ключ снят при секционировании): инсайт, созданный уже в следующем месяце,
+        # лежит в более новой партиции insights и переживает партицию своего лида. Поиск по ix_insights_lead_id
+        leads = models.Lead.__tablename__
+        match = self._NAME.match(name)
+        if match is None or match["table"] != leads:
+            raise ValueError(f"{name} is not a partition of {leads}")
+        res = await self.session.execute(text(
+            f"DELETE FROM {models.Insight.__tablename__} WHERE lead_id IN (SELECT id FROM {name}) "
+            "RETURNING date_trunc('hour', created_at, 'UTC')"
+        ))
+        return list(res.scalars())
+
+
+@instrument_methods(REPOSITORY_SECONDS, "OutboxRepository")
+class OutboxRepository:
+    def __init__(self, session: common_interfaces.DBSession) -> None:
+        self.session: AsyncSession = session
+
+    def add_many(self, routing_key: str, payloads: Sequence[dict]) -> None:
+        # Без IO: строки уйдут в БД при flush/commit вместе с остальной транзакцией
+        self.session.add_all([models.Outbox(routing_key=routing_key, payload=p) for p in payloads])
+
+    async def lock_batch(self, limit: int) -> list[Any]:
+        stmt = (
+            select(models.Outbox.id, models.Outbox.routing_key, models.Outbox.payload)
+            .order_by(models.Outbox.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        res = await self.session.execute(stmt)
+        return list(res)
+
+    async def delete(self, ids: Sequence[int]) -> None:
+        if ids:
+            await self.session.execute(delete(models.Outbox).where(models.Outbox.id.in_(ids)))
+
+
+@instrument_methods(REPOSITORY_SECONDS, "InsightMemoRepository")
+class InsightMemoRepository:
+    def __init__(self, session: common_interfaces.DBSession) -> None:
+        self.session: AsyncSession = session
+
+    async def get_many(self, version: str, content_hashes: Sequence[str]) -> dict[str, dict]:
+        if not content_hashes:
+            return {}
+        stmt = select(models.InsightMemo.content_hash, models.InsightMemo.result).where(
+            models.InsightMemo.generator_version == version,
+            models.InsightMemo.content_hash.in_(list(content_hashes)),
+        )
+        res = await self.session.execute(stmt)
+        return {row.content_hash: row.result for row in res}
+
+    async def put_many(self, version: str, results: Mapping[str, dict]) -> None:
+        if not results:
+            return
+        # Параллельный воркер мог сохранить тот же хэш — результат детерминирован, оставляем первый
+        stmt = (
+            pg_insert(models.InsightMemo)
+            .values([
+                {"content_hash": h, "generator_version": version, "result": r}
+                for h, r in results.items()
+            ])
+            .on_conflict_do_nothing(index_elements=[models.InsightMemo.content_hash, models.InsightMemo.generator_version])
+        )
+        await self.session.execute(stmt)
+
+    async def delete_other_versions(self, version: str) -> int:
+        res = await self.session.execute(
+            delete(models.InsightMemo).where(models.InsightMemo.generator_version != version)
+        )
+        return res.rowcount
 
 
 __all__: Sequence[str] = [
     "LeadRepository",
     "InsightRepository",
+    "InsightRollupRepository",
+    "PartitionRepository",
     "KeysRepository",
+    "OutboxRepository",
+    "InsightMemoRepository",
 ]
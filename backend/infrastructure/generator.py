@@ -1,15 +1,215 @@
+import re
+from functools import lru_cache
+from typing import Sequence
+import numpy as np
 from application.lead.interfaces import InsightGenerator
-import random
+
+# Версия правил: меняется при любой правке словаря или порогов (по ней инвалидируются сохранённые результаты)
+GENERATOR_VERSION = "rules-v1"
+
+INTENTS = ("buy", "support", "spam", "job", "other")
+PRIORITIES = ("P0", "P1", "P2", "P3")
+
+# Основа слова -> (веса по INTENTS, тег). Основы сопоставляются с началом токена,
+# поэтому "куп" покрывает "купить", "куплю", "покупка" не покрывает — для неё своя основа.
+_VOCABULARY: dict[str, tuple[tuple[float, float, float, float, float], str | None]] = {
+    # buy
+    "куп": ((2.0, 0.0, 0.0, 0.0, 0.0), "purchase"),
+    "покуп": ((2.0, 0.0, 0.0, 0.0, 0.0), "purchase"),
+    "заказ": ((1.8, 0.4, 0.0, 0.0, 0.0), "purchase"),
+    "цена": ((1.5, 0.0, 0.0, 0.0, 0.0), "pricing"),
+    "цену": ((1.5, 0.0, 0.0, 0.0, 0.0), "pricing"),
+    "цены": ((1.5, 0.0, 0.0, 0.0, 0.0), "pricing"),
+    "ценник": ((1.5, 0.0, 0.0, 0.0, 0.0), "pricing"),
+    "стоимост": ((1.5, 0.0, 0.0, 0.0, 0.0), "pricing"),
+    "прайс": ((1.5, 0.0, 0.0, 0.0, 0.0), "pricing"),
+    "сколько": ((0.8, 0.0, 0.0, 0.0, 0.0), "pricing"),
+    "счет": ((1.2, 0.3, 0.0, 0.0, 0.0), "invoice"),
+    "счёт": ((1.2, 0.3, 0.0, 0.0, 0.0), "invoice"),
+    "оплат": ((1.0, 0.6, 0.0, 0.0, 0.0), "payment"),
+    "коммерческ": ((1.6, 0.0, 0.0, 0.0, 0.0), "proposal"),
+    "кп": ((1.4, 0.0, 0.0, 0.0, 0.0), "proposal"),
+    "оптом": ((1.4, 0.0, 0.0, 0.0, 0.0), "wholesale"),
+    "оптов": ((1.4, 0.0, 0.0, 0.0, 0.0), "wholesale"),
+    "достав": ((0.8, 0.6, 0.0, 0.0, 0.0), "delivery"),
+    "тариф": ((1.2, 0.2, 0.0, 0.0, 0.0), "pricing"),
+    "демо": ((1.3, 0.0, 0.0, 0.0, 0.0), "demo"),
+    "buy": ((2.0, 0.0, 0.0, 0.0, 0.0), "purchase"),
+    "purchas": ((2.0, 0.0, 0.0, 0.0, 0.0), "purchase"),
+    "order": ((1.8, 0.4, 0.0, 0.0, 0.0), "purchase"),
+    "price": ((1.5, 0.0, 0.0, 0.0, 0.0), "pricing"),
+    "pricing": ((1.5, 0.0, 0.0, 0.0, 0.0), "pricing"),
+    "quote": ((1.6, 0.0, 0.0, 0.0, 0.0), "proposal"),
+    "invoice": ((1.2, 0.3, 0.0, 0.0, 0.0), "invoice"),
+    "demo": ((1.3, 0.0, 0.0, 0.0, 0.0), "demo"),
+    "trial": ((1.0, 0.0, 0.0, 0.0, 0.0), "demo"),
+    # support
+    "не работ": ((0.0, 2.2, 0.0, 0.0, 0.0), "issue"),
+    "ошибк": ((0.0, 2.0, 0.0, 0.0, 0.0), "issue"),
+    "сломал": ((0.0, 2.0, 0.0, 0.0, 0.0), "issue"),
+    "проблем": ((0.0, 1.8, 0.0, 0.0, 0.0), "issue"),
+    "помог": ((0.0, 1.2, 0.0, 0.0, 0.0), None),
+    "помощ": ((0.0, 1.2, 0.0, 0.0, 0.0), None),
+    "поддержк": ((0.0, 1.6, 0.0, 0.0, 0.0), None),
+    "возврат": ((0.0, 1.8, 0.0, 0.0, 0.0), "refund"),
+    "вернуть": ((0.0, 1.4, 0.0, 0.0, 0.0), "refund"),
+    "гарант": ((0.0, 1.4, 0.0, 0.0, 0.0), "warranty"),
+    "жалоб": ((0.0, 1.8, 0.0, 0.0, 0.0), "complaint"),
+    "доступ": ((0.0, 1.2, 0.0, 0.0, 0.0), "access"),
+    "парол": ((0.0, 1.5, 0.0, 0.0, 0.0), "access"),
+    "error": ((0.0, 2.0, 0.0, 0.0, 0.0), "issue"),
+    "bug": ((0.0, 2.0, 0.0, 0.0, 0.0), "issue"),
+    "broken": ((0.0, 2.0, 0.0, 0.0, 0.0), "issue"),
+    "issue": ((0.0, 1.6, 0.0, 0.0, 0.0), "issue"),
+    "help": ((0.0, 1.2, 0.0, 0.0, 0.0), None),
+    "support": ((0.0, 1.6, 0.0, 0.0, 0.0), None),
+    "refund": ((0.0, 1.8, 0.0, 0.0, 0.0), "refund"),
+    "password": ((0.0, 1.5, 0.0, 0.0, 0.0), "access"),
+    "login": ((0.0, 1.2, 0.0, 0.0, 0.0), "access"),
+    # spam
+    "казино": ((0.0, 0.0, 3.0, 0.0, 0.0), "spam"),
+    "выигр": ((0.0, 0.0, 2.2, 0.0, 0.0), "spam"),
+    "бесплатн": ((0.0, 0.0, 1.0, 0.0, 0.0), None),
+    "кредит": ((0.0, 0.0, 1.4, 0.0, 0.0), "spam"),
+    "заработ": ((0.0, 0.0, 1.6, 0.4, 0.0), "spam"),
+    "крипт": ((0.0, 0.0, 1.8, 0.0, 0.0), "spam"),
+    "раскрут": ((0.0, 0.0, 1.8, 0.0, 0.0), "spam"),
+    "продвижен": ((0.0, 0.0, 1.4, 0.0, 0.0), "spam"),
+    "рассылк": ((0.0, 0.0, 1.2, 0.0, 0.0), "spam"),
+    "casino": ((0.0, 0.0, 3.0, 0.0, 0.0), "spam"),
+    "viagra": ((0.0, 0.0, 3.0, 0.0, 0.0), "spam"),
+    "lottery": ((0.0, 0.0, 2.5, 0.0, 0.0), "spam"),
+    "winner": ((0.0, 0.0, 2.0, 0.0, 0.0), "spam"),
+    "crypto": ((0.0, 0.0, 1.8, 0.0, 0.0), "spam"),
+    "seo": ((0.0, 0.0, 1.6, 0.0, 0.0), "spam"),
+    "unsubscrib": ((0.0, 0.0, 1.2, 0.0, 0.0), "spam"),
+    "http": ((0.0, 0.0, 0.8, 0.0, 0.0), "link"),
+    # job
+    "ваканс": ((0.0, 0.0, 0.0, 2.5, 0.0), "hiring"),
+    "резюме": ((0.0, 0.0, 0.0, 2.5, 0.0), "hiring"),
+    "работ": ((0.0, 0.0, 0.0, 1.0, 0.0), None),
+    "стажир": ((0.0, 0.0, 0.0, 2.0, 0.0), "hiring"),
+    "собеседован": ((0.0, 0.0, 0.0, 2.2, 0.0), "hiring"),
+    "трудоустр": ((0.0, 0.0, 0.0, 2.2, 0.0), "hiring"),
+    "зарплат": ((0.0, 0.0, 0.0, 1.6, 0.0), "hiring"),
+    "vacanc": ((0.0, 0.0, 0.0, 2.5, 0.0), "hiring"),
+    "resume": ((0.0, 0.0, 0.0, 2.5, 0.0), "hiring"),
+    "cv": ((0.0, 0.0, 0.0, 2.0, 0.0), "hiring"),
+    "hiring": ((0.0, 0.0, 0.0, 2.2, 0.0), "hiring"),
+    "job": ((0.0, 0.0, 0.0, 2.0, 0.0), "hiring"),
+    "career": ((0.0, 0.0, 0.0, 2.0, 0.0), "hiring"),
+    "internship": ((0.0, 0.0, 0.0, 2.0, 0.0), "hiring"),
+    "salary": ((0.0, 0.0, 0.0, 1.6, 0.0), "hiring"),
+    # срочность — влияет только на приоритет
+    "срочно": ((0.0, 0.0, 0.0, 0.0, 0.0), "urgent"),
+    "сегодня": ((0.0, 0.0, 0.0, 0.0, 0.0), "urgent"),
+    "немедленн": ((0.0, 0.0, 0.0, 0.0, 0.0), "urgent"),
+    "asap": ((0.0, 0.0, 0.0, 0.0, 0.0), "urgent"),
+    "urgent": ((0.0, 0.0, 0.0, 0.0, 0.0), "urgent"),
+    "today": ((0.0, 0.0, 0.0, 0.0, 0.0), "urgent"),
+    "immediately": ((0.0, 0.0, 0.0, 0.0, 0.0), "urgent"),
+}
+_URGENT_TAG = "urgent"
+# Базовый счёт "other": заметка без сигналов классифицируется как other
+_BIAS = np.array([0.0, 0.0, 0.0, 0.0, 0.6], dtype=np.float32)
+# Температура softmax: чем меньше, тем увереннее классификатор при одном и том же перевесе
+_TEMPERATURE = 1.0
+_MIN_STEM = 2
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class _CompiledVocabulary:
+    """Словарь, скомпилированный в матрицы: веса (V x intents), срочность (V) и теги."""
+    def __init__(self, vocabulary: dict) -> None:
+        phrases = {stem: i for i, stem in enumerate(vocabulary) if " " in stem}
+        self.stems = {stem: i for i, stem in enumerate(vocabulary) if " " not in stem}
+        self.phrases = [(stem, i) for stem, i in phrases.items()]
+        self.max_stem = max(len(s) for s in self.stems)
+        self.weights = np.array([w for w, _ in vocabulary.values()], dtype=np.float32)
+        self.urgency = np.array([tag == _URGENT_TAG for _, tag in vocabulary.values()], dtype=np.float32)
+        tags = [tag for _, tag in vocabulary.values()]
+        self.tag_names = sorted({t for t in tags if t})
+        self.tags = np.zeros((len(vocabulary), len(self.tag_names)), dtype=np.bool_)
+        for i, tag in enumerate(tags):
+            if tag:
+                self.tags[i, self.tag_names.index(tag)] = True
+        self.size = len(vocabulary)
+
+    @lru_cache(maxsize=65536)
+    def term_of(self, token: str) -> int:
+        # Самая длинная основа словаря, с которой начинается токен; -1 — токен не из словаря
+        for length in range(min(len(token), self.max_stem), _MIN_STEM - 1, -1):
+            idx = self.stems.get(token[:length])
+            if idx is not None:
+                return idx
+        return -1
+
+
+_VOCAB = _CompiledVocabulary(_VOCABULARY)
+
+
+def _term_counts(contents: Sequence[str]) -> np.ndarray:
+    counts = np.zeros((len(contents), _VOCAB.size), dtype=np.float32)
+    for row, content in enumerate(contents):
+        text = content.lower()
+        for token in _TOKEN_RE.findall(text):
+            idx = _VOCAB.term_of(token)
+            if idx >= 0:
+                counts[row, idx] += 1.0
+        for phrase, idx in _VOCAB.phrases:
+            if phrase in text:
+                counts[row, idx] += 1.0
+    return counts
+
 
 class InsightGenerator(InsightGenerator):
+    """
+    Детерминированный классификатор заметок по взвешенному словарю.
+    Пачка заметок превращается в матрицу частот основ (N x V) и умножается на матрицу весов (V x intents);
+    intent — argmax, confidence — softmax-вероятность победившего класса.
+    priority и next_action выводятся из intent, срочности и уверенности, tags — из совпавших основ.
+    """
+    version = GENERATOR_VERSION
+
     def gen(self, content: str) -> dict:
-        intents = ["buy", "support", "spam", "job", "other"]
-        priorities = ["P0", "P1", "P2", "P3"]
-        actions = ["call", "email", "ignore", "qualify"]
-        return {
-            "intent": random.choice(intents),
-            "priority": random.choice(priorities),
-            "next_action": random.choice(actions),
-            "confidence": round(random.random(), 3),
-            "tags": ["auto"],
-        }
\ No newline at end of file
+        return self.gen_many([content])[0]
+
+    def gen_many(self, contents: Sequence[str]) -> list[dict]:
+        if not contents:
+            return []
+        counts = _term_counts(contents)
+        # Логарифм частоты: десятый повтор слова не должен перевешивать два разных сигнала
+        features = np.log1p(counts)
+        scores = features @ _VOCAB.weights + _BIAS
+        intent_idx = scores.argmax(axis=1)
+
+        scaled = scores / _TEMPERATURE
+        scaled -= scaled.max(axis=1, keepdims=True)
+        probs = np.exp(scaled)
+        probs /= probs.sum(axis=1, keepdims=True)
+        confidence = probs[np.arange(len(contents)), intent_idx]
+
+        urgent = (counts @ _VOCAB.urgency) > 0
+        buy, support, spam, job = (intent_idx == i for i in range(4))
+        priority_idx = np.select(
+            [buy & urgent, buy | (support & urgent), support, spam | job],
+            [0, 1, 2, 3],
+            default=2,
+        )
+        next_action = np.select(
+            [buy & (confidence >= 0.5), buy, support, spam, job],
+            ["call", "qualify", "email", "ignore", "email"],
+            default="qualify",
+        )
+        matched_tags = (counts > 0) @ _VOCAB.tags
+
+        return [
+            {
+                "intent": INTENTS[intent_idx[i]],
+                "priority": PRIORITIES[priority_idx[i]],
+                "next_action": str(next_action[i]),
+                "confidence": round(float(confidence[i]), 3),
+                "tags": [_VOCAB.tag_names[t] for t in np.flatnonzero(matched_tags[i])],
+            }
+            for i in range(len(contents))
+        ]
@@ -0,0 +1,141 @@
+import asyncio
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Sequence
+from application.lead import interfaces
+from infrastructure.generator import GENERATOR_VERSION, InsightGenerator
+
+# Классификатор процесса-исполнителя: создаётся один раз в initializer, а не на каждую задачу
+_process_generator: InsightGenerator | None = None
+
+
+def _init_process() -> None:
+    global _process_generator
+    _process_generator = InsightGenerator()
+
+
+def _gen_chunk(contents: list[str]) -> tuple[list[dict], float]:
+    assert _process_generator is not None
+    started = time.perf_counter()
+    results = _process_generator.gen_many(contents)
+    return results, time.perf_counter() - started
+
+
+class GeneratorTimingStats:
+    """Время ожидания (очередь + передача между процессами) и время вычисления по задачам."""
+    __slots__ = (
+        "tasks", "items", "in_flight",
+        "queue_wait_seconds_total", "queue_wait_seconds_max",
+        "compute_seconds_total", "compute_seconds_max",
+    )
+
+    def __init__(self) -> None:
+        self.tasks = 0
+        self.items = 0
+        self.in_flight = 0
+        self.queue_wait_seconds_total = 0.0
+        self.queue_wait_seconds_max = 0.0
+        self.compute_seconds_total = 0.0
+        self.compute_seconds_max = 0.0
+
+    def observe(self, items: int, wait: float, compute: float) -> None:
+        self.tasks += 1
+        self.items += items
+        self.queue_wait_seconds_total += wait
+        self.queue_wait_seconds_max = max(self.queue_wait_seconds_max, wait)
+        self.compute_seconds_total += compute
+        self.compute_seconds_max = max(self.compute_seconds_max, compute)
+
+    def as_dict(self) -> dict:
+        return {
+            "tasks": self.tasks,
+            "items": self.items,
+            "in_flight": self.in_flight,
+            "queue_wait_seconds_total": round(self.queue_wait_seconds_total, 6),
+            "queue_wait_seconds_max": round(self.queue_wait_seconds_max, 6),
+            "compute_seconds_total": round(self.compute_seconds_total, 6),
+            "compute_seconds_max": round(self.compute_seconds_max, 6),
+        }
+
+
+class InlineInsightGenerator(interfaces.AsyncInsightGenerator):
+    """Классификатор в цикле событий: для тестов и процессов без пула."""
+    def __init__(self, generator: interfaces.InsightGenerator) -> None:
+        self._generator = generator
+        self.version: str = getattr(generator, "version", GENERATOR_VERSION)
+        self.timing = GeneratorTimingStats()
+
+    async def gen(self, content: str) -> dict:
+        return (await self.gen_many([content]))[0]
+
+    async def gen_many(self, contents: Sequence[str]) -> list[dict]:
+        started = time.perf_counter()
+        results = self._generator.gen_many(contents)
+        self.timing.observe(len(contents), 0.0, time.perf_counter() - started)
+        return results
+
+    def stats(self) -> dict:
+        return {"mode": "inline", **self.timing.as_dict()}
+
+    def close(self) -> None:
+        pass
+
+
+class ProcessPoolInsightGenerator(interfaces.AsyncInsightGenerator):
+    """
+    Классификатор в пуле процессов: цикл событий воркера не блокируется на вычислениях.
+    Пачка делится на куски (не меньше min_chunk заметок) по числу процессов и считается параллельно.
+    Одновременно в пуле не больше max_queue кусков; остальные вызовы ждут (backpressure),
+    и это ожидание входит в queue_wait вместе с передачей данных между процессами.
+    """
+    def __init__(self, processes: int, max_queue: int = 64, min_chunk: int = 256) -> None:
+        self._processes = max(1, processes)
+        self.version = GENERATOR_VERSION
+        self._executor = ProcessPoolExecutor(max_workers=self._processes, initializer=_init_process)
+        self._max_queue = max(1, max_queue)
+        self._min_chunk = max(1, min_chunk)
+        self._slots: asyncio.Semaphore | None = None
+        self.timing = GeneratorTimingStats()
+
+    def _chunks(self, contents: list[str]) -> list[list[str]]:
+        size = max(self._min_chunk, math.ceil(len(contents) / self._processes))
+        return [contents[i:i + size] for i in range(0, len(contents), size)]
+
+    async def _run_chunk(self, chunk: list[str]) -> list[dict]:
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._max_queue)
+        submitted = time.perf_counter()
+        async with self._slots:
+            self.timing.in_flight += 1
+            try:
+                loop = asyncio.get_running_loop()
+                results, compute = await loop.run_in_executor(self._executor, _gen_chunk, chunk)
+            finally:
+                self.timing.in_flight -= 1
+        total = time.perf_counter() - submitted
+        self.timing.observe(len(chunk), max(0.0, total - compute), compute)
+        return results
+
+    async def gen(self, content: str) -> dict:
+        return (await self.gen_many([content]))[0]
+
+    async def gen_many(self, contents: Sequence[str]) -> list[dict]:
+        if not contents:
+            return []
+        parts = await asyncio.gather(*(self._run_chunk(c) for c in self._chunks(list(contents))))
+        return [result for part in parts for result in part]
+
+    def stats(self) -> dict:
+        return {
+            "mode": "process_pool",
+            "processes": self._processes,
+            "max_queue": self._max_queue,
+            **self.timing.as_dict(),
+        }
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+__all__ = ["InlineInsightGenerator", "ProcessPoolInsightGenerator", "GeneratorTimingStats"]
@@ -0,0 +1,72 @@
+import copy
+from typing import Sequence
+from application.lead import interfaces
+from infrastructure.cache import LRUCache
+from infrastructure.db.repositories import InsightMemoRepository
+
+
+class InsightMemoCache:
+    """
+    Внутрипроцессный уровень memo (общий для всех сообщений воркера) и счётчики попаданий.
+    Ключ — (версия генератора, content_hash): после смены версии старые записи просто перестают находиться.
+    """
+    def __init__(self, max_size: int = 50_000, ttl_seconds: float = 3600.0) -> None:
+        self.local = LRUCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.local_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+
+    def stats(self) -> dict:
+        lookups = self.local_hits + self.db_hits + self.misses
+        return {
+            "local_hits": self.local_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.local_hits + self.db_hits) / lookups, 4) if lookups else 0.0,
+            "local_hit_ratio": round(self.local_hits / lookups, 4) if lookups else 0.0,
+            "local": self.local.stats(),
+        }
+
+
+class InsightMemo(interfaces.InsightMemo):
+    """
+    Memo результатов классификатора: сначала LRU процесса, затем таблица insight_memo.
+    Записи в таблицу идут в транзакции интерактора и фиксируются вместе с инсайтами.
+    Наружу отдаются копии: интерактор дополняет результат своими полями.
+    """
+    def __init__(self, cache: InsightMemoCache, repo: InsightMemoRepository) -> None:
+        self._cache = cache
+        self._repo = repo
+
+    async def get_many(self, version: str, content_hashes: Sequence[str]) -> dict[str, dict]:
+        found: dict[str, dict] = {}
+        missing: list[str] = []
+        for content_hash in dict.fromkeys(content_hashes):
+            result = self._cache.local.get((version, content_hash))
+            if result is None:
+                missing.append(content_hash)
+            else:
+                found[content_hash] = result
+        self._cache.local_hits += len(found)
+        if missing:
+            stored = await self._repo.get_many(version, missing)
+            for content_hash, result in stored.items():
+                self._cache.local.set((version, content_hash), result)
+                found[content_hash] = result
+            self._cache.db_hits += len(stored)
+            self._cache.misses += len(missing) - len(stored)
+        return {h: copy.deepcopy(r) for h, r in found.items()}
+
+    async def put_many(self, version: str, results: dict[str, dict]) -> None:
+        if not results:
+            return
+        clean = {h: copy.deepcopy(r) for h, r in results.items()}
+        for content_hash, result in clean.items():
+            self._cache.local.set((version, content_hash), result)
+        await self._repo.put_many(version, clean)
+
+    async def purge_stale(self, version: str) -> int:
+        return await self._repo.delete_other_versions(version)
+
+
+__all__ = ["InsightMemoCache", "InsightMemo"]
@@ -0,0 +1,126 @@
+import zlib
+from dataclasses import dataclass
+from typing import Any, Optional, Protocol
+import orjson
+
+try:
+    import msgpack
+except ImportError:  # необязательная зависимость: `poetry install -E msgpack`
+    msgpack = None
+
+
+class UnsupportedMessageFormat(ValueError):
+    """Неизвестный content_type или content_encoding сообщения."""
+
+
+class MessageCodec(Protocol):
+    content_type: str
+
+    def dumps(self, message: Any) -> bytes:
+        ...
+
+    def loads(self, body: bytes) -> Any:
+        ...
+
+
+def _default(value: Any) -> Any:
+    # Как default=str у json.dumps: UUID и datetime orjson сериализует сам, остальное — строкой
+    return str(value)
+
+
+class JsonCodec:
+    content_type = "application/json"
+
+    def dumps(self, message: Any) -> bytes:
+        return orjson.dumps(message, default=_default)
+
+    def loads(self, body: bytes) -> Any:
+        return orjson.loads(body)
+
+
+class MsgpackCodec:
+    """Двоичный формат: компактнее JSON на числах и коротких строках; UUID и datetime уходят строками."""
+    content_type = "application/msgpack"
+
+    def __init__(self) -> None:
+        if msgpack is None:
+            raise UnsupportedMessageFormat("msgpack codec requires the 'msgpack' package")
+
+    def dumps(self, message: Any) -> bytes:
+        return msgpack.packb(message, default=_default, use_bin_type=True)
+
+    def loads(self, body: bytes) -> Any:
+        return msgpack.unpackb(body, raw=False)
+
+
+CODECS: dict[str, type] = {"json": JsonCodec, "msgpack": MsgpackCodec}
+# Сообщения без content_type публиковались прежним кодом как JSON
+_DECODERS: dict[Optional[str], type] = {
+    None: JsonCodec,
+    "": JsonCodec,
+    JsonCodec.content_type: JsonCodec,
+    MsgpackCodec.content_type: MsgpackCodec,
+    "application/x-msgpack": MsgpackCodec,
+}
+DEFLATE = "deflate"
+
+
+@dataclass(slots=True)
+class EncodedMessage:
+    body: bytes
+    content_type: str
+    content_encoding: Optional[str] = None
+
+
+class MessageSerializer:
+    """
+    Кодирует сообщения для публикации: формат задаётся codec ('json' | 'msgpack'),
+    тело длиннее compress_threshold байт сжимается zlib (content_encoding 'deflate').
+    Сжатие оставляется, только если оно действительно уменьшило тело. Уровень 1 по умолчанию:
+    на заметках в десятки КБ он в разы быстрее уровня 6 при проигрыше в размере около 20%.
+    compress_threshold=0 — не сжимать.
+    """
+    def __init__(self, codec: str = "json", *, compress_threshold: int = 1024, compress_level: int = 1) -> None:
+        try:
+            self._codec: MessageCodec = CODECS[codec]()
+        except KeyError:
+            raise UnsupportedMessageFormat(f"unknown message codec {codec!r}") from None
+        self._compress_threshold = compress_threshold
+        self._compress_level = compress_level
+
+    def encode(self, message: Any) -> EncodedMessage:
+        body = self._codec.dumps(message)
+        if self._compress_threshold and len(body) > self._compress_threshold:
+            compressed = zlib.compress(body, self._compress_level)
+            if len(compressed) < len(body):
+                return EncodedMessage(compressed, self._codec.content_type, DEFLATE)
+        return EncodedMessage(body, self._codec.content_type)
+
+
+_decoder_cache: dict[type, MessageCodec] = {}
+
+
+def decode_message(body: bytes, content_type: Optional[str] = None, content_encoding: Optional[str] = None) -> Any:
+    """Разбирает тело по заголовкам сообщения; старые сообщения (JSON без заголовков) тоже."""
+    if content_encoding == DEFLATE:
+        body = zlib.decompress(body)
+    elif content_encoding:
+        raise UnsupportedMessageFormat(f"unsupported content encoding {content_encoding!r}")
+    codec_type = _DECODERS.get(content_type)
+    if codec_type is None:
+        raise UnsupportedMessageFormat(f"unsupported content type {content_type!r}")
+    codec = _decoder_cache.get(codec_type)
+    if codec is None:
+        codec = _decoder_cache[codec_type] = codec_type()
+    return codec.loads(body)
+
+
+__all__ = [
+    "MessageCodec",
+    "JsonCodec",
+    "MsgpackCodec",
+    "MessageSerializer",
+    "EncodedMessage",
+    "UnsupportedMessageFormat",
+    "decode_message",
+]
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Protocol, Sequence
+from uuid import UUID
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from application.lead import interfaces
+from application import common_interfaces
+from infrastructure.db.repositories import OutboxRepository
+
+logger = logging.getLogger(__name__)
+
+
+def _jsonable(message: dict) -> dict:
+    return {
+        k: str(v) if isinstance(v, UUID) else v.isoformat() if isinstance(v, datetime) else v
+        for k, v in message.items()
+    }
+
+
+class OutboxMessageBroker(interfaces.MessageBroker):
+    """
+    MessageBroker для HTTP-пути: событие записывается в таблицу outbox той же сессией,
+    что и лид, и фиксируется тем же commit. HTTP-запрос не ждёт RabbitMQ и ничего
+    не буферизует в памяти процесса; доставку выполняет OutboxRelay.
+    """
+    def __init__(self, session: common_interfaces.DBSession, routing_key: str = "lead.created") -> None:
+        self._outbox = OutboxRepository(session)
+        self._routing_key = routing_key
+
+    def publish(self, message: dict) -> None:
+        self._outbox.add_many(self._routing_key, [_jsonable(message)])
+
+    def publish_many(self, messages: Sequence[dict]) -> None:
+        if messages:
+            self._outbox.add_many(self._routing_key, [_jsonable(m) for m in messages])
+
+
+class ClaimCheckMessageBroker(interfaces.MessageBroker):
+    """
+    Claim-check для lead.created: в сообщении только ссылка на лида (lead_id, content_hash, occurred_at),
+    заметку воркер читает из leads одним запросом на пачку. Размер сообщения не зависит
+    от длины заметки — очередь под нагрузкой не раздувает память и диск брокера.
+    """
+    FIELDS = ("lead_id", "content_hash", "occurred_at")
+
+    def __init__(self, broker: interfaces.MessageBroker) -> None:
+        self._broker = broker
+
+    def _claim(self, message: dict) -> dict:
+        return {k: message[k] for k in self.FIELDS if k in message}
+
+    def publish(self, message: dict) -> None:
+        self._broker.publish(self._claim(message))
+
+    def publish_many(self, messages: Sequence[dict]) -> None:
+        self._broker.publish_many([self._claim(m) for m in messages])
+
+
+class ConfirmingPublisher(Protocol):
+    async def publish_and_confirm(self, messages: Sequence[dict], routing_key: str | None = None) -> None:
+        ...
+
+
+class OutboxRelay:
+    """
+    Переносит события из outbox в RabbitMQ.
+    Пачка строк блокируется SELECT ... FOR UPDATE SKIP LOCKED, публикуется с подтверждениями
+    брокера и удаляется в той же транзакции. Несколько relay-процессов не мешают друг другу;
+    при сбое публикации транзакция откатывается и пачка будет отправлена повторно
+    (доставка at-least-once, воркер дедуплицирует по (lead_id, content_hash)).
+    """
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        publisher: ConfirmingPublisher,
+        *,
+        batch_size: int = 500,
+        poll_interval: float = 0.2,
+    ) -> None:
+        self._session_maker = session_maker
+        self._publisher = publisher
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._stopping = asyncio.Event()
+
+    async def drain_once(self) -> int:
+        async with self._session_maker() as session:
+            outbox = OutboxRepository(session)
+            rows = await outbox.lock_batch(self._batch_size)
+            if not rows:
+                await session.rollback()
+                return 0
+            by_key: dict[str, list[Any]] = {}
+            for row in rows:
+                by_key.setdefault(row.routing_key, []).append(row.payload)
+            for routing_key, payloads in by_key.items():
+                await self._publisher.publish_and_confirm(payloads, routing_key=routing_key)
+            await outbox.delete([row.id for row in rows])
+            await session.commit()
+            return len(rows)
+
+    async def run(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                relayed = await self.drain_once()
+            except Exception:
+                logger.exception("outbox relay: batch failed, will retry")
+                relayed = 0
+            if relayed < self._batch_size:
+                # Очередь разобрана — ждём новых строк, но просыпаемся сразу по stop()
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self._poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+
+__all__ = ["OutboxMessageBroker", "ClaimCheckMessageBroker", "OutboxRelay"]
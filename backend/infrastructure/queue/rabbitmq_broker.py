@@ -1,11 +1,40 @@
 
 
 import asyncio
-import json
-from typing import Optional
+import logging
+import time
+from typing import Optional, Sequence
 import aio_pika
 from aio_pika import ExchangeType
 from application.lead import interfaces
+from infrastructure.queue.codec import MessageSerializer
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+PUBLISH_SECONDS = REGISTRY.histogram(
+    "crm_rabbitmq_publish_seconds",
+    "Publish latency until broker confirm",
+    ["routing_key", "outcome"],
+)
+PUBLISH_QUEUE_REJECTED = REGISTRY.counter(
+    "crm_rabbitmq_publish_rejected", "Messages rejected because the pending queue is full"
+)
+
+
+class PublisherOverloadedError(RuntimeError):
+    """Очередь неотправленных сообщений переполнена: RabbitMQ не успевает подтверждать публикации."""
+
+
+class _ChannelSlot:
+    __slots__ = ("channel", "exchange", "in_flight", "published")
+
+    def __init__(self, channel: aio_pika.abc.AbstractChannel, exchange: aio_pika.abc.AbstractExchange) -> None:
+        self.channel = channel
+        self.exchange = exchange
+        self.in_flight = 0
+        self.published = 0
+
 
 class RabbitMQMessageBroker(interfaces.MessageBroker):
     """
@@ -13,63 +42,191 @@ class RabbitMQMessageBroker(interfaces.MessageBroker):
     DI передаёт уже установленное aio_pika.RobustConnection.
     Аргументы:
         connection: готовое RobustConnection
-        exchange: имя exchange (по умолчанию 'leads')
         routing_key: routing key (по умолчанию 'lead.created')
-        exchange_type: тип (по умолчанию ExchangeType.TOPIC)
-    publish(dict) — fire-and-forget (фоновая задача).
+        channel_pool_size: сколько каналов с publisher confirms открыть
+        max_in_flight: сколько публикаций может ждать подтверждения одновременно (на все каналы)
+        max_pending: сколько сообщений publish()/publish_many() может ждать отправки
+        serializer: формат и сжатие тела (по умолчанию JSON, сжатие больше 1 КБ)
+    Exchange 'leads' типа ExchangeType.TOPIC.
+    Публикация идёт в наименее загруженный канал без ожидания подтверждения предыдущих
+    (конвейер), число неподтверждённых ограничено max_in_flight.
+    publish(dict) / publish_many(list[dict]) — без ожидания: сообщения ставятся в очередь отправки;
+    при переполнении очереди — PublisherOverloadedError.
+    publish_and_confirm(list[dict]) — ждёт свободного места в окне и подтверждения брокера по всем сообщениям.
+    close() дожидается отправки очереди и подтверждений.
     """
     def __init__(
         self,
         connection: aio_pika.RobustConnection,
+        routing_key: str = "lead.created",
+        *,
+        channel_pool_size: int = 4,
+        max_in_flight: int = 1000,
+        max_pending: int = 10_000,
+        serializer: Optional[MessageSerializer] = None,
     ) -> None:
         self._connection = connection
         self._exchange_name = "leads"
-        self._routing_key = "lead.created"
+        self._routing_key = routing_key
         self._exchange_type = ExchangeType.TOPIC
         self._durable = True
+        self._channel_pool_size = max(1, channel_pool_size)
+        self._max_in_flight = max(1, max_in_flight)
+        self._max_pending = max_pending
+        self._serializer = serializer or MessageSerializer()
 
-        self._channel: Optional[aio_pika.RobustChannel] = None
-        self._exchange: Optional[aio_pika.Exchange] = None
+        self._slots: list[_ChannelSlot] = []
         self._lock = asyncio.Lock()
+        self._window: Optional[asyncio.Semaphore] = None
+        self._pending: Optional[asyncio.Queue] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._sends: set[asyncio.Task] = set()
+        self._closing = False
+        self.failed = 0
 
     async def _ensure(self) -> None:
-        if self._exchange:
+        if self._slots:
             return
         async with self._lock:
-            if self._exchange:
+            if self._slots:
                 return
-            self._channel = await self._connection.channel()
-            self._exchange = await self._channel.declare_exchange(
-                self._exchange_name,
-                type=self._exchange_type,
-                durable=self._durable,
-            )
+            slots = []
+            for _ in range(self._channel_pool_size):
+                channel = await self._connection.channel(publisher_confirms=True)
+                exchange = await channel.declare_exchange(
+                    self._exchange_name,
+                    type=self._exchange_type,
+                    durable=self._durable,
+                )
+                slots.append(_ChannelSlot(channel, exchange))
+            self._slots = slots
 
-    async def _publish_async(self, message: dict) -> None:
-        if True:
-            await self._ensure()
-            assert self._exchange is not None
-            body = json.dumps(
-            message,
-            ensure_ascii=False,
-            separators=(",", ":"),
-            default=str,
-            ).encode()
-            msg = aio_pika.Message(
-                body=body,
-                content_type="application/json",
-                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
-            )
-            await self._exchange.publish(msg, routing_key=self._routing_key)
+    def _ensure_pipeline(self) -> None:
+        # Окно и очередь создаются лениво: конструктор может вызываться вне цикла событий
+        if self._window is None:
+            self._window = asyncio.Semaphore(self._max_in_flight)
+            self._pending = asyncio.Queue(maxsize=self._max_pending)
+
+    def _build_message(self, message: dict) -> aio_pika.Message:
+        encoded = self._serializer.encode(message)
+        return aio_pika.Message(
+            body=encoded.body,
+            content_type=encoded.content_type,
+            content_encoding=encoded.content_encoding,
+            delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+        )
+
+    def _pick_slot(self) -> _ChannelSlot:
+        return min(self._slots, key=lambda s: s.in_flight)
 
+    async def _send(self, message: dict, routing_key: str) -> None:
+        # Вызывается с уже занятым местом в окне; освобождает его после подтверждения
+        assert self._window is not None
+        slot = self._pick_slot()
+        slot.in_flight += 1
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            await slot.exchange.publish(self._build_message(message), routing_key=routing_key)
+            slot.published += 1
+            outcome = "ok"
+        finally:
+            PUBLISH_SECONDS.labels(routing_key, outcome).observe(time.perf_counter() - started)
+            slot.in_flight -= 1
+            self._window.release()
 
+    async def _publish_confirmed(self, message: dict, routing_key: str) -> None:
+        assert self._window is not None
+        await self._window.acquire()
+        await self._send(message, routing_key)
+
+    async def _dispatch(self) -> None:
+        assert self._window is not None and self._pending is not None
+        while True:
+            message, routing_key = await self._pending.get()
+            try:
+                await self._ensure()
+            except Exception:
+                self.failed += 1
+                logger.exception("rabbitmq publish failed: no channel")
+                self._pending.task_done()
+                continue
+            # Ждём места в окне неподтверждённых: очередь растёт, задачи — нет
+            await self._window.acquire()
+            task = asyncio.get_running_loop().create_task(self._send(message, routing_key))
+            self._sends.add(task)
+            task.add_done_callback(self._on_sent)
+
+    def _on_sent(self, task: asyncio.Task) -> None:
+        self._sends.discard(task)
+        assert self._pending is not None
+        self._pending.task_done()
+        if not task.cancelled() and task.exception() is not None:
+            self.failed += 1
+            logger.error("rabbitmq publish failed", exc_info=task.exception())
+
+    def _enqueue(self, messages: Sequence[dict]) -> None:
+        if self._closing:
+            raise RuntimeError("RabbitMQMessageBroker is closed.")
+        self._ensure_pipeline()
+        assert self._pending is not None
+        if self._pending.maxsize and self._pending.qsize() + len(messages) > self._pending.maxsize:
+            PUBLISH_QUEUE_REJECTED.inc(len(messages))
+            raise PublisherOverloadedError(
+                f"{self._pending.qsize()} messages are waiting to be published, limit is {self._pending.maxsize}."
+            )
+        for message in messages:
+            self._pending.put_nowait((message, self._routing_key))
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
 
     def publish(self, message: dict) -> None:
-        loop = asyncio.get_running_loop()
-        loop.create_task(self._publish_async(message))
-
-    async def close(self) -> None:
-        if self._channel:
-            await self._channel.close()
-        self._channel = None
-        self._exchange = None
+        self._enqueue([message])
+
+    def publish_many(self, messages: Sequence[dict]) -> None:
+        if not messages:
+            return
+        self._enqueue(messages)
+
+    async def publish_and_confirm(self, messages: Sequence[dict], routing_key: str | None = None) -> None:
+        # Исключение, если брокер не подтвердил хотя бы одно сообщение (для OutboxRelay)
+        if not messages:
+            return
+        await self._ensure()
+        self._ensure_pipeline()
+        await asyncio.gather(*(
+            self._publish_confirmed(m, routing_key or self._routing_key)
+            for m in messages
+        ))
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._slots),
+            "in_flight": sum(s.in_flight for s in self._slots),
+            "max_in_flight": self._max_in_flight,
+            "pending": self._pending.qsize() if self._pending is not None else 0,
+            "published": sum(s.published for s in self._slots),
+            "failed": self.failed,
+        }
+
+    async def close(self, timeout: float = 10.0) -> None:
+        self._closing = True
+        if self._pending is not None:
+            try:
+                await asyncio.wait_for(self._pending.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    "rabbitmq broker closed with %d unsent messages", self._pending.qsize() + len(self._sends)
+                )
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+        if self._sends:
+            await asyncio.gather(*self._sends, return_exceptions=True)
+        for slot in self._slots:
+            await slot.channel.close()
+        self._slots = []
+        self._dispatcher = None
+
+
+__all__ = ["RabbitMQMessageBroker", "PublisherOverloadedError"]
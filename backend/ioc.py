@@ -2,19 +2,51 @@ from dishka import Provider, provide, Scope, from_context, AnyOf
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from config import Config
 from infrastructure.db.database import new_session_maker
-from typing import AsyncIterable
+from typing import AsyncIterable, Iterable
 from infrastructure.db import repositories as db_repositories
 from infrastructure.queue.rabbitmq_broker import RabbitMQMessageBroker
+from infrastructure.queue.codec import MessageSerializer
+from infrastructure.queue.outbox import ClaimCheckMessageBroker, OutboxMessageBroker, OutboxRelay
 from aio_pika import RobustConnection, connect_robust
 from application.lead.interactors import (
     CreateLeadInteractor,
+    CreateLeadsBatchInteractor,
     GetLeadInteractor,
+    ImportLeadsInteractor,
+    ListLeadsInteractor,
+    SearchLeadsInteractor,
+    FindLeadsByContactInteractor,
+    ExportLeadsInteractor,
     CreateInsightInteractor,
+    CreateInsightsBatchInteractor,
+    PurgeIdempotencyKeysInteractor,
+    PurgeInsightMemoInteractor,
+    GetInsightAnalyticsInteractor,
+    RebuildInsightRollupsInteractor,
+    MaintainPartitionsInteractor,
 )
 from infrastructure.context import ContextProvider as InfraContextProvider
 from infrastructure.generator import InsightGenerator as InfraInsightGenerator
+from infrastructure.generator_executor import InlineInsightGenerator, ProcessPoolInsightGenerator
+from infrastructure.cache import LeadCache, LRUCache
+from infrastructure.insight_memo import InsightMemo, InsightMemoCache
+from handlers.rabbitmq.cache_invalidation import LEAD_INVALIDATED_ROUTING_KEY
 from application.lead import interfaces as lead_interfaces
 from application.common_interfaces import DBSession
+def new_rabbitmq_broker(connection: RobustConnection, config: Config, routing_key: str = "lead.created") -> RabbitMQMessageBroker:
+    return RabbitMQMessageBroker(
+        connection,
+        routing_key,
+        channel_pool_size=config.rabbitmq.publisher_channels,
+        max_in_flight=config.rabbitmq.publisher_max_in_flight,
+        max_pending=config.rabbitmq.publisher_max_pending,
+        serializer=MessageSerializer(
+            config.rabbitmq.message_codec,
+            compress_threshold=config.rabbitmq.message_compress_threshold,
+            compress_level=config.rabbitmq.message_compress_level,
+        ),
+    )
+
 class ConfigProvider(Provider):
     config = from_context(provides=Config, scope=Scope.APP)
 
@@ -44,6 +76,22 @@ class DBProviders(Provider):
         scope=Scope.REQUEST,
         provides=lead_interfaces.InsightRepository,
     )
+    insight_rollup_repository = provide(
+        db_repositories.InsightRollupRepository,
+        scope=Scope.REQUEST,
+        provides=lead_interfaces.InsightRollupRepository,
+    )
+    partition_repository = provide(
+        db_repositories.PartitionRepository,
+        scope=Scope.REQUEST,
+        provides=lead_interfaces.PartitionRepository,
+    )
+    # Партиции создают и CLI, и API с воркером при старте
+    maintain_partitions_interactor = provide(
+        MaintainPartitionsInteractor,
+        scope=Scope.REQUEST,
+        provides=MaintainPartitionsInteractor,
+    )
 
 class FastApiProviders(Provider):
     context_provider = provide(
@@ -56,16 +104,55 @@ class FastApiProviders(Provider):
         scope=Scope.REQUEST,
         provides=CreateLeadInteractor,
     )
+    create_leads_batch_interactor = provide(
+        CreateLeadsBatchInteractor,
+        scope=Scope.REQUEST,
+        provides=CreateLeadsBatchInteractor,
+    )
+    import_leads_interactor = provide(
+        ImportLeadsInteractor,
+        scope=Scope.REQUEST,
+        provides=ImportLeadsInteractor,
+    )
+    list_leads_interactor = provide(
+        ListLeadsInteractor,
+        scope=Scope.REQUEST,
+        provides=ListLeadsInteractor,
+    )
+    search_leads_interactor = provide(
+        SearchLeadsInteractor,
+        scope=Scope.REQUEST,
+        provides=SearchLeadsInteractor,
+    )
+    find_leads_by_contact_interactor = provide(
+        FindLeadsByContactInteractor,
+        scope=Scope.REQUEST,
+        provides=FindLeadsByContactInteractor,
+    )
+    export_leads_interactor = provide(
+        ExportLeadsInteractor,
+        scope=Scope.REQUEST,
+        provides=ExportLeadsInteractor,
+    )
     get_lead_interactor = provide(
         GetLeadInteractor,
         scope=Scope.REQUEST,
         provides=GetLeadInteractor,
     )
-    message_broker = provide(
-        RabbitMQMessageBroker,
-        scope=Scope.APP,
-        provides=lead_interfaces.MessageBroker,
+    get_insight_analytics_interactor = provide(
+        GetInsightAnalyticsInteractor,
+        scope=Scope.REQUEST,
+        provides=GetInsightAnalyticsInteractor,
     )
+    @provide(scope=Scope.REQUEST)
+    def message_broker(self, session: DBSession, config: Config) -> lead_interfaces.MessageBroker:
+        # События пишутся в outbox в транзакции запроса, в RabbitMQ их переносит OutboxRelay
+        broker = OutboxMessageBroker(session)
+        return ClaimCheckMessageBroker(broker) if config.rabbitmq.claim_check else broker
+
+    @provide(scope=Scope.APP)
+    def lead_cache(self, config: Config) -> AnyOf[LeadCache, lead_interfaces.LeadCache]:
+        return LeadCache(LRUCache(config.cache.lead_max_size, config.cache.lead_ttl_seconds))
 
 class RabbitMQProviders(Provider):
     @provide(scope=Scope.APP)
@@ -83,8 +170,98 @@ class RabbitMQProviders(Provider):
         scope=Scope.APP,
         provides=lead_interfaces.InsightGenerator,
     )
+
+    @provide(scope=Scope.APP)
+    def async_insight_generator(
+        self, config: Config, generator: lead_interfaces.InsightGenerator
+    ) -> Iterable[lead_interfaces.AsyncInsightGenerator]:
+        # Пул процессов выносит классификацию из цикла событий: heartbeat и ack не ждут вычислений
+        if config.generator.processes > 0:
+            async_generator = ProcessPoolInsightGenerator(
+                config.generator.processes,
+                max_queue=config.generator.max_queue,
+                min_chunk=config.generator.min_chunk,
+            )
+        else:
+            async_generator = InlineInsightGenerator(generator)
+        yield async_generator
+        async_generator.close()
+
+    @provide(scope=Scope.APP)
+    def insight_memo_cache(self, config: Config) -> InsightMemoCache:
+        return InsightMemoCache(config.generator.memo_max_size, config.generator.memo_ttl_seconds)
+
+    insight_memo_repository = provide(
+        db_repositories.InsightMemoRepository,
+        scope=Scope.REQUEST,
+        provides=db_repositories.InsightMemoRepository,
+    )
+    insight_memo = provide(
+        InsightMemo,
+        scope=Scope.REQUEST,
+        provides=lead_interfaces.InsightMemo,
+    )
+    purge_insight_memo_interactor = provide(
+        PurgeInsightMemoInteractor,
+        scope=Scope.REQUEST,
+        provides=PurgeInsightMemoInteractor,
+    )
     create_insight_interactor = provide(
         CreateInsightInteractor,
         scope=Scope.REQUEST,
         provides=CreateInsightInteractor,
-    )
\ No newline at end of file
+    )
+    create_insights_batch_interactor = provide(
+        CreateInsightsBatchInteractor,
+        scope=Scope.REQUEST,
+        provides=CreateInsightsBatchInteractor,
+    )
+
+class CliProviders(Provider):
+    export_leads_interactor = provide(
+        ExportLeadsInteractor,
+        scope=Scope.REQUEST,
+        provides=ExportLeadsInteractor,
+    )
+    purge_idempotency_keys_interactor = provide(
+        PurgeIdempotencyKeysInteractor,
+        scope=Scope.REQUEST,
+        provides=PurgeIdempotencyKeysInteractor,
+    )
+    rebuild_insight_rollups_interactor = provide(
+        RebuildInsightRollupsInteractor,
+        scope=Scope.REQUEST,
+        provides=RebuildInsightRollupsInteractor,
+    )
+
+class WorkerProviders(Provider):
+    @provide(scope=Scope.APP)
+    async def lead_cache(self, connection: RobustConnection, config: Config) -> AsyncIterable[lead_interfaces.LeadCache]:
+        # Воркер не читает лидов: локальный уровень ему не нужен, только рассылка инвалидаций
+        broker = new_rabbitmq_broker(connection, config, LEAD_INVALIDATED_ROUTING_KEY)
+        yield LeadCache(LRUCache(max_size=0), invalidation_broker=broker)
+        await broker.close()
+
+class OutboxRelayProviders(Provider):
+    @provide(scope=Scope.APP)
+    async def outbox_relay(
+        self,
+        config: Config,
+        session_maker: async_sessionmaker[AsyncSession],
+    ) -> AsyncIterable[OutboxRelay]:
+        connection = await connect_robust(
+            host=config.rabbitmq.host,
+            port=config.rabbitmq.port,
+            login=config.rabbitmq.user,
+            password=config.rabbitmq.password,
+            virtualhost=config.rabbitmq.virtual_host,
+        )
+        broker = new_rabbitmq_broker(connection, config)
+        yield OutboxRelay(
+            session_maker,
+            broker,
+            batch_size=config.outbox.relay_batch_size,
+            poll_interval=config.outbox.relay_poll_interval_ms / 1000,
+        )
+        await broker.close()
+        await connection.close()
@@ -0,0 +1,172 @@
+import argparse
+import asyncio
+import sys
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+from config import Config
+from dishka import make_async_container
+from application.lead.dto import LeadExportFilterDTO, LeadExportStatsDTO
+from application.lead.interactors import (
+    ExportLeadsInteractor,
+    PurgeIdempotencyKeysInteractor,
+    RebuildInsightRollupsInteractor,
+    MaintainPartitionsInteractor,
+)
+from aio_pika import connect_robust
+from handlers.rabbitmq.retry import RetryPolicy, replay_parked
+from ioc import ConfigProvider, DBProviders, CliProviders
+
+
+def build_container(config: Config):
+    return make_async_container(
+        ConfigProvider(),
+        DBProviders(),
+        CliProviders(),
+        context={Config: config},
+    )
+
+
+def _report(stats: LeadExportStatsDTO, final: bool = False) -> None:
+    prefix = "done" if final else "progress"
+    print(
+        f"{prefix}: {stats.leads} leads, {stats.insights} insights, "
+        f"{stats.elapsed_seconds:.1f}s, {stats.rows_per_sec:.0f} rows/sec",
+        file=sys.stderr,
+    )
+
+
+async def export_leads(args: argparse.Namespace) -> None:
+    container = build_container(Config())
+    filters = LeadExportFilterDTO(created_from=args.created_from, created_to=args.created_to)
+    stats = LeadExportStatsDTO()
+    out_ctx = open(args.output, "wb") if args.output != "-" else nullcontext(sys.stdout.buffer)
+    try:
+        async with container() as request_container:
+            interactor = await request_container.get(ExportLeadsInteractor)
+            if args.chunk_size:
+                interactor.CHUNK_SIZE = args.chunk_size
+            next_report = args.progress_interval
+            with out_ctx as out:
+                async for chunk in interactor.export_ndjson(filters, stats):
+                    out.write(chunk)
+                    if stats.elapsed_seconds >= next_report:
+                        _report(stats)
+                        next_report = stats.elapsed_seconds + args.progress_interval
+        _report(stats, final=True)
+    finally:
+        await container.close()
+
+
+async def purge_keys(args: argparse.Namespace) -> None:
+    config = Config()
+    container = build_container(config)
+    ttl_hours = args.ttl_hours or config.idempotency.key_ttl_hours
+    batch_size = args.batch_size or config.idempotency.purge_batch_size
+    older_than = datetime.now(timezone.utc) - timedelta(hours=ttl_hours)
+    try:
+        async with container() as request_container:
+            interactor = await request_container.get(PurgeIdempotencyKeysInteractor)
+            deleted = await interactor.purge(older_than, batch_size)
+        print(f"done: {deleted} idempotency keys older than {older_than.isoformat()} removed", file=sys.stderr)
+    finally:
+        await container.close()
+
+
+async def rebuild_insight_rollups(args: argparse.Namespace) -> None:
+    container = build_container(Config())
+    try:
+        async with container() as request_container:
+            interactor = await request_container.get(RebuildInsightRollupsInteractor)
+            rows = await interactor.rebuild(args.since)
+        scope = f"since {args.since.isoformat()}" if args.since else "from scratch"
+        print(f"done: {rows} insight rollup rows rebuilt {scope}", file=sys.stderr)
+    finally:
+        await container.close()
+
+
+async def maintain_partitions(args: argparse.Namespace) -> None:
+    config = Config()
+    container = build_container(config)
+    months_ahead = config.partitions.months_ahead if args.months_ahead is None else args.months_ahead
+    retention = config.partitions.retention_months if args.retention_months is None else args.retention_months
+    try:
+        async with container() as request_container:
+            interactor = await request_container.get(MaintainPartitionsInteractor)
+            report = await interactor.maintain(months_ahead, retention)
+        print(
+            f"done: created {report.created or 'none'}, dropped {report.dropped or 'none'}, "
+            f"{report.orphan_insights} insights of dropped leads removed, "
+            f"{report.rollup_rows_deleted} insight rollup rows removed",
+            file=sys.stderr,
+        )
+    finally:
+        await container.close()
+
+
+async def replay_parked_messages(args: argparse.Namespace) -> None:
+    rabbit = Config().rabbitmq
+    connection = await connect_robust(
+        host=rabbit.host,
+        port=rabbit.port,
+        login=rabbit.user,
+        password=rabbit.password,
+        virtualhost=rabbit.virtual_host,
+    )
+    try:
+        moved = await replay_parked(
+            connection, args.queue, RetryPolicy.from_config(rabbit), limit=args.limit, batch_size=args.batch_size
+        )
+        print(f"done: {moved} parked messages moved back to {args.queue}", file=sys.stderr)
+    finally:
+        await connection.close()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="crm")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export-leads", help="Выгрузить лидов с инсайтами в NDJSON")
+    export.add_argument("--output", "-o", default="-", help="Файл назначения, '-' — stdout")
+    export.add_argument("--created-from", type=datetime.fromisoformat, default=None)
+    export.add_argument("--created-to", type=datetime.fromisoformat, default=None)
+    export.add_argument("--chunk-size", type=int, default=None)
+    export.add_argument("--progress-interval", type=float, default=5.0, help="Секунды между отчётами")
+    export.set_defaults(handler=export_leads)
+
+    purge = commands.add_parser("purge-keys", help="Удалить просроченные ключи идемпотентности")
+    purge.add_argument("--ttl-hours", type=int, default=None)
+    purge.add_argument("--batch-size", type=int, default=None)
+    purge.set_defaults(handler=purge_keys)
+
+    rollups = commands.add_parser("rebuild-insight-rollups", help="Пересчитать сводки аналитики инсайтов")
+    rollups.add_argument(
+        "--since", type=datetime.fromisoformat, default=None,
+        help="Пересчитать часы начиная с этого момента (по умолчанию — все)",
+    )
+    rollups.set_defaults(handler=rebuild_insight_rollups)
+
+    partitions = commands.add_parser(
+        "maintain-partitions",
+        help="Создать будущие партиции leads/insights и удалить истёкшие вместе с их сводками аналитики "
+        "(запускать по расписанию)",
+    )
+    partitions.add_argument("--months-ahead", type=int, default=None)
+    partitions.add_argument("--retention-months", type=int, default=None, help="0 — не удалять")
+    partitions.set_defaults(handler=maintain_partitions)
+
+    replay = commands.add_parser(
+        "replay-parked", help="Вернуть сообщения из parking-очереди в рабочую со сброшенным счётчиком попыток"
+    )
+    replay.add_argument("--queue", default="lead.created.q", help="Рабочая очередь воркера")
+    replay.add_argument("--limit", type=int, default=None, help="По умолчанию — все, что были в очереди на старте")
+    replay.add_argument("--batch-size", type=int, default=100)
+    replay.set_defaults(handler=replay_parked_messages)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = build_parser().parse_args(argv)
+    asyncio.run(args.handler(args))
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,18 @@
 import config
+import asyncio
+import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from handlers.api.v1 import leads
+from handlers.api.v1 import analytics, leads, system
+from handlers.partitions import ensure_partitions, keep_partitions
+from handlers.api import metrics as metrics_api
+from handlers.rabbitmq.cache_invalidation import LeadCacheInvalidationListener
+from infrastructure.cache import LeadCache
+from infrastructure.db.database import pool_stats
+from metrics import register_stats_gauge
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from aio_pika import RobustConnection
 from dishka.integrations.fastapi import setup_dishka, FastapiProvider
 from dishka import make_async_container
 from ioc import FastApiProviders, DBProviders, ConfigProvider, RabbitMQProviders
@@ -11,9 +22,40 @@ from handlers.api.v1 import exceptions_handlers
 config = Config()
 
 container = make_async_container(FastApiProviders(), FastapiProvider(), RabbitMQProviders(), DBProviders(), ConfigProvider(), context={Config: config})
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    session_maker = await container.get(async_sessionmaker[AsyncSession])
+    lead_cache = await container.get(LeadCache)
+    register_stats_gauge("crm_db_pool", "Postgres connection pool state", lambda: pool_stats(session_maker))
+    register_stats_gauge("crm_lead_cache", "Lead cache counters", lead_cache.stats)
+    partitions = None
+    if config.partitions.maintenance_interval > 0:
+        await ensure_partitions(container, config.partitions.months_ahead)
+        partitions = asyncio.create_task(keep_partitions(
+            container, config.partitions.months_ahead, config.partitions.maintenance_interval,
+        ))
+    # Инвалидации кеша от воркеров; без RabbitMQ API работает, устаревание ограничено TTL
+    listener = None
+    try:
+        listener = LeadCacheInvalidationListener(
+            await container.get(RobustConnection),
+            lead_cache,
+        )
+        await listener.start()
+    except Exception:
+        logger.exception("lead cache invalidation listener is not started")
+        listener = None
+    yield
+    if partitions is not None:
+        partitions.cancel()
+    if listener is not None:
+        await listener.stop()
+
 def get_fastapi_app() -> FastAPI:
 
-    app = FastAPI(title=config.fastapi.title, version=config.fastapi.version, description=config.fastapi.description)
+    app = FastAPI(title=config.fastapi.title, version=config.fastapi.version, description=config.fastapi.description, lifespan=lifespan)
 
     app.add_middleware(
     CORSMiddleware,
@@ -27,6 +69,10 @@ def get_fastapi_app() -> FastAPI:
         app.add_exception_handler(exc_type, handler)
     
     app.include_router(leads.router)
+    app.include_router(analytics.router)
+    app.include_router(system.router)
+    app.include_router(metrics_api.router)
+    app.add_middleware(metrics_api.HttpMetricsMiddleware)
     setup_dishka(container, app)
     return app
 
@@ -0,0 +1,40 @@
+import asyncio
+import logging
+import signal
+from contextlib import suppress
+from config import Config
+from dishka import make_async_container
+from infrastructure.queue.outbox import OutboxRelay
+from ioc import ConfigProvider, DBProviders, OutboxRelayProviders
+
+config = Config()
+container = make_async_container(
+    ConfigProvider(),
+    DBProviders(),
+    OutboxRelayProviders(),
+    context={Config: config},
+)
+
+async def run_relay():
+    relay: OutboxRelay = await container.get(OutboxRelay)
+    task = asyncio.create_task(relay.run())
+
+    def _handle_stop(*_):
+        relay.stop()
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        with suppress(NotImplementedError):
+            loop.add_signal_handler(sig, _handle_stop)
+
+    # Текущая пачка дописывается до конца, затем процесс выходит
+    await task
+    with suppress(Exception):
+        await container.close()
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(run_relay())
+
+if __name__ == "__main__":
+    main()
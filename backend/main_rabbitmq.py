@@ -1,28 +1,116 @@
 import asyncio
+import logging
+import os
 import signal
 from contextlib import suppress
+from typing import Optional
 from config import Config
-from dishka import make_async_container
+from dishka import AsyncContainer, make_async_container
 from aio_pika import RobustConnection
-from handlers.rabbitmq.worker import LeadCreatedWorker
-from ioc import ConfigProvider, DBProviders, RabbitMQProviders
+from handlers.rabbitmq.worker import LeadCreatedWorker, MESSAGES
+from handlers.rabbitmq.supervisor import OUTCOMES, WorkerSupervisor
+from handlers.rabbitmq.flow_control import AdaptiveFlowController
+from handlers.rabbitmq.retry import RetryPolicy
+from handlers.partitions import ensure_partitions, keep_partitions
+from application.lead.interactors import PurgeInsightMemoInteractor
+from infrastructure.insight_memo import InsightMemoCache
+from infrastructure.db.database import pool_stats
+from application.lead import interfaces
+from metrics import register_stats_gauge, start_metrics_server
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from ioc import ConfigProvider, DBProviders, RabbitMQProviders, WorkerProviders
 
+logger = logging.getLogger(__name__)
 config = Config()
-container = make_async_container(
-    ConfigProvider(),
-    DBProviders(),
-    RabbitMQProviders(),
-    context={Config: config},
-)
-
-async def build_worker():
+
+def build_container() -> AsyncContainer:
+    # Свой контейнер (пул БД, AMQP-соединение, пул генератора) на каждый процесс воркера
+    return make_async_container(
+        ConfigProvider(),
+        DBProviders(),
+        RabbitMQProviders(),
+        WorkerProviders(),
+        context={Config: config},
+    )
+
+async def build_flow(container: AsyncContainer) -> Optional[AdaptiveFlowController]:
+    rabbit = config.rabbitmq
+    if not rabbit.worker_adaptive or rabbit.worker_batch_size > 1:
+        return None
+    session_maker = await container.get(async_sessionmaker[AsyncSession])
+    flow = AdaptiveFlowController(
+        # Начальный prefetch из конфига (prefetch_ratio = 2): половина в работе, половина в запасе
+        max(1, rabbit.worker_prefetch // 2),
+        min_limit=rabbit.worker_concurrency_min,
+        max_limit=rabbit.worker_concurrency_max,
+        interval=rabbit.worker_flow_interval,
+        latency_tolerance=rabbit.worker_latency_tolerance,
+        pool_wait_threshold=rabbit.worker_pool_wait_threshold_ms / 1000,
+        pool_stats=lambda: pool_stats(session_maker),
+    )
+    register_stats_gauge("crm_worker_flow", "Adaptive worker concurrency and prefetch", flow.stats)
+    return flow
+
+async def build_worker(container: AsyncContainer):
     connection: RobustConnection = await container.get(RobustConnection)
-    worker = LeadCreatedWorker(connection=connection, container=container)
-    return worker, container, connection
+    worker = LeadCreatedWorker(
+        connection=connection,
+        container=container,
+        prefetch=config.rabbitmq.worker_prefetch,
+        batch_size=config.rabbitmq.worker_batch_size,
+        batch_timeout_ms=config.rabbitmq.worker_batch_timeout_ms,
+        drain_timeout=config.rabbitmq.worker_shutdown_timeout,
+        flow=await build_flow(container),
+        retry=RetryPolicy.from_config(config.rabbitmq),
+    )
+    return worker, connection
+
+async def purge_stale_insight_memo(container: AsyncContainer) -> None:
+    # Новая версия генератора: результаты прежней версии в memo больше не нужны
+    async with container() as request_container:
+        interactor = await request_container.get(PurgeInsightMemoInteractor)
+        deleted = await interactor.purge()
+    if deleted:
+        logger.info("insight memo: %d stale entries removed", deleted)
 
-async def run_worker():
-    worker, container, connection = await build_worker()
+async def start_metrics(container: AsyncContainer, port: int):
+    session_maker = await container.get(async_sessionmaker[AsyncSession])
+    generator = await container.get(interfaces.AsyncInsightGenerator)
+    memo_cache = await container.get(InsightMemoCache)
+    register_stats_gauge("crm_db_pool", "Postgres connection pool state", lambda: pool_stats(session_maker))
+    register_stats_gauge("crm_insight_generator", "Insight generator timing", generator.stats)
+    register_stats_gauge("crm_insight_memo", "Insight memo counters", memo_cache.stats)
+    if not port:
+        return None
+    return await start_metrics_server(config.metrics.host, port)
+
+async def report_progress(index: int, reports, interval: float) -> None:
+    # Накопленные счётчики процесса для супервизора; он сам считает суммарную пропускную способность
+    pid = os.getpid()
+    while True:
+        await asyncio.sleep(interval)
+        with suppress(Exception):
+            reports.put_nowait((index, pid, {o: MESSAGES.labels(o).value for o in OUTCOMES}))
+
+async def run_worker(index: Optional[int] = None, reports=None):
+    container = build_container()
+    await purge_stale_insight_memo(container)
+    partitions = None
+    if config.partitions.maintenance_interval > 0:
+        await ensure_partitions(container, config.partitions.months_ahead)
+        partitions = asyncio.create_task(keep_partitions(
+            container, config.partitions.months_ahead, config.partitions.maintenance_interval,
+        ))
+    worker, connection = await build_worker(container)
+    # Под супервизором у каждого процесса свой порт метрик: METRICS_WORKER_PORT + 1 + index
+    port = config.metrics.worker_port
+    if index is not None and port:
+        port += 1 + index
+    metrics_server = await start_metrics(container, port)
     await worker.start()
+    reporter = None
+    if reports is not None:
+        reporter = asyncio.create_task(report_progress(index, reports, config.rabbitmq.worker_report_interval))
     stop_event = asyncio.Event()
 
     def _handle_stop(*_):
@@ -37,13 +125,56 @@ async def run_worker():
 
     with suppress(Exception):
         await worker.stop()
-    with suppress(Exception):
-        await connection.close()
+    if partitions is not None:
+        partitions.cancel()
+    if reporter is not None:
+        reporter.cancel()
+        # Последний отчёт после дренажа: супервизор учитывает дочитанные сообщения
+        reports.put_nowait((index, os.getpid(), {o: MESSAGES.labels(o).value for o in OUTCOMES}))
+    if metrics_server is not None:
+        metrics_server.close()
+    logger.info("insight memo: %s", (await container.get(InsightMemoCache)).stats())
+    # Контейнер закрывается первым: брокеры дожидаются подтверждений, пока соединение открыто
     with suppress(Exception):
         await container.close()
+    with suppress(Exception):
+        await connection.close()
+
+def run_child(index: int, reports) -> None:
+    # Точка входа процесса под супервизором (spawn: импортируется заново, состояние родителя не наследуется)
+    logging.basicConfig(level=logging.INFO, format=f"%(asctime)s worker-{index} %(levelname)s %(name)s: %(message)s")
+    asyncio.run(run_worker(index, reports))
+
+async def run_supervisor(processes: int):
+    rabbit = config.rabbitmq
+    supervisor = WorkerSupervisor(
+        run_child,
+        processes,
+        shutdown_timeout=rabbit.worker_shutdown_timeout + 5,
+        max_backoff=rabbit.worker_restart_backoff_max,
+        report_interval=rabbit.worker_report_interval,
+    )
+    register_stats_gauge("crm_worker_supervisor", "Worker processes and aggregate throughput", supervisor.stats)
+    metrics_server = None
+    if config.metrics.worker_port:
+        metrics_server = await start_metrics_server(config.metrics.host, config.metrics.worker_port)
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        with suppress(NotImplementedError):
+            loop.add_signal_handler(sig, supervisor.stop)
+    try:
+        await supervisor.run()
+    finally:
+        if metrics_server is not None:
+            metrics_server.close()
 
 def main():
-    asyncio.run(run_worker())
+    processes = config.rabbitmq.worker_processes
+    if processes > 1:
+        logging.basicConfig(level=logging.INFO)
+        asyncio.run(run_supervisor(processes))
+    else:
+        asyncio.run(run_worker())
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
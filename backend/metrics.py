@@ -0,0 +1,326 @@
+"""
+Внутрипроцессный реестр метрик в текстовом формате Prometheus.
+
+Счётчики и гистограммы рассчитаны на горячий путь: дочерняя серия по набору меток
+создаётся один раз и кешируется в словаре, observe() — bisect по границам и два сложения.
+Блокировок нет: метрики пишутся из цикла событий одного процесса.
+"""
+import asyncio
+import functools
+import inspect
+import logging
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Iterable, Sequence
+
+logger = logging.getLogger(__name__)
+
+# Границы по умолчанию: от долей миллисекунды (LRU, запрос по индексу) до десятков секунд (импорт)
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], Any] = {}
+
+    def labels(self, *values: Any, **kwargs: Any):
+        if kwargs:
+            values = tuple(kwargs[n] for n in self.labelnames)
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            if len(key) != len(self.labelnames):
+                raise ValueError(f"{self.name}: expected labels {self.labelnames}, got {key}")
+            child = self._children[key] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _render_samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples())
+        return "\n".join(lines)
+
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.labels().inc(amount)
+
+    def _render_samples(self) -> Iterable[str]:
+        for key, child in self._children.items():
+            yield f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(child.value)}"
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def _render_samples(self) -> Iterable[str]:
+        for key, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(child.sum)}"
+            yield f"{self.name}_count{labels} {child.count}"
+
+
+class Gauge(_Metric):
+    """Значение снимается при рендере: callback возвращает {кортеж меток: значение}."""
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], dict[tuple[str, ...], float]],
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._callback = callback
+
+    def _render_samples(self) -> Iterable[str]:
+        try:
+            values = self._callback()
+        except Exception:
+            logger.exception("metrics: gauge %s callback failed", self.name)
+            return
+        for key, value in values.items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(float(value))}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def _get_or_create(self, cls: type, name: str, *args: Any, **kwargs: Any):
+        metric = self._metrics.get(name)
+        if metric is None:
+            metric = self._metrics[name] = cls(name, *args, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"metric {name} is already registered as {metric.kind}")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+    def gauge(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str],
+        callback: Callable[[], dict[tuple[str, ...], float]],
+    ) -> Gauge:
+        # Повторная регистрация (новый контейнер, тесты) заменяет источник значения
+        gauge = Gauge(name, documentation, labelnames, callback)
+        self._metrics[name] = gauge
+        return gauge
+
+    def render(self) -> str:
+        return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+
+
+REGISTRY = Registry()
+
+INTERACTOR_SECONDS = REGISTRY.histogram(
+    "crm_interactor_seconds", "Interactor call latency", ["interactor", "method", "outcome"]
+)
+REPOSITORY_SECONDS = REGISTRY.histogram(
+    "crm_repository_seconds", "Repository method latency (DB time)", ["repository", "method", "outcome"]
+)
+
+
+def register_stats_gauge(name: str, documentation: str, stats: Callable[[], dict], registry: "Registry | None" = None) -> Gauge:
+    """
+    Gauge поверх существующего stats()-словаря (пул БД, кеши, генератор):
+    числовые поля становятся сериями с меткой stat, вложенные словари — через точку.
+    """
+    def collect() -> dict[tuple[str, ...], float]:
+        values: dict[tuple[str, ...], float] = {}
+
+        def walk(prefix: str, data: dict) -> None:
+            for key, value in data.items():
+                if isinstance(value, dict):
+                    walk(f"{prefix}{key}.", value)
+                elif isinstance(value, (int, float)):
+                    values[(f"{prefix}{key}",)] = value
+        walk("", stats())
+        return values
+    return (registry or REGISTRY).gauge(name, documentation, ["stat"], collect)
+
+
+def timed(histogram: Histogram, *labels: str) -> Callable:
+    """
+    Декоратор корутины или асинхронного генератора: время вызова попадает в histogram
+    с метками labels + outcome ("ok" или имя класса исключения).
+    """
+    def decorator(fn: Callable) -> Callable:
+        ok = histogram.labels(*labels, "ok")
+
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def gen_wrapper(*args: Any, **kwargs: Any):
+                started = time.perf_counter()
+                try:
+                    async for item in fn(*args, **kwargs):
+                        yield item
+                except BaseException as e:
+                    histogram.labels(*labels, type(e).__name__).observe(time.perf_counter() - started)
+                    raise
+                ok.observe(time.perf_counter() - started)
+            return gen_wrapper
+
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any):
+            started = time.perf_counter()
+            try:
+                result = await fn(*args, **kwargs)
+            except BaseException as e:
+                histogram.labels(*labels, type(e).__name__).observe(time.perf_counter() - started)
+                raise
+            ok.observe(time.perf_counter() - started)
+            return result
+        return wrapper
+    return decorator
+
+
+def instrument_methods(histogram: Histogram, component: str) -> Callable[[type], type]:
+    """Декоратор класса: все публичные корутины и асинхронные генераторы класса замеряются через timed()."""
+    def decorator(cls: type) -> type:
+        for attr, fn in list(vars(cls).items()):
+            if attr.startswith("_"):
+                continue
+            if inspect.iscoroutinefunction(fn) or inspect.isasyncgenfunction(fn):
+                setattr(cls, attr, timed(histogram, component, attr)(fn))
+        return cls
+    return decorator
+
+
+async def _handle_metrics_connection(
+    registry: Registry, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+) -> None:
+    try:
+        request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+        while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+            pass
+        parts = request_line.decode("latin-1").split()
+        if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] == "/metrics":
+            body = registry.render().encode()
+            head = f"HTTP/1.1 200 OK\r\nContent-Type: {CONTENT_TYPE}\r\n"
+        else:
+            body = b"not found\n"
+            head = "HTTP/1.1 404 Not Found\r\nContent-Type: text/plain\r\n"
+        writer.write(f"{head}Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+    except Exception:
+        pass
+    finally:
+        writer.close()
+
+
+async def start_metrics_server(host: str, port: int, registry: Registry = REGISTRY) -> asyncio.AbstractServer:
+    """HTTP-порт с GET /metrics для процессов без FastAPI (воркер)."""
+    return await asyncio.start_server(
+        functools.partial(_handle_metrics_connection, registry), host=host, port=port
+    )
+
+
+__all__ = [
+    "REGISTRY",
+    "Registry",
+    "Counter",
+    "Histogram",
+    "Gauge",
+    "INTERACTOR_SECONDS",
+    "REPOSITORY_SECONDS",
+    "CONTENT_TYPE",
+    "timed",
+    "register_stats_gauge",
+    "instrument_methods",
+    "start_metrics_server",
+]
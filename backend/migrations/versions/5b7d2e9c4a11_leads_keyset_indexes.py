@@ -0,0 +1,29 @@
+"""leads keyset indexes
+
+Revision ID: 5b7d2e9c4a11
+Revises: 33ef1cefb25c
+Create Date: 2025-10-06 11:20:43.512904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5b7d2e9c4a11'
+down_revision: Union[str, Sequence[str], None] = '33ef1cefb25c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_leads_created_at_id', 'leads', ['created_at', 'id'], unique=False)
+    op.create_index('ix_leads_source_created_at_id', 'leads', ['source', 'created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_leads_source_created_at_id', table_name='leads')
+    op.drop_index('ix_leads_created_at_id', table_name='leads')
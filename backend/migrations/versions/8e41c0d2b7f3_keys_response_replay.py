@@ -0,0 +1,35 @@
+"""keys response replay and ttl
+
+Revision ID: 8e41c0d2b7f3
+Revises: 5b7d2e9c4a11
+Create Date: 2025-10-08 16:02:11.840417
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8e41c0d2b7f3'
+down_revision: Union[str, Sequence[str], None] = '5b7d2e9c4a11'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('keys', sa.Column('lead_id', sa.UUID(), nullable=True))
+    op.add_column('keys', sa.Column('response', postgresql.JSONB(astext_type=sa.Text()), nullable=True))
+    op.add_column('keys', sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False))
+    op.create_index(op.f('ix_keys_created_at'), 'keys', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_keys_created_at'), table_name='keys')
+    op.drop_column('keys', 'created_at')
+    op.drop_column('keys', 'response')
+    op.drop_column('keys', 'lead_id')
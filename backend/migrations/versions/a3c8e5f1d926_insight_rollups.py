@@ -0,0 +1,49 @@
+"""insight rollups
+
+Revision ID: a3c8e5f1d926
+Revises: f7a2c5d8e413
+Create Date: 2025-10-14 11:05:37.201846
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c8e5f1d926'
+down_revision: Union[str, Sequence[str], None] = 'f7a2c5d8e413'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Типы перечислений уже созданы таблицей insights
+    op.create_table('insight_rollups',
+    sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('source', sa.String(length=100), server_default='', nullable=False),
+    sa.Column('intent', postgresql.ENUM('buy', 'support', 'spam', 'job', 'other', name='intent_enum', create_type=False), nullable=False),
+    sa.Column('priority', postgresql.ENUM('P0', 'P1', 'P2', 'P3', name='priority_enum', create_type=False), nullable=False),
+    sa.Column('next_action', postgresql.ENUM('call', 'email', 'ignore', 'qualify', name='next_action_enum', create_type=False), nullable=False),
+    sa.Column('insights', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.Column('leads', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.PrimaryKeyConstraint('bucket', 'source', 'intent', 'priority', 'next_action')
+    )
+    # Начальное заполнение — то же, что делает `crm rebuild-insight-rollups`
+    op.execute(
+        "INSERT INTO insight_rollups (bucket, source, intent, priority, next_action, insights, leads) "
+        "SELECT date_trunc('hour', i.created_at, 'UTC'), coalesce(l.source, ''), "
+        "i.intent, i.priority, i.next_action, count(*), "
+        "count(*) FILTER (WHERE NOT EXISTS ("
+        "SELECT 1 FROM insights p WHERE p.lead_id = i.lead_id AND (p.created_at, p.id) < (i.created_at, i.id))) "
+        "FROM insights i JOIN leads l ON l.id = i.lead_id "
+        "GROUP BY 1, 2, 3, 4, 5"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('insight_rollups')
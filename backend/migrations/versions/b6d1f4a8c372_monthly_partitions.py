@@ -0,0 +1,139 @@
+"""leads and insights monthly partitions
+
+Revision ID: b6d1f4a8c372
+Revises: a3c8e5f1d926
+Create Date: 2025-10-15 10:42:19.630518
+
+Существующие таблицы не копируются: каждая переименовывается и подключается к новой
+секционированной таблице как одна партиция «до начала следующего месяца». Дальше строки
+идут в помесячные партиции; старая удаляется ретенцией целиком, когда истечёт её граница.
+
+Уникальный индекс (id, created_at) строится заранее через CREATE INDEX CONCURRENTLY, без блокировки
+записи; под блокировкой миграции он только становится первичным ключом старой таблицы, и ATTACH
+подключает его к ключу родителя, ничего не перестраивая.
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d1f4a8c372'
+down_revision: Union[str, Sequence[str], None] = 'a3c8e5f1d926'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Тот же запас, что PARTITION_MONTHS_AHEAD по умолчанию; дальше партиции создаёт `crm maintain-partitions`
+MONTHS_AHEAD = 3
+
+LEAD_COLUMNS = "id, email, phone, name, note, source, created_at, email_normalized, phone_normalized"
+INSIGHT_COLUMNS = "id, lead_id, intent, priority, next_action, confidence, tags, content_hash, created_at"
+
+
+def _add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _bound(month: date) -> str:
+    return f"'{month.isoformat()} 00:00:00+00'"
+
+
+def _partition_key_index(table: str) -> str:
+    return f"{table}_id_created_at_key"
+
+
+def _build_partition_key_index(table: str) -> None:
+    # Выполняется вне транзакции: CONCURRENTLY не блокирует запись в таблицу.
+    # Недостроенный индекс от прерванной попытки (INVALID) удаляется и строится заново
+    index = _partition_key_index(table)
+    op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {index}")
+    op.execute(f"CREATE UNIQUE INDEX CONCURRENTLY {index} ON {table} (id, created_at)")
+
+
+def _partition(table: str, boundary: date) -> None:
+    legacy = f"{table}_until_{boundary:%Y_%m}"
+    bind = op.get_bind()
+    indexes = bind.execute(sa.text(
+        "SELECT indexname, indexdef FROM pg_indexes "
+        "WHERE schemaname = current_schema() AND tablename = :table AND indexname NOT IN (:pkey, :key)"
+    ), {"table": table, "pkey": f"{table}_pkey", "key": _partition_key_index(table)}).all()
+
+    op.execute(f"ALTER TABLE {table} RENAME TO {legacy}")
+    # Первичный ключ старой таблицы — готовый индекс (id, created_at): ATTACH подключает к ключу
+    # родителя только индекс ограничения. Колонки NOT NULL, поэтому замена не сканирует таблицу
+    op.execute(f"ALTER TABLE {legacy} DROP CONSTRAINT {table}_pkey")
+    op.execute(
+        f"ALTER TABLE {legacy} ADD CONSTRAINT {legacy}_pkey PRIMARY KEY USING INDEX {_partition_key_index(table)}"
+    )
+    for name, _ in indexes:
+        op.execute(f"ALTER INDEX {name} RENAME TO {name}_until_{boundary:%Y_%m}")
+
+    # CHECK-ограничения копируются до того, как у старой таблицы появится граница партиции
+    op.execute(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    # Ключ секционирования обязан входить в первичный ключ
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)")
+    # indexdef ссылается на имя таблицы, которое теперь у секционированной: индексы создаются на ней
+    for _, indexdef in indexes:
+        op.execute(indexdef)
+
+    # Ограничение заранее доказывает границу: ATTACH не сканирует таблицу повторно,
+    # а первичный ключ и совпадающие индексы старой таблицы подключаются к индексам родителя без перестройки
+    op.execute(f"ALTER TABLE {legacy} ADD CONSTRAINT {legacy}_bound CHECK (created_at < {_bound(boundary)})")
+    op.execute(f"ALTER TABLE {table} ATTACH PARTITION {legacy} FOR VALUES FROM (MINVALUE) TO ({_bound(boundary)})")
+    op.execute(f"ALTER TABLE {legacy} DROP CONSTRAINT {legacy}_bound")
+
+    for i in range(MONTHS_AHEAD + 1):
+        month = _add_months(boundary, i)
+        op.execute(
+            f"CREATE TABLE {table}_p{month:%Y_%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ({_bound(month)}) TO ({_bound(_add_months(month, 1))})"
+        )
+
+
+def _unpartition(table: str, columns: str) -> None:
+    bind = op.get_bind()
+    indexes = bind.execute(sa.text(
+        "SELECT indexdef FROM pg_indexes "
+        "WHERE schemaname = current_schema() AND tablename = :table AND indexname <> :pkey"
+    ), {"table": table, "pkey": f"{table}_pkey"}).scalars().all()
+    op.execute(
+        f"CREATE TABLE {table}_heap (LIKE {table} INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING CONSTRAINTS)"
+    )
+    op.execute(f"INSERT INTO {table}_heap ({columns}) SELECT {columns} FROM {table}")
+    op.execute(f"DROP TABLE {table}")
+    op.execute(f"ALTER TABLE {table}_heap RENAME TO {table}")
+    op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id)")
+    for indexdef in indexes:
+        # У индекса секционированной таблицы определение вида «ON ONLY table»
+        op.execute(indexdef.replace(" ON ONLY ", " ON ", 1))
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.get_context().autocommit_block():
+        _build_partition_key_index('leads')
+        _build_partition_key_index('insights')
+    # Внешний ключ на секционированную таблицу должен включать её ключ секционирования;
+    # связь инсайта с лидом поддерживает приложение (инсайт создаётся только для существующего лида).
+    # ON DELETE CASCADE пропадает вместе с ключом: ретенция удаляет партиции по их собственному
+    # created_at, поэтому инсайты лидов из удаляемой партиции `crm maintain-partitions` удаляет сам
+    op.drop_constraint('insights_lead_id_fkey', 'insights', type_='foreignkey')
+    boundary = _add_months(datetime.now(timezone.utc).date().replace(day=1), 1)
+    _partition('leads', boundary)
+    _partition('insights', boundary)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Обратный путь копирует строки в обычные таблицы
+    _unpartition('insights', INSIGHT_COLUMNS)
+    _unpartition('leads', LEAD_COLUMNS)
+    op.create_foreign_key(
+        'insights_lead_id_fkey', 'insights', 'leads', ['lead_id'], ['id'], ondelete='CASCADE'
+    )
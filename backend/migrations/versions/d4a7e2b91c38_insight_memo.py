@@ -0,0 +1,35 @@
+"""insight memo
+
+Revision ID: d4a7e2b91c38
+Revises: c3f9a61e0d57
+Create Date: 2025-10-10 09:12:44.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4a7e2b91c38'
+down_revision: Union[str, Sequence[str], None] = 'c3f9a61e0d57'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('insight_memo',
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('generator_version', sa.String(length=32), nullable=False),
+    sa.Column('result', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('content_hash', 'generator_version')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('insight_memo')
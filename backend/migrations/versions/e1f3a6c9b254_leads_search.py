@@ -0,0 +1,45 @@
+"""leads full-text and trigram search
+
+Revision ID: e1f3a6c9b254
+Revises: d4a7e2b91c38
+Create Date: 2025-10-13 11:04:27.390516
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f3a6c9b254'
+down_revision: Union[str, Sequence[str], None] = 'd4a7e2b91c38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    # Хранимая генерируемая колонка переписывает таблицу: на большой базе — в окно обслуживания
+    op.add_column('leads', sa.Column(
+        'note_tsv',
+        postgresql.TSVECTOR(),
+        sa.Computed("to_tsvector('russian'::regconfig, coalesce(note, ''))", persisted=True),
+        nullable=True,
+    ))
+    op.create_index('ix_leads_note_tsv', 'leads', ['note_tsv'], unique=False, postgresql_using='gin')
+    for column in ('email', 'phone', 'name'):
+        op.create_index(
+            f'ix_leads_{column}_trgm', 'leads', [column], unique=False,
+            postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'},
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for column in ('email', 'phone', 'name'):
+        op.drop_index(f'ix_leads_{column}_trgm', table_name='leads')
+    op.drop_index('ix_leads_note_tsv', table_name='leads')
+    op.drop_column('leads', 'note_tsv')
@@ -0,0 +1,47 @@
+"""leads normalized contacts
+
+Revision ID: f7a2c5d8e413
+Revises: e1f3a6c9b254
+Create Date: 2025-10-13 16:21:08.774102
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7a2c5d8e413'
+down_revision: Union[str, Sequence[str], None] = 'e1f3a6c9b254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('leads', sa.Column('email_normalized', sa.String(length=255), nullable=True))
+    op.add_column('leads', sa.Column('phone_normalized', sa.String(length=50), nullable=True))
+    # Существующие строки уже прошли ValidateLead (strip), остаётся регистр email и не-цифры телефона
+    op.execute(
+        "UPDATE leads SET "
+        "email_normalized = nullif(lower(btrim(email)), ''), "
+        "phone_normalized = nullif(regexp_replace(phone, '[^0-9]', '', 'g'), '') "
+        "WHERE email IS NOT NULL OR phone IS NOT NULL"
+    )
+    op.create_index(
+        'ix_leads_email_normalized', 'leads', ['email_normalized'], unique=False,
+        postgresql_where=sa.text('email_normalized IS NOT NULL'),
+    )
+    op.create_index(
+        'ix_leads_phone_normalized', 'leads', ['phone_normalized'], unique=False,
+        postgresql_where=sa.text('phone_normalized IS NOT NULL'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_leads_phone_normalized', table_name='leads')
+    op.drop_index('ix_leads_email_normalized', table_name='leads')
+    op.drop_column('leads', 'phone_normalized')
+    op.drop_column('leads', 'email_normalized')
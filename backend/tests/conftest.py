@@ -18,16 +18,32 @@ from dishka.integrations.fastapi import setup_dishka, DishkaRoute
 from config import PostgresConfig, Config, FastApiConfig, RabbitMqConfig
 from application.lead.interactors import (
     CreateLeadInteractor,
+    CreateLeadsBatchInteractor,
     GetLeadInteractor,
+    ImportLeadsInteractor,
+    ListLeadsInteractor,
+    SearchLeadsInteractor,
+    FindLeadsByContactInteractor,
+    ExportLeadsInteractor,
+    CreateInsightsBatchInteractor,
 )
 from application.lead import interfaces
 from infrastructure.db.repositories import (
     LeadRepository,
     KeysRepository,
+    InsightRepository,
+    InsightMemoRepository,
+    InsightRollupRepository,
+    PartitionRepository,
 )
+from infrastructure.generator import InsightGenerator
+from infrastructure.generator_executor import InlineInsightGenerator
+from infrastructure.insight_memo import InsightMemo, InsightMemoCache
+from infrastructure.cache import LeadCache, LRUCache
 from infrastructure.db import models
 from application.common_interfaces import DBSession
 from handlers.api.v1 import leads as leads_router
+from handlers.api.v1 import exceptions_handlers
 
 # --- Тестовый брокер (stub) ---
 class TestMessageBroker(interfaces.MessageBroker):
@@ -37,6 +53,9 @@ class TestMessageBroker(interfaces.MessageBroker):
     def publish(self, message: dict) -> None:
         self.messages.append(message)
 
+    def publish_many(self, messages: list[dict]) -> None:
+        self.messages.extend(messages)
+
 # --- Тестовый провайдер контекста ---
 class TestContextProvider(interfaces.ContextProvider):
     def __init__(self, request: Request):
@@ -57,6 +76,10 @@ class TestProviders(Provider):
         provides=interfaces.MessageBroker,
     )
 
+    @provide(scope=Scope.APP)
+    def lead_cache(self) -> interfaces.LeadCache:
+        return LeadCache(LRUCache())
+
     lead_repository = provide(
         LeadRepository,
         scope=Scope.REQUEST,
@@ -67,12 +90,47 @@ class TestProviders(Provider):
         scope=Scope.REQUEST,
         provides=interfaces.KeysRepository,
     )
+    partition_repository = provide(
+        PartitionRepository,
+        scope=Scope.REQUEST,
+        provides=interfaces.PartitionRepository,
+    )
 
     create_lead_interactor = provide(
         CreateLeadInteractor,
         scope=Scope.REQUEST,
         provides=CreateLeadInteractor,
     )
+    create_leads_batch_interactor = provide(
+        CreateLeadsBatchInteractor,
+        scope=Scope.REQUEST,
+        provides=CreateLeadsBatchInteractor,
+    )
+    import_leads_interactor = provide(
+        ImportLeadsInteractor,
+        scope=Scope.REQUEST,
+        provides=ImportLeadsInteractor,
+    )
+    list_leads_interactor = provide(
+        ListLeadsInteractor,
+        scope=Scope.REQUEST,
+        provides=ListLeadsInteractor,
+    )
+    search_leads_interactor = provide(
+        SearchLeadsInteractor,
+        scope=Scope.REQUEST,
+        provides=SearchLeadsInteractor,
+    )
+    find_leads_by_contact_interactor = provide(
+        FindLeadsByContactInteractor,
+        scope=Scope.REQUEST,
+        provides=FindLeadsByContactInteractor,
+    )
+    export_leads_interactor = provide(
+        ExportLeadsInteractor,
+        scope=Scope.REQUEST,
+        provides=ExportLeadsInteractor,
+    )
     get_lead_interactor = provide(
         GetLeadInteractor,
         scope=Scope.REQUEST,
@@ -154,6 +212,8 @@ class DummyMessageBroker(interfaces.MessageBroker):
         self.messages: list[dict] = []
     def publish(self, message: dict) -> None:
         self.messages.append(message)
+    def publish_many(self, messages: list[dict]) -> None:
+        self.messages.extend(messages)
 
 class StaticContext(interfaces.ContextProvider):
     def __init__(self, key: str):
@@ -174,7 +234,39 @@ def keys_repo(db_session: AsyncSession):
     return KeysRepository(db_session)
 
 @pytest.fixture
-def create_lead_interactor(lead_repo, keys_repo, message_broker, db_session):
+def lead_cache():
+    return LeadCache(LRUCache())
+
+@pytest.fixture
+def insight_repo(db_session: AsyncSession):
+    return InsightRepository(db_session)
+
+@pytest.fixture
+def insight_memo_cache():
+    return InsightMemoCache()
+
+@pytest.fixture
+def insight_memo(db_session: AsyncSession, insight_memo_cache):
+    return InsightMemo(insight_memo_cache, InsightMemoRepository(db_session))
+
+@pytest.fixture
+def insight_rollups(db_session: AsyncSession):
+    return InsightRollupRepository(db_session)
+
+@pytest.fixture
+def create_insights_batch_interactor(insight_repo, db_session, lead_cache, insight_memo, insight_rollups, lead_repo):
+    return CreateInsightsBatchInteractor(
+        insight_repo=insight_repo,
+        session=db_session,
+        InsightGenerator=InlineInsightGenerator(InsightGenerator()),
+        lead_cache=lead_cache,
+        memo=insight_memo,
+        rollups=insight_rollups,
+        lead_repo=lead_repo,
+    )
+
+@pytest.fixture
+def create_lead_interactor(lead_repo, keys_repo, message_broker, db_session, lead_cache):
     def _factory(idempotency_key: str):
         context = StaticContext(idempotency_key)
         return CreateLeadInteractor(
@@ -183,12 +275,25 @@ def create_lead_interactor(lead_repo, keys_repo, message_broker, db_session):
             message_broker=message_broker,
             session=db_session,  # DBSession протокол
             context=context,
+            lead_cache=lead_cache,
+        )
+    return _factory
+
+@pytest.fixture
+def create_leads_batch_interactor(lead_repo, keys_repo, message_broker, db_session):
+    def _factory(idempotency_key: str = ""):
+        return CreateLeadsBatchInteractor(
+            lead_repo=lead_repo,
+            keys_repo=keys_repo,
+            message_broker=message_broker,
+            session=db_session,
+            context=StaticContext(idempotency_key),
         )
     return _factory
 
 @pytest.fixture
-def get_lead_interactor(lead_repo):
-    return GetLeadInteractor(lead_repo)
+def get_lead_interactor(lead_repo, lead_cache):
+    return GetLeadInteractor(lead_repo, lead_cache)
 
 # --- FastAPI приложение для e2e ---
 @pytest.fixture(scope="session")
@@ -214,6 +319,8 @@ async def app(test_config: Config, session_maker):
     )
     app = FastAPI(title="test")
     app.router.route_class = DishkaRoute
+    for exc_type, handler in exceptions_handlers.all_handlers.items():
+        app.add_exception_handler(exc_type, handler)
     app.include_router(leads_router.router)
     setup_dishka(container, app)
     return app
@@ -1,4 +1,6 @@
+import json
 import pytest
+from sqlalchemy import text
 
 pytestmark = pytest.mark.e2e
 
@@ -18,8 +20,8 @@ async def test_create_and_get_lead(client):
         json={"note": "Первый лид", "email": "e@x.ru"},
         headers=headers,
     )
-    assert resp_dup.status_code == 200
-    assert resp_dup.json()["detail"] == "OK"
+    assert resp_dup.status_code == 201
+    assert resp_dup.json() == data
     get_resp = await client.get(f"/leads/{lead_id}")
     assert get_resp.status_code == 200
     got = get_resp.json()
@@ -31,3 +33,167 @@ async def test_validation_error(client):
     assert resp.status_code == 422
     body = resp.json()
     assert "note is required" in body["detail"]
+
+async def test_create_leads_batch(client):
+    resp = await client.post(
+        "/leads:batch",
+        json={"leads": [
+            {"note": "Пачка 1", "idempotency_key": "b-1"},
+            {"note": "Пачка 2", "email": "bad-email"},
+            {"note": "Пачка 3", "idempotency_key": "b-1"},
+        ]},
+    )
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert (body["created"], body["invalid"], body["duplicates"]) == (1, 1, 1)
+    assert [r["status"] for r in body["results"]] == ["created", "invalid", "duplicate"]
+    lead_id = body["results"][0]["lead"]["id"]
+    get_resp = await client.get(f"/leads/{lead_id}")
+    assert get_resp.json()["note"] == "Пачка 1"
+
+async def test_create_leads_batch_reports_missing_note_per_row(client):
+    resp = await client.post(
+        "/leads:batch",
+        json={"leads": [
+            {"note": "Пачка с пустыми 1"},
+            {"note": ""},
+            {"email": "no-note@x.ru"},
+            {"note": "  "},
+            {"note": "Пачка с пустыми 2"},
+        ]},
+    )
+    assert resp.status_code == 200, resp.text
+    body = resp.json()
+    assert (body["created"], body["invalid"], body["duplicates"]) == (2, 3, 0)
+    assert [r["status"] for r in body["results"]] == ["created", "invalid", "invalid", "invalid", "created"]
+    assert all("note is required" in r["error"] for r in body["results"] if r["status"] == "invalid")
+
+async def test_import_leads_ndjson(client):
+    body = "\n".join([
+        '{"note": "Импорт 1", "email": "i1@x.ru"}',
+        '{"note": "   "}',
+        'not json',
+        '{"note": "Импорт 2", "created_at": "2021-05-01T10:00:00+00:00"}',
+    ])
+    resp = await client.post(
+        "/leads:import",
+        content=body.encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert resp.status_code == 200, resp.text
+    summary = resp.json()
+    assert (summary["total"], summary["imported"], summary["rejected"]) == (4, 2, 2)
+    assert [r["line"] for r in summary["rejected_rows"]] == [2, 3]
+
+async def test_import_leads_rejects_created_at_without_partition(client, session_maker):
+    # Ретенция удалила партицию «до секционирования»: старым датам, как и слишком далёким, некуда лечь
+    async with session_maker() as session:
+        name, bound = (await session.execute(text(
+            "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = 'leads' AND c.relname LIKE 'leads\\_until\\_%'"
+        ))).one()
+        await session.execute(text(f"ALTER TABLE leads DETACH PARTITION {name}"))
+        await session.commit()
+    try:
+        body = "\n".join([
+            '{"note": "Старый", "created_at": "2001-01-01T00:00:00+00:00"}',
+            '{"note": "Сейчас"}',
+            '{"note": "Будущий", "created_at": "2150-01-01T00:00:00+00:00"}',
+        ])
+        resp = await client.post(
+            "/leads:import",
+            content=body.encode(),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+    finally:
+        async with session_maker() as session:
+            await session.execute(text(f"ALTER TABLE leads ATTACH PARTITION {name} {bound}"))
+            await session.commit()
+    assert resp.status_code == 200, resp.text
+    summary = resp.json()
+    assert (summary["total"], summary["imported"], summary["rejected"]) == (3, 1, 2)
+    assert summary["rejected_rows"] == [
+        {"line": 1, "error": "created_at outside retained range."},
+        {"line": 3, "error": "created_at outside retained range."},
+    ]
+
+async def test_import_leads_csv_requires_note_column(client):
+    resp = await client.post(
+        "/leads:import",
+        content="email\na@b.co\n".encode(),
+        headers={"Content-Type": "text/csv"},
+    )
+    assert resp.status_code == 422
+
+async def test_list_leads_keyset(client):
+    for i in range(5):
+        resp = await client.post("/leads", json={"note": f"Список {i}", "source": "listing"})
+        assert resp.status_code == 201
+    seen = []
+    cursor = None
+    while True:
+        params = {"source": "listing", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = (await client.get("/leads", params=params)).json()
+        seen.extend(item["note"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert sorted(seen) == [f"Список {i}" for i in range(5)]
+
+async def test_list_leads_bad_cursor(client):
+    resp = await client.get("/leads", params={"cursor": "garbage"})
+    assert resp.status_code == 422
+
+async def test_search_leads_by_note_and_contact(client):
+    await client.post("/leads", json={"note": "Нужны лицензии для отдела продаж", "email": "anna@acme.io"})
+    await client.post("/leads", json={"note": "Купили лицензию, вопрос по оплате", "name": "Пётр Лицензин"})
+    await client.post("/leads", json={"note": "Просто вопрос", "email": "boris@other.org"})
+
+    by_word = (await client.get("/leads/search", params={"q": "лицензия"})).json()
+    assert len(by_word["items"]) == 2
+    by_email = (await client.get("/leads/search", params={"q": "acme"})).json()
+    assert [item["email"] for item in by_email["items"]] == ["anna@acme.io"]
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"q": "вопрос", "limit": 1}
+        if cursor:
+            params["cursor"] = cursor
+        page = (await client.get("/leads/search", params=params)).json()
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert len(seen) == len(set(seen)) == 2
+
+async def test_search_leads_rejects_short_query(client):
+    resp = await client.get("/leads/search", params={"q": "ab"})
+    assert resp.status_code == 422
+
+async def test_lookup_leads_by_normalized_contacts(client):
+    first = (await client.post("/leads", json={"note": "Первый", "email": "Lookup@Acme.io", "phone": "79001112233"})).json()
+    second = (await client.post("/leads", json={"note": "Второй", "email": "lookup@acme.io"})).json()
+
+    resp = await client.post("/leads:lookup", json={
+        "emails": [" LOOKUP@acme.io ", "missing@acme.io"],
+        "phones": ["+7 (900) 111-22-33", "---"],
+    })
+    assert resp.status_code == 200
+    body = resp.json()
+    assert body["emails"] == {" LOOKUP@acme.io ": [first["id"], second["id"]], "missing@acme.io": []}
+    assert body["phones"] == {"+7 (900) 111-22-33": [first["id"]], "---": []}
+
+async def test_export_leads_ndjson(client):
+    created = await client.post("/leads", json={"note": "Экспорт", "source": "export"})
+    lead_id = created.json()["id"]
+    resp = await client.get("/leads:export")
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in resp.text.splitlines() if line]
+    exported = next(row for row in rows if row["id"] == lead_id)
+    assert exported["note"] == "Экспорт"
+    assert exported["insights"] == []
@@ -1,6 +1,20 @@
+from datetime import datetime, timedelta, timezone
+
 import pytest
-from application.lead.dto import LeadCreateInDTO
+from sqlalchemy import text
+from application.lead.dto import (
+    LeadCreateInDTO,
+    LeadBatchItemInDTO,
+    LeadBatchStatus,
+    InsighCreateInDto,
+    InsightBatchStatus,
+    InsightAnalyticsDimension,
+    InsightAnalyticsFilterDTO,
+)
 from application.lead import exceptions
+from application.lead.interactors import CreateLeadInteractor, PurgeIdempotencyKeysInteractor
+from infrastructure.queue.outbox import OutboxMessageBroker, OutboxRelay
+from tests.conftest import StaticContext
 
 pytestmark = pytest.mark.integration
 
@@ -32,10 +46,172 @@ async def test_idempotency(create_lead_interactor):
     key = "static-key"
     dto = await _create(create_lead_interactor, key, payload)
     assert dto.note == payload["note"]
-    with pytest.raises(exceptions.LeadAlreadyExistsException):
+    with pytest.raises(exceptions.LeadAlreadyExistsException) as exc_info:
         await _create(create_lead_interactor, key, payload)
+    assert exc_info.value.response["id"] == str(dto.id)
+
+async def test_purge_idempotency_keys(create_lead_interactor, keys_repo, db_session):
+    await _create(create_lead_interactor, "old-key", {"note": "Старый"})
+    future = datetime.now(timezone.utc) + timedelta(hours=1)
+    purge = PurgeIdempotencyKeysInteractor(keys_repo, db_session)
+    assert await purge.purge(future, batch_size=1) == 1
+    assert await keys_repo.get_responses(["old-key"]) == {}
 
 async def test_invalid_lead(create_lead_interactor):
     payload = {"note": "   "}  
     with pytest.raises(exceptions.InvalidLeadDataException):
         await _create(create_lead_interactor, "inv-key", payload)
+
+async def test_create_leads_batch(create_leads_batch_interactor, get_lead_interactor, message_broker):
+    items = [
+        LeadBatchItemInDTO(lead=LeadCreateInDTO(note="Лид 1"), idempotency_key="row-1"),
+        LeadBatchItemInDTO(lead=LeadCreateInDTO(note="   ")),
+        LeadBatchItemInDTO(lead=LeadCreateInDTO(note="Лид 1 повтор"), idempotency_key="row-1"),
+        LeadBatchItemInDTO(lead=LeadCreateInDTO(note="Лид 2", email="a@b.co")),
+    ]
+    results = await create_leads_batch_interactor("batch-key").create_leads(items)
+    assert [r.status for r in results] == [
+        LeadBatchStatus.CREATED,
+        LeadBatchStatus.INVALID,
+        LeadBatchStatus.DUPLICATE,
+        LeadBatchStatus.CREATED,
+    ]
+    assert len(message_broker.messages) == 2
+    fetched = await get_lead_interactor.get_lead(str(results[3].lead.id))
+    assert fetched.email == "a@b.co"
+
+    assert results[2].lead.id == results[0].lead.id
+
+    again = await create_leads_batch_interactor("batch-key").create_leads(
+        [LeadBatchItemInDTO(lead=LeadCreateInDTO(note="Лид 1"), idempotency_key="row-1")]
+    )
+    assert again[0].status == LeadBatchStatus.DUPLICATE
+    assert again[0].lead.id == results[0].lead.id
+
+async def test_create_insights_batch(
+    create_lead_interactor, create_insights_batch_interactor, get_lead_interactor, db_session
+):
+    lead = await _create(create_lead_interactor, "insight-batch", {"note": "Хочу купить"})
+    lead_id = str(lead.id)
+    items = [
+        InsighCreateInDto(content="Хочу купить", lead_id=lead_id, content_hash="h1"),
+        InsighCreateInDto(content="Хочу купить", lead_id=lead_id, content_hash="h1"),
+        InsighCreateInDto(content="  ", lead_id=lead_id, content_hash="h2"),
+        InsighCreateInDto(content="Ещё заметка", lead_id=lead_id, content_hash="h3"),
+    ]
+    results = await create_insights_batch_interactor.create_insights(items)
+    assert [r.status for r in results] == [
+        InsightBatchStatus.CREATED,
+        InsightBatchStatus.DUPLICATE,
+        InsightBatchStatus.INVALID,
+        InsightBatchStatus.CREATED,
+    ]
+    db_session.expire_all()
+    fetched = await get_lead_interactor.get_lead(lead_id)
+    assert sorted(i.content_hash for i in fetched.insights) == ["h1", "h3"]
+
+    again = await create_insights_batch_interactor.create_insights(
+        [InsighCreateInDto(content="Хочу купить", lead_id=lead_id, content_hash="h1")]
+    )
+    assert again[0].status == InsightBatchStatus.DUPLICATE
+
+async def test_insight_memo_reuses_classification(
+    create_lead_interactor, create_insights_batch_interactor, insight_memo_cache, insight_memo
+):
+    first = await _create(create_lead_interactor, "memo-1", {"note": "Шаблон формы"})
+    second = await _create(create_lead_interactor, "memo-2", {"note": "Шаблон формы"})
+    await create_insights_batch_interactor.create_insights(
+        [InsighCreateInDto(content="Шаблон формы", lead_id=str(first.id), content_hash="tpl")]
+    )
+    await create_insights_batch_interactor.create_insights(
+        [InsighCreateInDto(content="Шаблон формы", lead_id=str(second.id), content_hash="tpl")]
+    )
+    assert insight_memo_cache.stats()["local_hits"] == 1
+    version = create_insights_batch_interactor.InsightGenerator.version
+    assert await insight_memo.purge_stale(version) == 0
+    assert await insight_memo.purge_stale(version + "-next") == 1
+
+async def test_insight_rollups_match_rebuild(
+    create_lead_interactor, create_insights_batch_interactor, insight_rollups, db_session
+):
+    web = await _create(create_lead_interactor, "rollup-1", {"note": "Хочу купить", "source": "web"})
+    other = await _create(create_lead_interactor, "rollup-2", {"note": "Хочу купить"})
+    await create_insights_batch_interactor.create_insights([
+        InsighCreateInDto(content="Хочу купить", lead_id=str(web.id), content_hash="r1"),
+        InsighCreateInDto(content="Хочу купить ещё", lead_id=str(web.id), content_hash="r2"),
+    ])
+    await create_insights_batch_interactor.create_insights(
+        [InsighCreateInDto(content="Хочу купить", lead_id=str(other.id), content_hash="r1")]
+    )
+    filters = InsightAnalyticsFilterDTO(group_by=[InsightAnalyticsDimension.SOURCE])
+    incremental = await insight_rollups.query(filters)
+    assert [(r.key, r.insights, r.leads) for r in incremental] == [
+        ({"source": None}, 1, 1),
+        ({"source": "web"}, 2, 1),
+    ]
+    total = await insight_rollups.query(InsightAnalyticsFilterDTO())
+    assert (total[0].insights, total[0].leads) == (3, 2)
+
+    await insight_rollups.rebuild(None)
+    await db_session.commit()
+    assert await insight_rollups.query(filters) == incremental
+
+async def test_claim_check_insights_load_notes_from_leads(
+    create_lead_interactor, create_insights_batch_interactor, get_lead_interactor, db_session
+):
+    lead = await _create(create_lead_interactor, "claim-check", {"note": "Пришлите счёт на оплату"})
+    lead_id = str(lead.id)
+    missing = "00000000-0000-0000-0000-000000000000"
+    results = await create_insights_batch_interactor.create_insights([
+        InsighCreateInDto(content=None, lead_id=lead_id, content_hash="cc1"),
+        InsighCreateInDto(content=None, lead_id=missing, content_hash="cc2"),
+    ])
+    assert [r.status for r in results] == [InsightBatchStatus.CREATED, InsightBatchStatus.INVALID]
+    db_session.expire_all()
+    fetched = await get_lead_interactor.get_lead(lead_id)
+    assert [i.content_hash for i in fetched.insights] == ["cc1"]
+
+async def test_insights_for_missing_leads_are_not_inserted(
+    create_lead_interactor, create_insights_batch_interactor, db_session
+):
+    # Внешнего ключа нет: ни memo-попадание, ни текст в сообщении не создают инсайт без лида
+    lead = await _create(create_lead_interactor, "orphan-check", {"note": "Хочу купить"})
+    missing = "00000000-0000-0000-0000-000000000001"
+    results = await create_insights_batch_interactor.create_insights([
+        InsighCreateInDto(content="Хочу купить", lead_id=str(lead.id), content_hash="oc1"),
+        InsighCreateInDto(content="Хочу купить", lead_id=missing, content_hash="oc1"),
+        InsighCreateInDto(content="Другой текст", lead_id=missing, content_hash="oc2"),
+    ])
+    assert [r.status for r in results] == [
+        InsightBatchStatus.CREATED, InsightBatchStatus.INVALID, InsightBatchStatus.INVALID,
+    ]
+    orphans = await db_session.execute(text("SELECT count(*) FROM insights WHERE lead_id = :id"), {"id": missing})
+    assert orphans.scalar_one() == 0
+
+class _ConfirmingPublisher:
+    def __init__(self):
+        self.published: list[tuple[str, dict]] = []
+
+    async def publish_and_confirm(self, messages, routing_key=None):
+        self.published.extend((routing_key, m) for m in messages)
+
+async def test_outbox_relay(lead_repo, keys_repo, db_session, session_maker, lead_cache):
+    outbox_broker = OutboxMessageBroker(db_session)
+    interactor = CreateLeadInteractor(
+        lead_repo=lead_repo,
+        keys_repo=keys_repo,
+        message_broker=outbox_broker,
+        session=db_session,
+        context=StaticContext("outbox-key"),
+        lead_cache=lead_cache,
+    )
+    dto = await interactor.create_lead(LeadCreateInDTO(note="Через outbox"))
+
+    publisher = _ConfirmingPublisher()
+    relay = OutboxRelay(session_maker, publisher, batch_size=10)
+    assert await relay.drain_once() == 1
+    assert await relay.drain_once() == 0
+    routing_key, payload = publisher.published[0]
+    assert routing_key == "lead.created"
+    assert payload["lead_id"] == str(dto.id)
+    assert payload["content"] == "Через outbox"
@@ -0,0 +1,70 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from application.lead.dto import LeadOutDTO
+from infrastructure.cache import LeadCache, LRUCache
+
+pytestmark = pytest.mark.unit
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    def __call__(self) -> float:
+        return self.now
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+def test_lru_expires_entries():
+    clock = FakeClock()
+    cache = LRUCache(max_size=10, ttl_seconds=5, clock=clock)
+    cache.set("a", 1)
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5.0
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["expirations"]) == (1, 1, 1)
+
+class FakeSharedTier:
+    def __init__(self):
+        self.data: dict[str, bytes] = {}
+    async def get(self, key):
+        return self.data.get(key)
+    async def set(self, key, value, ttl_seconds):
+        self.data[key] = value
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+class RecordingBroker:
+    def __init__(self):
+        self.messages = []
+    def publish(self, message):
+        self.messages.append(message)
+    def publish_many(self, messages):
+        self.messages.extend(messages)
+
+async def test_lead_cache_tiers_and_invalidation():
+    shared, broker = FakeSharedTier(), RecordingBroker()
+    writer = LeadCache(LRUCache(), shared=shared, invalidation_broker=broker)
+    reader = LeadCache(LRUCache(), shared=shared)
+    lead = LeadOutDTO(id=uuid.uuid4(), note="n", created_at=datetime.now(timezone.utc))
+    lead_id = str(lead.id)
+
+    await writer.set(lead)
+    from_shared = await reader.get(lead_id)
+    assert from_shared == lead
+    assert reader.stats()["shared"]["hits"] == 1
+
+    await writer.invalidate([lead_id])
+    assert broker.messages == [{"lead_id": lead_id}]
+    reader.evict_local(lead_id)
+    assert await reader.get(lead_id) is None
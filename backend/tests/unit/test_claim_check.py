@@ -0,0 +1,25 @@
+import pytest
+from infrastructure.queue.codec import MessageSerializer
+from infrastructure.queue.outbox import ClaimCheckMessageBroker
+
+pytestmark = pytest.mark.unit
+
+class ListBroker:
+    def __init__(self):
+        self.published: list[dict] = []
+
+    def publish(self, message):
+        self.published.append(message)
+
+    def publish_many(self, messages):
+        self.published.extend(messages)
+
+def test_claim_check_message_size_does_not_depend_on_note():
+    inner = ListBroker()
+    broker = ClaimCheckMessageBroker(inner)
+    message = {"lead_id": "1", "content_hash": "h", "occurred_at": "2025-01-01T00:00:00+00:00"}
+    broker.publish({**message, "content": "x"})
+    broker.publish_many([{**message, "content": "заметка " * 5000}])
+    assert inner.published == [message, message]
+    serializer = MessageSerializer()
+    assert len({len(serializer.encode(m).body) for m in inner.published}) == 1
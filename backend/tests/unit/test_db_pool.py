@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+from infrastructure.db.database import PoolWaitTimingMixin
+
+pytestmark = pytest.mark.unit
+
+class FakeDBAPIConnection:
+    def rollback(self):
+        pass
+    def close(self):
+        pass
+
+class TimedQueuePool(PoolWaitTimingMixin, QueuePool):
+    pass
+
+def test_pool_counts_checkouts_and_timeouts():
+    pool = TimedQueuePool(FakeDBAPIConnection, pool_size=1, max_overflow=0, timeout=0.01)
+    conn = pool.connect()
+    with pytest.raises(exc.TimeoutError):
+        pool.connect()
+    conn.close()
+    pool.connect().close()
+    assert pool.wait_stats.checkouts == 2
+    assert pool.wait_stats.timeouts == 1
+    assert pool.wait_stats.wait_seconds_max >= 0.0
+
+def test_pool_recreate_keeps_instrumentation():
+    pool = TimedQueuePool(FakeDBAPIConnection, pool_size=2)
+    assert isinstance(pool.recreate().wait_stats.checkouts, int)
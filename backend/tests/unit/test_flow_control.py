@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from handlers.rabbitmq.flow_control import AdaptiveFlowController, ConcurrencyLimiter
+
+pytestmark = pytest.mark.unit
+
+class FakePool:
+    def __init__(self):
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.timeouts = 0
+
+    def stats(self):
+        return {"checkouts": self.checkouts, "wait_seconds_total": self.wait_total, "timeouts": self.timeouts}
+
+    def checkout(self, count, wait):
+        self.checkouts += count
+        self.wait_total += count * wait
+
+async def window(flow: AdaptiveFlowController, latency: float, messages: int = 10, saturated: bool = True):
+    for _ in range(messages):
+        await flow.acquire()
+        flow.release(latency)
+    if saturated:
+        flow._saturated = True
+
+async def test_limiter_applies_new_limit_to_waiters():
+    limiter = ConcurrencyLimiter(1)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.waiting == 1
+
+    limiter.set_limit(2)
+    await asyncio.wait_for(waiter, 1)
+    assert limiter.active == 2
+
+    # Уменьшение не отбирает слоты у начатых, но не пускает новых до освобождения
+    limiter.set_limit(1)
+    third = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    limiter.release()
+    await asyncio.sleep(0)
+    assert not third.done()
+    limiter.release()
+    await asyncio.wait_for(third, 1)
+    assert limiter.active == 1
+
+async def test_controller_converges_under_pool_pressure():
+    pool = FakePool()
+    applied: list[int] = []
+
+    async def apply_prefetch(prefetch):
+        applied.append(prefetch)
+
+    flow = AdaptiveFlowController(4, min_limit=2, max_limit=32, pool_wait_threshold=0.005, pool_stats=pool.stats)
+    flow._apply_prefetch = apply_prefetch
+
+    # Пул свободен, сообщения ждут слота — предел растёт
+    for _ in range(5):
+        await window(flow, 0.01)
+        pool.checkout(10, 0.0)
+        await flow.adjust()
+    grown = flow.limiter.limit
+    assert grown > 4
+    assert applied[-1] == flow.prefetch == grown * 2
+
+    # Соединения из пула ждут дольше порога — мультипликативное снижение
+    await window(flow, 0.01)
+    pool.checkout(10, 0.05)
+    await flow.adjust()
+    assert flow.limiter.limit == int(grown * 0.75)
+    assert flow.stats()["pool_wait_ms"] == pytest.approx(50.0)
+
+    # Задержка обработки выросла относительно базовой — тоже снижение
+    reduced = flow.limiter.limit
+    await window(flow, 0.05)
+    pool.checkout(10, 0.0)
+    await flow.adjust()
+    assert flow.limiter.limit < reduced
+    assert flow.stats()["decreases"] == 2
+
+    # Без насыщения предел не трогаем; ниже минимума не опускаемся
+    current = flow.limiter.limit
+    await window(flow, 0.01, saturated=False)
+    await flow.adjust()
+    assert flow.limiter.limit == current
+    for _ in range(10):
+        await window(flow, 0.01)
+        pool.timeouts += 1
+        await flow.adjust()
+    assert flow.limiter.limit == 2
@@ -0,0 +1,27 @@
+import pytest
+from infrastructure.generator import InsightGenerator
+
+pytestmark = pytest.mark.unit
+
+NOTES = [
+    "Хочу купить 100 штук, пришлите цену срочно",
+    "У меня не работает вход, ошибка пароля",
+    "Казино онлайн, выиграй миллион http://example.com",
+    "Отправляю резюме на вакансию backend-разработчика",
+    "Первый контакт",
+]
+
+def test_classifies_by_keywords():
+    results = InsightGenerator().gen_many(NOTES)
+    assert [r["intent"] for r in results] == ["buy", "support", "spam", "job", "other"]
+    assert results[0]["priority"] == "P0" and results[0]["next_action"] == "call"
+    assert "urgent" in results[0]["tags"]
+    assert results[2]["next_action"] == "ignore"
+    assert results[4]["tags"] == []
+
+def test_is_deterministic_and_batch_matches_single():
+    generator = InsightGenerator()
+    batch = generator.gen_many(NOTES)
+    assert batch == generator.gen_many(NOTES)
+    assert batch == [generator.gen(note) for note in NOTES]
+    assert all(0.0 <= r["confidence"] <= 1.0 for r in batch)
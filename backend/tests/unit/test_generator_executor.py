@@ -0,0 +1,27 @@
+import pytest
+from infrastructure.generator import InsightGenerator
+from infrastructure.generator_executor import InlineInsightGenerator, ProcessPoolInsightGenerator
+
+pytestmark = pytest.mark.unit
+
+NOTES = ["Хочу купить, пришлите цену", "Ошибка входа", "Резюме на вакансию"] * 50
+
+async def test_process_pool_matches_inline_and_records_timing():
+    pool = ProcessPoolInsightGenerator(processes=2, max_queue=2, min_chunk=16)
+    try:
+        results = await pool.gen_many(NOTES)
+        assert results == InsightGenerator().gen_many(NOTES)
+        assert await pool.gen(NOTES[0]) == results[0]
+        stats = pool.stats()
+        assert stats["items"] == len(NOTES) + 1
+        assert stats["tasks"] >= 2
+        assert stats["compute_seconds_total"] > 0
+        assert stats["in_flight"] == 0
+    finally:
+        pool.close()
+
+async def test_inline_generator_counts_items():
+    inline = InlineInsightGenerator(InsightGenerator())
+    assert await inline.gen_many([]) == []
+    await inline.gen_many(NOTES)
+    assert inline.stats()["items"] == len(NOTES)
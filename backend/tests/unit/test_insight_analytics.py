@@ -0,0 +1,38 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from application.lead.dto import InsightAnalyticsFilterDTO
+from application.lead.exceptions import InvalidAnalyticsFilterException
+from application.lead.interactors import GetInsightAnalyticsInteractor
+
+pytestmark = pytest.mark.unit
+
+class RecordingRollups:
+    def __init__(self):
+        self.filters: list[InsightAnalyticsFilterDTO] = []
+
+    async def query(self, filters):
+        self.filters.append(filters)
+        return []
+
+@pytest.mark.parametrize("bound", [
+    datetime(2025, 11, 3, 10, 30, tzinfo=timezone.utc),
+    datetime(2025, 11, 3, 10, 0, 0, 1),
+    datetime(2025, 11, 3, 10, 0, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+])
+async def test_bounds_inside_an_hour_are_rejected(bound):
+    rollups = RecordingRollups()
+    interactor = GetInsightAnalyticsInteractor(rollups)
+    with pytest.raises(InvalidAnalyticsFilterException):
+        await interactor.get_analytics(InsightAnalyticsFilterDTO(created_from=bound))
+    with pytest.raises(InvalidAnalyticsFilterException):
+        await interactor.get_analytics(InsightAnalyticsFilterDTO(created_to=bound))
+    assert rollups.filters == []
+
+async def test_hour_aligned_bounds_reach_rollups():
+    rollups = RecordingRollups()
+    await GetInsightAnalyticsInteractor(rollups).get_analytics(InsightAnalyticsFilterDTO(
+        created_from=datetime(2025, 11, 3, 10),
+        created_to=datetime(2025, 11, 3, 15, tzinfo=timezone(timedelta(hours=3))),
+    ))
+    assert len(rollups.filters) == 1
@@ -0,0 +1,48 @@
+import pytest
+from infrastructure.insight_memo import InsightMemo, InsightMemoCache
+
+pytestmark = pytest.mark.unit
+
+class InMemoryMemoRepository:
+    def __init__(self):
+        self.rows: dict[tuple[str, str], dict] = {}
+
+    async def get_many(self, version, content_hashes):
+        return {h: self.rows[(version, h)] for h in content_hashes if (version, h) in self.rows}
+
+    async def put_many(self, version, results):
+        for h, r in results.items():
+            self.rows.setdefault((version, h), r)
+
+    async def delete_other_versions(self, version):
+        stale = [k for k in self.rows if k[0] != version]
+        for k in stale:
+            del self.rows[k]
+        return len(stale)
+
+RESULT = {"intent": "buy", "priority": "P1", "next_action": "call", "confidence": 0.9, "tags": ["pricing"]}
+
+async def test_local_then_db_hits_and_version_isolation():
+    repo = InMemoryMemoRepository()
+    cache = InsightMemoCache()
+    memo = InsightMemo(cache, repo)
+    assert await memo.get_many("v1", ["a"]) == {}
+    await memo.put_many("v1", {"a": RESULT})
+    assert await memo.get_many("v1", ["a"]) == {"a": RESULT}
+
+    # Другой процесс: пустой LRU, запись находится в таблице
+    other = InsightMemo(InsightMemoCache(), repo)
+    assert await other.get_many("v1", ["a"]) == {"a": RESULT}
+    assert await other.get_many("v2", ["a"]) == {}
+
+    stats = cache.stats()
+    assert (stats["local_hits"], stats["db_hits"], stats["misses"]) == (1, 0, 1)
+    assert await memo.purge_stale("v2") == 1
+
+async def test_returned_results_are_copies():
+    memo = InsightMemo(InsightMemoCache(), InMemoryMemoRepository())
+    await memo.put_many("v1", {"a": RESULT})
+    got = (await memo.get_many("v1", ["a"]))["a"]
+    got["content_hash"] = "a"
+    got["tags"].append("x")
+    assert (await memo.get_many("v1", ["a"]))["a"] == RESULT
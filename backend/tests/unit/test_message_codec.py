@@ -0,0 +1,43 @@
+import json
+import uuid
+import zlib
+
+import config
+import pytest
+from infrastructure.queue.codec import MessageSerializer, UnsupportedMessageFormat, decode_message
+from pydantic import ValidationError
+
+pytestmark = pytest.mark.unit
+
+def test_legacy_json_messages_still_decode():
+    message = {"lead_id": str(uuid.uuid4()), "content_hash": "h", "content": "Хочу купить"}
+    body = json.dumps(message, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+    assert decode_message(body, "application/json") == message
+    assert decode_message(body, None) == message
+
+def test_large_bodies_are_compressed_small_are_not():
+    serializer = MessageSerializer("json", compress_threshold=256)
+    lead_id = uuid.uuid4()
+    small = serializer.encode({"lead_id": lead_id, "content": "коротко"})
+    assert small.content_encoding is None
+    assert decode_message(small.body, small.content_type) == {"lead_id": str(lead_id), "content": "коротко"}
+
+    note = "пришлите счёт на оплату " * 200
+    large = serializer.encode({"lead_id": lead_id, "content": note})
+    assert large.content_encoding == "deflate"
+    assert len(large.body) < len(note.encode()) // 4
+    assert decode_message(large.body, large.content_type, large.content_encoding)["content"] == note
+
+def test_unknown_formats_are_rejected():
+    with pytest.raises(UnsupportedMessageFormat):
+        decode_message(zlib.compress(b"{}"), "application/json", "br")
+    with pytest.raises(UnsupportedMessageFormat):
+        decode_message(b"{}", "text/plain")
+    with pytest.raises(UnsupportedMessageFormat):
+        MessageSerializer("xml")
+
+def test_msgpack_codec_without_package_fails_at_config(monkeypatch):
+    monkeypatch.setattr(config, "find_spec", lambda name: None)
+    with pytest.raises(ValidationError):
+        config.RabbitMqConfig(RABBITMQ_MESSAGE_CODEC="msgpack")
+    assert config.RabbitMqConfig(RABBITMQ_MESSAGE_CODEC="json").message_codec == "json"
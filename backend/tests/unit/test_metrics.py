@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from metrics import Registry, instrument_methods, register_stats_gauge, start_metrics_server, timed
+
+pytestmark = pytest.mark.unit
+
+def test_histogram_renders_cumulative_buckets():
+    registry = Registry()
+    histogram = registry.histogram("op_seconds", "Op latency", ["op"], buckets=(0.1, 1.0))
+    histogram.labels("get").observe(0.05)
+    histogram.labels("get").observe(0.5)
+    histogram.labels("get").observe(5.0)
+    text = registry.render()
+    assert '# TYPE op_seconds histogram' in text
+    assert 'op_seconds_bucket{op="get",le="0.1"} 1' in text
+    assert 'op_seconds_bucket{op="get",le="1.0"} 2' in text
+    assert 'op_seconds_bucket{op="get",le="+Inf"} 3' in text
+    assert 'op_seconds_count{op="get"} 3' in text
+
+def test_counter_and_stats_gauge():
+    registry = Registry()
+    registry.counter("events", "Events", ["kind"]).labels(kind='a"b').inc(2)
+    register_stats_gauge("pool", "Pool", lambda: {"size": 5, "mode": "x", "local": {"hits": 3}}, registry)
+    text = registry.render()
+    assert 'events_total{kind="a\\"b"} 2.0' in text
+    assert 'pool{stat="size"} 5.0' in text
+    assert 'pool{stat="local.hits"} 3.0' in text
+    assert "mode" not in text
+
+async def test_timed_labels_outcome_by_exception():
+    registry = Registry()
+    histogram = registry.histogram("calls", "Calls", ["component", "method", "outcome"])
+
+    @instrument_methods(histogram, "Repo")
+    class Repo:
+        async def ok(self):
+            return 1
+
+        async def fail(self):
+            raise KeyError("x")
+
+        async def rows(self):
+            yield 1
+            yield 2
+
+    repo = Repo()
+    assert await repo.ok() == 1
+    with pytest.raises(KeyError):
+        await repo.fail()
+    assert [r async for r in repo.rows()] == [1, 2]
+    assert histogram.labels("Repo", "ok", "ok").count == 1
+    assert histogram.labels("Repo", "fail", "KeyError").count == 1
+    assert histogram.labels("Repo", "rows", "ok").count == 1
+
+    plain = timed(histogram, "fn", "call")(Repo.ok.__wrapped__)
+    await plain(repo)
+    assert histogram.labels("fn", "call", "ok").count == 1
+
+async def test_metrics_server_serves_registry():
+    registry = Registry()
+    registry.counter("hits", "Hits").inc()
+    server = await start_metrics_server("127.0.0.1", 0, registry)
+    port = server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /metrics HTTP/1.1\r\nHost: x\r\n\r\n")
+        await writer.drain()
+        response = (await reader.read()).decode()
+        writer.close()
+    finally:
+        server.close()
+        await server.wait_closed()
+    assert response.startswith("HTTP/1.1 200 OK")
+    assert "hits_total 1.0" in response
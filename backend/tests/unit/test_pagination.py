@@ -0,0 +1,31 @@
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+from application.lead import pagination
+from application.lead.exceptions import InvalidCursorException
+
+pytestmark = pytest.mark.unit
+
+def test_cursor_roundtrip():
+    created_at = datetime(2025, 10, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    lead_id = uuid.uuid4()
+    cursor = pagination.encode_cursor(created_at, lead_id)
+    assert pagination.decode_cursor(cursor) == (created_at, lead_id)
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "bnVsbA", "WyJ4IiwieSJd"])
+def test_cursor_malformed(cursor):
+    with pytest.raises(InvalidCursorException):
+        pagination.decode_cursor(cursor)
+
+def test_search_cursor_roundtrip_keeps_float4_rank():
+    # rank приходит из Postgres как float4: курсор должен вернуть то же значение бит в бит
+    rank = 0.10000000149011612
+    lead_id = uuid.uuid4()
+    cursor = pagination.encode_search_cursor(rank, lead_id)
+    assert pagination.decode_search_cursor(cursor) == (rank, lead_id)
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", "WyJ4IiwieSJd", "W3RydWUsIngiXQ"])
+def test_search_cursor_malformed(cursor):
+    with pytest.raises(InvalidCursorException):
+        pagination.decode_search_cursor(cursor)
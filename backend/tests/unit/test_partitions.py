@@ -0,0 +1,112 @@
+from datetime import date, datetime, timezone
+
+import pytest
+from application.lead.dto import PartitionDTO
+from application.lead.interactors import MaintainPartitionsInteractor
+from handlers.partitions import ensure_partitions
+
+pytestmark = pytest.mark.unit
+
+class InMemoryPartitionRepository:
+    def __init__(self, partitions: dict[str, list[PartitionDTO]]):
+        self.partitions = partitions
+        self.log: list[str] = []
+
+    async def list_partitions(self, table):
+        return list(self.partitions[table])
+
+    async def create_partition(self, table, month):
+        name = f"{table}_p{month:%Y_%m}"
+        upper = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        self.partitions[table].append(PartitionDTO(name=name, lower=month, upper=upper))
+        self.log.append(f"create {name}")
+        return name
+
+    async def drop_partition(self, table, name):
+        self.partitions[table] = [p for p in self.partitions[table] if p.name != name]
+        self.log.append(f"drop {name}")
+
+    async def delete_insights_of_leads(self, name):
+        self.log.append(f"delete insights of {name}")
+        return [LATE_INSIGHT_HOUR]
+
+class RecordingRollups:
+    def __init__(self, log: list[str]):
+        self.log = log
+
+    async def refresh(self, hours):
+        self.log.append(f"refresh rollups {[h.isoformat() for h in hours]}")
+
+    async def delete_before(self, bound):
+        self.log.append(f"delete rollups before {bound.date()}")
+        return 3
+
+LATE_INSIGHT_HOUR = datetime(2025, 12, 1, 9, tzinfo=timezone.utc)
+
+class NullSession:
+    async def commit(self):
+        pass
+
+    async def rollback(self):
+        pass
+
+def _layout(table: str) -> list[PartitionDTO]:
+    return [
+        PartitionDTO(name=f"{table}_until_2025_11", lower=None, upper=date(2025, 11, 1)),
+        PartitionDTO(name=f"{table}_p2025_11", lower=date(2025, 11, 1), upper=date(2025, 12, 1)),
+    ]
+
+async def test_creates_missing_months_only():
+    repo = InMemoryPartitionRepository({"leads": _layout("leads"), "insights": _layout("insights")})
+    report = await MaintainPartitionsInteractor(repo, NullSession(), RecordingRollups(repo.log)).maintain(2, 0, today=date(2025, 11, 20))
+    assert report.created == ["leads_p2025_12", "leads_p2026_01", "insights_p2025_12", "insights_p2026_01"]
+    assert report.dropped == []
+
+    again = await MaintainPartitionsInteractor(repo, NullSession(), RecordingRollups(repo.log)).maintain(2, 0, today=date(2025, 11, 20))
+    assert again.created == []
+
+async def test_retention_drops_whole_partitions_insights_first():
+    repo = InMemoryPartitionRepository({"leads": _layout("leads"), "insights": _layout("insights")})
+    report = await MaintainPartitionsInteractor(repo, NullSession(), RecordingRollups(repo.log)).maintain(0, 1, today=date(2026, 1, 5))
+    # Граница — 2025-12-01: удаляется всё, что целиком раньше неё
+    assert report.dropped == [
+        "insights_until_2025_11", "insights_p2025_11", "leads_until_2025_11", "leads_p2025_11",
+    ]
+    assert repo.log.index("drop insights_p2025_11") < repo.log.index("drop leads_until_2025_11")
+    # Инсайты из более новых партиций удаляются до партиции их лидов
+    assert repo.log.index("delete insights of leads_p2025_11") < repo.log.index("drop leads_p2025_11")
+    assert report.orphan_insights == 2
+    # Сводки идут за сырыми данными: часы удалённых партиций insights и поздних инсайтов удалённых лидов
+    assert repo.log.index("delete rollups before 2025-11-01") < repo.log.index("drop insights_p2025_11")
+    assert "delete rollups before 2025-12-01" in repo.log
+    assert "refresh rollups ['2025-12-01T09:00:00+00:00']" in repo.log
+    assert report.rollup_rows_deleted == 6
+    assert [p.name for p in repo.partitions["leads"]] == ["leads_p2026_01"]
+
+class FakeContainer:
+    def __init__(self, interactor):
+        self.interactor = interactor
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def get(self, dependency):
+        if isinstance(self.interactor, Exception):
+            raise self.interactor
+        return self.interactor
+
+async def test_startup_maintenance_creates_current_month_and_survives_errors():
+    # Cron пропустил смену месяца: партиции на текущий месяц нет, её создаёт старт процесса
+    repo = InMemoryPartitionRepository({"leads": _layout("leads"), "insights": _layout("insights")})
+    await ensure_partitions(FakeContainer(MaintainPartitionsInteractor(repo, NullSession(), RecordingRollups(repo.log))), 0)
+    current = datetime.now(timezone.utc).date().replace(day=1)
+    assert any(p.lower == current for p in repo.partitions["insights"])
+    assert not any(line.startswith("drop") for line in repo.log)
+
+    await ensure_partitions(FakeContainer(ConnectionError("db is down")), 0)
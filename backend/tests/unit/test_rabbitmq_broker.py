@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from infrastructure.queue.rabbitmq_broker import PublisherOverloadedError, RabbitMQMessageBroker
+
+pytestmark = pytest.mark.unit
+
+class FakeExchange:
+    def __init__(self, log: list):
+        self.log = log
+        self.release = asyncio.Event()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def publish(self, message, routing_key):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            # Подтверждение брокера приходит, когда тест его "отпускает"
+            await self.release.wait()
+            self.log.append((routing_key, message.body))
+        finally:
+            self.in_flight -= 1
+
+class FakeChannel:
+    def __init__(self, log: list):
+        self.exchange = FakeExchange(log)
+        self.closed = False
+
+    async def declare_exchange(self, *args, **kwargs):
+        return self.exchange
+
+    async def close(self):
+        self.closed = True
+
+class FakeConnection:
+    def __init__(self):
+        self.log: list = []
+        self.channels: list[FakeChannel] = []
+
+    async def channel(self, publisher_confirms: bool = True):
+        assert publisher_confirms
+        channel = FakeChannel(self.log)
+        self.channels.append(channel)
+        return channel
+
+    def release_all(self):
+        for channel in self.channels:
+            channel.exchange.release.set()
+
+async def test_in_flight_window_is_bounded_and_spread_over_channels():
+    connection = FakeConnection()
+    broker = RabbitMQMessageBroker(connection, channel_pool_size=2, max_in_flight=4)
+    broker.publish_many([{"n": i} for i in range(10)])
+    await asyncio.sleep(0.01)
+    assert broker.stats()["in_flight"] == 4
+    # Пятое сообщение уже взято диспетчером и ждёт места в окне
+    assert broker.stats()["pending"] == 5
+    assert [c.exchange.in_flight for c in connection.channels] == [2, 2]
+    connection.release_all()
+    await broker.close()
+    assert len(connection.log) == 10
+    assert all(c.closed for c in connection.channels)
+
+async def test_publish_and_confirm_waits_for_confirms():
+    connection = FakeConnection()
+    broker = RabbitMQMessageBroker(connection, channel_pool_size=3, max_in_flight=2)
+    task = asyncio.create_task(broker.publish_and_confirm([{"n": i} for i in range(5)], routing_key="x"))
+    await asyncio.sleep(0.01)
+    assert not task.done()
+    assert sum(c.exchange.max_in_flight for c in connection.channels) == 2
+    connection.release_all()
+    await task
+    assert [key for key, _ in connection.log] == ["x"] * 5
+    await broker.close()
+
+async def test_publish_rejects_when_pending_queue_is_full():
+    connection = FakeConnection()
+    broker = RabbitMQMessageBroker(connection, channel_pool_size=1, max_in_flight=1, max_pending=3)
+    broker.publish_many([{"n": i} for i in range(3)])
+    with pytest.raises(PublisherOverloadedError):
+        broker.publish({"n": 3})
+    await asyncio.sleep(0.01)
+    connection.release_all()
+    await broker.close()
+    assert len(connection.log) == 3
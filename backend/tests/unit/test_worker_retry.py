@@ -0,0 +1,142 @@
+import json
+
+import pytest
+from handlers.rabbitmq.retry import RETRY_COUNT_HEADER, RETRY_ERROR_HEADER, RetryPolicy, replay_parked
+from handlers.rabbitmq.worker import LeadCreatedWorker
+
+pytestmark = pytest.mark.unit
+
+class FakeMessage:
+    def __init__(self, body: bytes, headers: dict | None = None, log: list | None = None, tag: int = 0):
+        self.body = body
+        self.headers = headers or {}
+        self.content_type = "application/json"
+        self.content_encoding = None
+        self.message_id = "m1"
+        self.timestamp = None
+        self.outcome: str | None = None
+        self.log = log
+        self.tag = tag
+
+    async def ack(self, multiple: bool = False):
+        self.outcome = "ack"
+        if self.log is not None:
+            self.log.append(("ack", self.tag, multiple))
+
+    async def reject(self, requeue: bool = False):
+        self.outcome = "reject"
+
+    async def nack(self, requeue: bool = False):
+        self.outcome = "requeue"
+
+class FakeExchange:
+    def __init__(self):
+        self.published: list[tuple[str, object]] = []
+
+    async def publish(self, message, routing_key):
+        self.published.append((routing_key, message))
+
+class FakeQueue:
+    class Declared:
+        def __init__(self, count):
+            self.message_count = count
+
+    def __init__(self, messages):
+        self.messages = messages
+        self.declaration_result = self.Declared(len(messages))
+
+    async def get(self, no_ack=False, fail=True):
+        return self.messages.pop(0) if self.messages else None
+
+class FakeChannel:
+    def __init__(self, parked=()):
+        self.default_exchange = FakeExchange()
+        self.parking = FakeQueue(list(parked))
+        self.closed = False
+
+    async def set_qos(self, **kwargs):
+        pass
+
+    async def declare_queue(self, name, durable=True):
+        return self.parking
+
+    async def close(self):
+        self.closed = True
+
+class FakeConnection:
+    def __init__(self, channel):
+        self._channel = channel
+
+    async def channel(self, publisher_confirms=True):
+        return self._channel
+
+class FailingContainer:
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        raise ConnectionError("database is down")
+
+    async def __aexit__(self, *exc):
+        return False
+
+BODY = json.dumps({"lead_id": "00000000-0000-0000-0000-000000000001", "content_hash": "h", "content": "x"}).encode()
+
+def make_worker(retry):
+    worker = LeadCreatedWorker(None, FailingContainer(), retry=retry)  # type: ignore[arg-type]
+    worker._channel = FakeChannel()
+    return worker
+
+async def test_failed_message_backs_off_then_parks():
+    policy = RetryPolicy(max_retries=3, initial_delay_ms=100, max_delay_ms=300)
+    worker = make_worker(policy)
+    published = worker._channel.default_exchange.published
+    message = FakeMessage(BODY)
+    for _ in range(4):
+        await worker._handle(message)
+        assert message.outcome == "ack"
+        routing_key, copy = published[-1]
+        message = FakeMessage(copy.body, copy.headers)
+
+    assert [key for key, _ in published] == [
+        "lead.created.q.retry.100ms",
+        "lead.created.q.retry.200ms",
+        "lead.created.q.retry.300ms",
+        "lead.created.q.parking",
+    ]
+    assert [copy.headers[RETRY_COUNT_HEADER] for _, copy in published] == [1, 2, 3, 4]
+    assert published[-1][1].headers[RETRY_ERROR_HEADER] == "ConnectionError"
+    assert policy.delays_ms() == [100, 200, 300]
+
+async def test_without_policy_failed_message_is_requeued():
+    worker = make_worker(None)
+    message = FakeMessage(BODY)
+    await worker._handle(message)
+    assert message.outcome == "requeue"
+    assert not worker._channel.default_exchange.published
+
+async def test_replay_moves_parked_messages_with_reset_counter():
+    log: list = []
+    parked = [FakeMessage(b"%d" % i, {RETRY_COUNT_HEADER: 6, RETRY_ERROR_HEADER: "E"}, log, i) for i in range(5)]
+    channel = FakeChannel(parked)
+    moved = await replay_parked(FakeConnection(channel), "lead.created.q", RetryPolicy(), batch_size=2)
+
+    assert moved == 5
+    published = channel.default_exchange.published
+    assert [key for key, _ in published] == ["lead.created.q"] * 5
+    assert [m.body for _, m in published] == [b"0", b"1", b"2", b"3", b"4"]
+    assert all(m.headers == {RETRY_COUNT_HEADER: 0} for _, m in published)
+    # Пачка подтверждается одним ack(multiple) после публикации
+    assert log == [("ack", 1, True), ("ack", 3, True), ("ack", 4, True)]
+    assert channel.closed
+
+async def test_unsupported_format_goes_to_retry_not_reject():
+    # Например, msgpack на воркере без пакета: сообщение дождётся обновлённого воркера в retry/parking
+    worker = make_worker(RetryPolicy(max_retries=1, initial_delay_ms=100))
+    message = FakeMessage(b"\x81\xa1a\x01")
+    message.content_type = "application/x-protobuf"
+    await worker._handle(message)
+    assert message.outcome == "ack"
+    routing_key, copy = worker._channel.default_exchange.published[-1]
+    assert routing_key == "lead.created.q.retry.100ms"
+    assert copy.headers[RETRY_ERROR_HEADER] == "UnsupportedMessageFormat"
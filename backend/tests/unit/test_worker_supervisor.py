@@ -0,0 +1,62 @@
+import asyncio
+import os
+import signal
+import sys
+import time
+
+import pytest
+from handlers.rabbitmq.supervisor import WorkerSupervisor
+
+pytestmark = pytest.mark.unit
+
+# Цели дочерних процессов — функции модуля: spawn импортирует их заново
+
+def crashing_child(index, reports):
+    reports.put((index, os.getpid(), {"ack": 5}))
+    time.sleep(0.2)
+    sys.exit(1)
+
+def draining_child(index, reports):
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda *_: stopping.append(True))
+    handled = 0
+    while not stopping:
+        handled += 1
+        reports.put((index, os.getpid(), {"ack": handled}))
+        time.sleep(0.05)
+    # «Дочитали» начатое и отчитались последним итогом
+    reports.put((index, os.getpid(), {"ack": handled + 1}))
+
+def _supervisor(target, processes):
+    return WorkerSupervisor(
+        target,
+        processes,
+        shutdown_timeout=5,
+        initial_backoff=0.05,
+        max_backoff=0.2,
+        report_interval=0.2,
+        poll_interval=0.05,
+    )
+
+async def test_restarts_crashed_children_and_keeps_their_counts():
+    supervisor = _supervisor(crashing_child, 2)
+    runner = asyncio.create_task(supervisor.run())
+    await asyncio.sleep(3)
+    supervisor.stop()
+    await runner
+    stats = supervisor.stats()
+    assert stats["restarts"] >= 2
+    # Итоги упавших процессов не теряются при перезапуске
+    assert stats["messages"]["ack"] >= 10
+
+async def test_graceful_stop_waits_for_children():
+    supervisor = _supervisor(draining_child, 2)
+    runner = asyncio.create_task(supervisor.run())
+    await asyncio.sleep(2)
+    processes = [slot.process for slot in supervisor._slots]
+    supervisor.stop()
+    await runner
+    assert [p.exitcode for p in processes] == [0, 0]
+    stats = supervisor.stats()
+    assert stats["restarts"] == 0
+    assert stats["messages"]["ack"] > 2